@@ -0,0 +1,1599 @@
+"""
+Offline benchmark for DiceLinks.main().
+
+Serves Dice-shaped search and job pages from a local stub server, swaps in a
+fake Telegram endpoint and a fake Gmail service, and runs the full pipeline
+end to end at synthetic scales. Each scale runs in its own process so peak RSS
+is per scale. Nothing touches dice.com, Telegram or Gmail (except `record`).
+
+    python DiceBench.py                                   # 10 / 100 / 1,000 / 10,000 jobs
+    python DiceBench.py --scales 10,100 --save-baseline bench_baseline.json
+    python DiceBench.py --scales 10,100 --baseline bench_baseline.json --threshold 1.5
+    python DiceBench.py record --out bench_fixtures       # capture live job pages once
+    python DiceBench.py --fixtures bench_fixtures         # replay them
+    python DiceBench.py emails [--corpus DIR]             # email extractor speed + precision/recall, labelled + synthetic
+    python DiceBench.py history --rows 10000,100000       # job-history load time: xlsx vs Parquet
+    python DiceBench.py watch --postings 10               # time-to-notify under the `watch` daemon
+    python DiceBench.py skills [--xlsx dice_jobs_list.xlsx] # title filter / JD skill matcher speed + accuracy
+    python DiceBench.py parse                             # parser output vs baseline fixtures + pages/s per backend
+    python DiceBench.py faults --jobs 100                 # SIGKILL mid-send / mid-store, resume, check totals
+    python DiceBench.py telegram                          # Telegram pacing vs a rate-enforcing stub, retry_after
+"""
+import argparse
+import contextlib
+import glob
+import hashlib
+import json
+import os
+import random
+import re
+import resource
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# ─────────────────────────────────────────────────────────────────
+# CONFIGURATION
+# ─────────────────────────────────────────────────────────────────
+DEFAULT_SCALES     = [10, 100, 1000, 10000]
+DEFAULT_LATENCY_MS = 5        # stub server delay per request, a stand-in for network time
+DEFAULT_THRESHOLD  = 1.5      # regression: fail when a stage gets this much slower
+MIN_DELTA_MS       = 1.0      # ...and by at least this much, so timer noise doesn't fail runs
+MIN_P95_CALLS      = 20       # fewer calls than this and p95 is just the slowest outlier
+RESUME_FILE        = "Dinesh_Go_Resume.docx"
+
+# Stub pacing so the benchmark measures the pipeline, not the politeness limits
+BENCH_ENV = {
+    "DETAIL_HOST_RPS": "1000000",
+    "SEARCH_QUERIES":  "Golang",
+    "LOG_LEVEL":       "WARNING",
+    "EMAIL_ON_REBUILT_STORE": "1",   # every bench run starts from a new store, CI or not
+}
+
+# ─────────────────────────────────────────────────────────────────
+# FIXTURES — synthetic Dice markup, or job pages recorded with `record`
+# ─────────────────────────────────────────────────────────────────
+SEARCH_CARD = (
+    '<div class="card"><a data-testid="job-search-job-detail-link" href="/job-detail/{i}">'
+    'Golang Developer {i}</a>'
+    '<p class="mb-0 line-clamp-2 text-sm sm:line-clamp-1">Staffing Co {company}</p>'
+    '<p class="text-sm font-normal text-zinc-600">City {i}, TX</p>'
+    '<p id="employmentType-label">Contract</p><p id="salary-label">$60 - $70/hr</p></div>'
+)
+
+JOB_PAGE = """<html><body>
+<div data-testid="job-detail-header-card"><h1>{title}</h1>
+<a href="/company-profile/{company}">Staffing Co {company}</a>
+<div class="flex items-start"><div class="SeuiInfoBadge">Contract</div><div class="SeuiInfoBadge">Remote</div></div></div>
+<div class="jobDescription">
+<p><strong>Position:</strong> {title}</p>
+<p><strong>Location:</strong> {city} <strong>Duration:</strong> {months} months</p>
+<p><strong>Experience:</strong> {years}+ years</p>
+<p>{summary}</p>
+<strong>Must have skills:</strong>
+<ul>{must}</ul>
+<strong>Nice to have:</strong>
+<ul>{nice}</ul>
+<p>Send your resume to recruiter{i} at staffing{company}.com or recruiter{i}@staffing{company}.com</p>
+</div></body></html>"""
+
+# Building blocks for distinct synthetic JDs — every job draws its own mix
+JD_TITLES    = ["Golang Developer", "Senior Go Engineer", "Backend Engineer (Go)", "Go Developer", "Golang Backend Developer"]
+JD_CITIES    = ["Remote", "Chicago, IL", "Dallas, TX", "Austin, TX", "New York, NY", "Atlanta, GA", "Seattle, WA"]
+JD_SKILLS    = [
+    "Golang, goroutines, channels", "Kubernetes, Docker, Helm", "AWS (EKS, Lambda, S3, DynamoDB)",
+    "gRPC, REST, microservices", "PostgreSQL, Redis", "Kafka or RabbitMQ", "CI/CD with GitHub Actions",
+    "Terraform and infrastructure as code", "Prometheus, Grafana, OpenTelemetry", "GCP (GKE, Pub/Sub)",
+    "Azure (AKS, Service Bus)", "MongoDB, Cassandra", "Linux and shell scripting", "Python scripting",
+    "React for internal tools", "OAuth2, JWT, API security", "Event-driven architecture", "Unit and integration testing",
+]
+JD_SENTENCES = [
+    "Our client is modernizing a monolith into event-driven services.",
+    "You will own high-throughput payment APIs end to end.",
+    "The team ships small changes many times a day behind feature flags.",
+    "Expect on-call rotation for the services you build.",
+    "You will mentor two junior engineers and review their designs.",
+    "The platform processes billions of telemetry events per day.",
+    "Healthcare data experience and HIPAA awareness are a plus.",
+    "This role partners closely with data science on model serving.",
+    "Banking domain knowledge is preferred but not required.",
+    "You will migrate batch jobs to streaming pipelines.",
+    "Strong written communication for a distributed team is essential.",
+    "The stack runs on multi-region Kubernetes clusters.",
+]
+REPOST_EVERY = 10   # every 10th job re-posts the previous JD through another vendor
+
+def synthetic_job_page(i):
+    # A repost copies the previous job's JD under a different vendor and URL
+    seed = i - 1 if i % REPOST_EVERY == REPOST_EVERY - 1 else i
+    rng  = random.Random(seed)
+    return JOB_PAGE.format(
+        i=i,
+        company=i % 17,
+        title=rng.choice(JD_TITLES),
+        city=rng.choice(JD_CITIES),
+        months=rng.choice([6, 12, 18, 24]),
+        years=rng.randint(3, 12),
+        summary=" ".join(rng.sample(JD_SENTENCES, 5)),
+        must="".join(f"<li>{skill}</li>" for skill in rng.sample(JD_SKILLS, 7)),
+        nice="".join(f"<li>{skill}</li>" for skill in rng.sample(JD_SKILLS, 3)),
+    )
+
+def load_fixtures(directory):
+    """Recorded job pages (job_*.html), replayed round-robin; empty list for synthetic pages."""
+    if not directory:
+        return []
+    pages = []
+    for path in sorted(glob.glob(os.path.join(directory, "job_*.html"))):
+        with open(path, encoding="utf-8") as f:
+            pages.append(f.read())
+    if not pages:
+        sys.exit(f"No job_*.html fixtures in {directory}")
+    return pages
+
+def search_page(total, per_page, page, order=None):
+    """One search results page; `order` lists the job ids by rank (default 0..total-1)."""
+    order = order if order is not None else range(total)
+    ids   = order[page * per_page:(page + 1) * per_page]
+    cards = "".join(SEARCH_CARD.format(i=i, company=i % 17) for i in ids)
+    return f'<html><body><script>{{"totalResults":{len(order)},"pageSize":{per_page}}}</script>{cards}</body></html>'
+
+def publish_posting(server, rng):
+    """
+    Lists one new job and returns its id: on page 0 when the stub is sorted
+    newest-first, at a random rank under Dice's default relevance order.
+    """
+    job_id = len(server.order)
+    server.order.insert(0 if server.newest_first else rng.randint(0, len(server.order)), job_id)
+    return job_id
+
+def job_page(i, recorded):
+    if recorded:
+        return recorded[i % len(recorded)]
+    return synthetic_job_page(i)
+
+# ─────────────────────────────────────────────────────────────────
+# STUB SERVER — Dice search/job pages and the Telegram Bot API
+# ─────────────────────────────────────────────────────────────────
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True   # headers and body go out as separate writes
+
+    def do_GET(self):
+        server = self.server
+        time.sleep(server.latency)
+        url = urlparse(self.path)
+        if url.path == "/jobs":
+            page = int(parse_qs(url.query).get("page", ["0"])[0])
+            body = search_page(len(server.order), server.per_page, page, server.order)
+        elif url.path.startswith("/job-detail/"):
+            body = job_page(int(url.path.rsplit("/", 1)[1]), server.recorded)
+        else:
+            return self._reply(404, b"")
+        body = body.encode("utf-8")
+        etag = f'"{hashlib.sha1(body).hexdigest()[:16]}"'
+        if self.headers.get("If-None-Match") == etag:
+            return self._reply(304, b"", etag)
+        self._reply(200, body, etag)
+
+    def do_POST(self):
+        # Telegram sendMessage, held to the per-chat limits when the stub has a TelegramGate
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        time.sleep(self.server.latency)
+        gate = self.server.telegram_gate
+        retry_after = gate.check() if gate else None
+        if retry_after:
+            body = {"ok": False, "error_code": 429, "description": f"Too Many Requests: retry after {retry_after}",
+                    "parameters": {"retry_after": retry_after}}
+            return self._reply(429, json.dumps(body).encode("utf-8"))
+        self.server.telegram_messages += 1
+        self._reply(200, b'{"ok":true}')
+
+    def _reply(self, status, body, etag=None):
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def start_stub(total, per_page, latency_ms=DEFAULT_LATENCY_MS, recorded=(), newest_first=False):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads    = True
+    server.order             = list(range(total))
+    server.per_page          = per_page
+    server.latency           = latency_ms / 1000.0
+    server.recorded          = list(recorded)
+    server.telegram_messages = 0
+    server.newest_first      = newest_first
+    server.telegram_gate     = None
+    threading.Thread(target=server.serve_forever, name="stub-server", daemon=True).start()
+    return server
+
+class TelegramGate:
+    """
+    Telegram's per-chat limits as the stub enforces them: at most per_second
+    messages in any 1 s and per_minute in any 60 s, give or take SLACK for
+    network jitter, answered with 429 + parameters.retry_after like the Bot
+    API. The next `force` requests get a 429 of `force_retry_after` seconds
+    regardless. `posts` logs (time, status) of every request.
+    """
+
+    SLACK = 0.05   # seconds
+
+    def __init__(self, per_second, per_minute, force=0, force_retry_after=2):
+        self.windows  = [(per_second, 1.0), (per_minute, 60.0)]
+        self.force    = force
+        self.force_retry_after = force_retry_after
+        self.accepted = []
+        self.posts    = []
+        self.lock     = threading.Lock()
+
+    def check(self):
+        """None if the message is accepted, else the retry_after (s) of the 429."""
+        with self.lock:
+            now = time.monotonic()
+            retry_after = None
+            if self.force:
+                self.force -= 1
+                retry_after = self.force_retry_after
+            for limit, period in self.windows:
+                recent = [t for t in self.accepted if t > now - period + self.SLACK]
+                if len(recent) >= limit:
+                    wait = max(1, int(recent[-limit] + period - self.SLACK - now) + 1)
+                    retry_after = max(retry_after or 0, wait)
+            if retry_after is None:
+                self.accepted.append(now)
+            self.posts.append((now, 429 if retry_after else 200))
+            return retry_after
+
+    @property
+    def rejected(self):
+        return sum(1 for _, status in self.posts if status == 429)
+
+# ─────────────────────────────────────────────────────────────────
+# FAKE GMAIL — the slice of the googleapiclient surface MailQueue uses
+# ─────────────────────────────────────────────────────────────────
+class FakeGmail:
+    def __init__(self, latency_ms=DEFAULT_LATENCY_MS):
+        self.latency = latency_ms / 1000.0
+        self.sent    = 0
+        self.batches = 0
+        self.lock    = threading.Lock()
+
+    def users(self):
+        return self
+
+    def messages(self):
+        return self
+
+    def send(self, userId, body):
+        return _FakeSend(self)
+
+    def new_batch_http_request(self, callback):
+        return _FakeBatch(self, callback)
+
+class _FakeSend:
+    def __init__(self, gmail):
+        self.gmail = gmail
+
+    def execute(self):
+        with self.gmail.lock:
+            self.gmail.sent += 1
+            return {"id": f"bench-{self.gmail.sent}"}
+
+class _FakeBatch:
+    def __init__(self, gmail, callback):
+        self.gmail    = gmail
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id):
+        self.requests.append((request_id, request))
+
+    def execute(self):
+        time.sleep(self.gmail.latency)   # one round-trip per batch
+        self.gmail.batches += 1
+        for request_id, request in self.requests:
+            self.callback(request_id, request.execute(), None)
+
+class FakeGmailHandler(BaseHTTPRequestHandler):
+    """
+    Gmail over real HTTP for the googleapiclient client: the OAuth token
+    endpoint, messages.send and the multipart /batch endpoint.
+    """
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, body, content_type="application/json"):
+        data = body.encode() if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _authorized(self):
+        return self.headers.get("Authorization", "") in {f"Bearer {t}" for t in self.server.tokens}
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0)).decode("utf-8", "replace")
+        time.sleep(self.server.latency)
+        path = urlparse(self.path).path
+        if path == "/token":
+            time.sleep(self.server.token_delay)
+            with self.server.lock:
+                self.server.token_hits += 1
+                token = f"fake-access-{self.server.token_hits}"
+                self.server.tokens.add(token)
+            self._reply(200, json.dumps({"access_token": token, "expires_in": 3600, "token_type": "Bearer"}))
+        elif not self._authorized():
+            self._reply(401, json.dumps({"error": {"code": 401, "message": "invalid credentials"}}))
+        elif path.endswith("/messages/send"):
+            self._reply(200, json.dumps({"id": self._next_id()}))
+        elif path == "/batch" or path.startswith("/batch/"):
+            boundary = "fake-gmail-batch"
+            parts = [f"--{boundary}\r\nContent-Type: application/http\r\nContent-ID: <response-{content_id}>\r\n\r\n"
+                     f"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n\r\n{json.dumps({'id': self._next_id()})}\r\n"
+                     for content_id in re.findall(r"Content-ID: <([^>]+)>", body)]
+            with self.server.lock:
+                self.server.batches += 1
+            self._reply(200, "".join(parts) + f"--{boundary}--\r\n", f"multipart/mixed; boundary={boundary}")
+        else:
+            self._reply(404, "{}")
+
+    def _next_id(self):
+        with self.server.lock:
+            self.server.sent += 1
+            return f"fake-{self.server.sent}"
+
+def start_fake_gmail(latency_ms=DEFAULT_LATENCY_MS, token_delay=0.0):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeGmailHandler)
+    server.daemon_threads = True
+    server.latency     = latency_ms / 1000.0
+    server.token_delay = token_delay
+    server.lock        = threading.Lock()
+    server.tokens      = set()
+    server.token_hits  = server.sent = server.batches = 0
+    threading.Thread(target=server.serve_forever, name="fake-gmail", daemon=True).start()
+    return server
+
+def write_token_file(path):
+    """token.json as the CI secret holds it: a refresh token and an access token that has expired."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"token": "expired", "expiry": "2020-01-01T00:00:00Z", "refresh_token": "bench-refresh",
+                   "client_id": "bench-client", "client_secret": "bench-secret",
+                   "scopes": ["https://www.googleapis.com/auth/gmail.send"]}, f)
+
+# ─────────────────────────────────────────────────────────────────
+# ONE SCALE — runs in its own process
+# ─────────────────────────────────────────────────────────────────
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024   # bytes on macOS, KB on Linux
+
+def point_at_stubs(DiceLinks, server, gmail):
+    """Sends DiceLinks' Dice, Telegram and Gmail traffic to the stub server and fake Gmail."""
+    base = f"http://127.0.0.1:{server.server_port}"
+    DiceLinks.DICE_URL            = f"{base}/jobs?q=Golang"
+    DiceLinks.DiceSource.base_url = base
+    DiceLinks.TELEGRAM_URL        = f"{base}/botBENCH/sendMessage"
+    DiceLinks.TELEGRAM_LIMITER    = DiceLinks.TelegramLimiter(per_second=1000, per_minute=60000)
+    DiceLinks.get_gmail_service   = lambda: gmail
+    DiceLinks.configure_logging("WARNING")
+
+def run_one(jobs, latency_ms=DEFAULT_LATENCY_MS, fixtures=None):
+    """Runs DiceLinks.main() once against the stubs in a scratch directory and returns its report."""
+    os.environ.update(BENCH_ENV)
+    sys.path.insert(0, HERE)
+    import DiceLinks
+
+    workdir = tempfile.mkdtemp(prefix="dicebench-")
+    shutil.copy(os.path.join(HERE, RESUME_FILE), workdir)
+    os.chdir(workdir)
+    try:
+        per_page = max(20, -(-jobs // DiceLinks.SEARCH_MAX_PAGES))
+        server   = start_stub(jobs, per_page, latency_ms, load_fixtures(fixtures))
+        gmail    = FakeGmail(latency_ms)
+        point_at_stubs(DiceLinks, server, gmail)
+
+        started = time.perf_counter()
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            processed = DiceLinks.main()
+        wall = time.perf_counter() - started
+
+        report = DiceLinks.METRICS.report()
+        server.shutdown()
+        return {
+            "jobs":              jobs,
+            "processed":         processed,
+            "wall_seconds":      round(wall, 3),
+            "jobs_per_second":   round(processed / wall, 1) if wall else 0.0,
+            "peak_rss_mb":       round(peak_rss_mb(), 1),
+            "emails_sent":       gmail.sent,
+            "telegram_messages": server.telegram_messages,
+            "near_duplicates":   report.get("near_duplicates", 0),
+            "stages":            report["stages"],
+        }
+    finally:
+        os.chdir(HERE)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def run_scale(jobs, latency_ms, fixtures):
+    """run_one() in a fresh interpreter, so every scale starts cold and peak RSS is its own."""
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+        out = f.name
+    try:
+        cmd = [sys.executable, os.path.abspath(__file__), "one", "--jobs", str(jobs),
+               "--latency-ms", str(latency_ms), "--out", out]
+        if fixtures:
+            cmd += ["--fixtures", fixtures]
+        subprocess.run(cmd, check=True)
+        with open(out, encoding="utf-8") as f:
+            return json.load(f)
+    finally:
+        os.remove(out)
+
+# ─────────────────────────────────────────────────────────────────
+# REPORTING & REGRESSION CHECK
+# ─────────────────────────────────────────────────────────────────
+def print_result(result):
+    print(f"\n📊 {result['jobs']} jobs: {result['processed']} processed in {result['wall_seconds']:.2f} s "
+          f"({result['jobs_per_second']} jobs/s), peak RSS {result['peak_rss_mb']} MB, "
+          f"{result['emails_sent']} emails, {result['telegram_messages']} Telegram messages, "
+          f"{result.get('near_duplicates', 0)} reposts")
+    print(f"   {'stage':<13}{'calls':>8}{'busy s':>10}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for name, stats in result["stages"].items():
+        rate = stats["calls"] / stats["seconds"] if stats["seconds"] else 0.0
+        print(f"   {name:<13}{stats['calls']:>8}{stats['seconds']:>10.2f}{rate:>10.0f}"
+              f"{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}")
+
+def ms_per_job(result, stats):
+    return stats["seconds"] * 1000 / max(1, result["jobs"])
+
+def find_regressions(results, baseline, threshold=DEFAULT_THRESHOLD, min_delta_ms=MIN_DELTA_MS):
+    """
+    Stages whose busy time per job, or p95 latency when there are enough calls
+    to have one, grew by more than `threshold` times (and by at least
+    min_delta_ms) against the baseline at the same scale.
+    """
+    regressions = []
+    for scale, result in results.items():
+        base = baseline.get(scale)
+        if not base:
+            continue
+        for name, stats in result["stages"].items():
+            old = base["stages"].get(name)
+            if not old:
+                continue
+            checks = [("ms/job", ms_per_job(base, old), ms_per_job(result, stats))]
+            if min(old["calls"], stats["calls"]) >= MIN_P95_CALLS:
+                checks.append(("p95 ms", old["p95_ms"], stats["p95_ms"]))
+            for label, before, now in checks:
+                if now > before * threshold and now - before >= min_delta_ms:
+                    regressions.append(f"{scale} jobs · {name} {label}: {before:.2f} → {now:.2f}")
+    return regressions
+
+def bench(args):
+    scales  = [int(s) for s in args.scales.split(",") if s.strip()]
+    results = {}
+    for jobs in scales:
+        print(f"⏳ Running {jobs} jobs...")
+        results[str(jobs)] = run_scale(jobs, args.latency_ms, args.fixtures)
+        print_result(results[str(jobs)])
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Baseline saved to {args.save_baseline}")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = find_regressions(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} stage regression(s) beyond {args.threshold}x:")
+            for line in regressions:
+                print(f"   {line}")
+            return 1
+        print(f"\n✅ No stage slower than {args.threshold}x the baseline")
+    return 0
+
+# ─────────────────────────────────────────────────────────────────
+# WORKER SWEEP — detail enrichment throughput vs DETAIL_WORKERS
+# ─────────────────────────────────────────────────────────────────
+def bench_workers(args):
+    """
+    enrich_jobs() over the same job pages at each worker count, against the
+    stub with a fixed per-request latency — the shape of the real run, where
+    job pages are network-bound. Response store and detail cache are off, so
+    every page is a full fetch and parse.
+    """
+    counts = [int(w) for w in args.workers.split(",") if w.strip()]
+    os.environ.update({"DETAIL_WORKERS": str(max(counts)), "RESPONSE_STORE_ENTRIES": "0"})
+    DiceLinks = import_dicelinks()
+    server = start_stub(args.jobs, 20, args.latency_ms)
+    point_at_stubs(DiceLinks, server, FakeGmail())
+    urls = [f"/job-detail/{i}" for i in range(args.jobs)]
+
+    cap = f"{args.host_rps:g} req/s per host" if args.host_rps else "no per-host cap"
+    print(f"🧵 Detail enrichment of {args.jobs} job pages, {args.latency_ms:.0f} ms stub latency, {cap}")
+    print(f"   {'workers':>7}{'seconds':>10}{'pages/s':>10}{'speedup':>9}{'p50 ms':>9}")
+    first = None
+    for workers in counts:
+        DiceLinks.METRICS.reset()
+        started = time.perf_counter()
+        results = DiceLinks.enrich_jobs(urls, workers=workers, host_rps=args.host_rps)
+        elapsed = time.perf_counter() - started
+        failed  = sum(1 for result in results if result.get("Error") or not result["JD_data"])
+        first   = first or elapsed
+        p50     = DiceLinks.METRICS.report()["stages"]["detail_fetch"]["p50_ms"]
+        print(f"   {workers:>7}{elapsed:>10.2f}{args.jobs / elapsed:>10.1f}{first / elapsed:>8.1f}x{p50:>9.1f}"
+              + (f"   ❌ {failed} failed" if failed else ""))
+    server.shutdown()
+    return 0
+
+# ─────────────────────────────────────────────────────────────────
+# RECORD — capture live job pages once for replay
+# ─────────────────────────────────────────────────────────────────
+def record(args):
+    sys.path.insert(0, HERE)
+    import DiceLinks
+
+    os.makedirs(args.out, exist_ok=True)
+    source = DiceLinks.DiceSource(query=args.query)
+    html   = DiceLinks.fetch_search_page(source.url, 0)
+    if html is None:
+        print("❌ Could not fetch the search page")
+        return 1
+    with open(os.path.join(args.out, "search_0.html"), "w", encoding="utf-8") as f:
+        f.write(html)
+
+    saved = 0
+    for job in DiceLinks.parse_job_cards(html)[:args.jobs]:
+        response = DiceLinks.HTTP.get(source.job_url(job["URL"]), timeout=10)
+        if response.status_code != 200:
+            continue
+        with open(os.path.join(args.out, f"job_{saved}.html"), "w", encoding="utf-8") as f:
+            f.write(response.text)
+        saved += 1
+    print(f"💾 Recorded 1 search page and {saved} job pages in {args.out}")
+    return 0
+
+# ─────────────────────────────────────────────────────────────────
+# MICRO-BENCHMARKS — one function at a time on a page corpus
+# ─────────────────────────────────────────────────────────────────
+def time_per_item(fn, items, repeat=3):
+    """Best-of-`repeat` milliseconds per item for fn(item) over the whole list."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for item in items:
+            fn(item)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000 / max(1, len(items))
+
+def import_dicelinks():
+    os.environ.update(BENCH_ENV)
+    sys.path.insert(0, HERE)
+    import DiceLinks
+    return DiceLinks
+
+def load_corpus(directory):
+    """[(name, html, expected emails or None)] from *.html plus an optional labels.json."""
+    labels_path = os.path.join(directory, "labels.json")
+    labels = {}
+    if os.path.exists(labels_path):
+        with open(labels_path, encoding="utf-8") as f:
+            labels = json.load(f)
+    corpus = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.html"))):
+        name = os.path.basename(path)
+        with open(path, encoding="utf-8") as f:
+            expected = labels.get(name)
+            corpus.append((name, f.read(), {e.lower() for e in expected} if expected is not None else None))
+    return corpus
+
+# Noise a real job page carries around the JD: tracking config, asset names, prose
+EMAIL_NOISE = """<html><head>
+<script>window.__CONFIG__={{"sentryDsn":"https://abc{i}@o1.ingest.sentry.io/1","support":"support@dice.com",
+"apply":{{"contact":"applications{i}@dice-mailer.com"}}}};</script>
+<link rel="icon" href="/assets/icon@2x.png"><style>.x{{background:url(logo@3x.webp)}}</style></head><body>
+<div data-testid="job-detail-header-card"><h1>Golang Developer {i}</h1></div>
+<div class="jobDescription"><p>You will work at acme{i}.com with our client teams.</p>
+<p>{contact}</p>{mailto}
+<p>Do not reply to noreply@dice.com. Sample format: user@domain.com</p></div></body></html>"""
+
+EMAIL_CONTACTS = [
+    ("Email your resume to {name}@staffing{i}.com", "{name}@staffing{i}.com"),
+    ("Reach {name} [at] talent{i} [dot] com", "{name}@talent{i}.com"),
+    ("Write to {name}(at)hire{i}(dot)io today", "{name}@hire{i}.io"),
+    ("Contact: {name} at recruit{i} dot us", "{name}@recruit{i}.us"),
+]
+
+def synthetic_email_corpus(pages=200):
+    """Pages with known recruiter emails surrounded by hidden and decoy addresses."""
+    corpus = []
+    for i in range(pages):
+        text, email = EMAIL_CONTACTS[i % len(EMAIL_CONTACTS)]
+        name     = f"recruiter.{i}"
+        expected = {email.format(name=name, i=i).lower()}
+        mailto   = ""
+        if i % 3 == 0:
+            mailto = f'<a href="mailto:jobs{i}@agency{i}.com?subject=Golang">Apply by email</a>'
+            expected.add(f"jobs{i}@agency{i}.com")
+        html = EMAIL_NOISE.format(i=i, contact=text.format(name=name, i=i), mailto=mailto)
+        corpus.append((f"synthetic_{i}.html", html, expected))
+    return corpus
+
+def legacy_extract_emails(raw_html):
+    """The extractor this repo used before the precompiled engine: regex over raw HTML."""
+    filtered = set()
+    for email in re.findall(r"[a-zA-Z0-9._%+\-]+@[a-zA-Z0-9.\-]+\.[a-zA-Z]{2,}", raw_html or ""):
+        ext = email.split(".")[-1].lower()
+        lower = email.lower()
+        if ext in {"png", "jpg", "jpeg", "gif", "svg", "webp", "woff", "woff2", "css", "js"}:
+            continue
+        if any(pat in lower for pat in {"sentry", "example", "domain", "email", "user", "test",
+                                        "noreply", "no-reply", "placeholder"}):
+            continue
+        filtered.add(email)
+    return filtered
+
+def precision_recall(corpus, extract):
+    true_pos = false_pos = false_neg = 0
+    for _, html, expected in corpus:
+        if expected is None:
+            continue
+        found = {e.lower() for e in extract(html)}
+        true_pos  += len(found & expected)
+        false_pos += len(found - expected)
+        false_neg += len(expected - found)
+    precision = true_pos / (true_pos + false_pos) if true_pos + false_pos else 1.0
+    recall    = true_pos / (true_pos + false_neg) if true_pos + false_neg else 1.0
+    return precision, recall
+
+EMAIL_FIXTURES = os.path.join(HERE, "bench_fixtures", "emails")
+
+def bench_emails(args):
+    """Extractor speed and precision/recall on the labelled pages, then on a synthetic corpus."""
+    DiceLinks = import_dicelinks()
+    corpora = [(os.path.relpath(args.corpus, HERE), load_corpus(args.corpus))]
+    if args.pages:
+        corpora.append(("synthetic", synthetic_email_corpus(args.pages)))
+    for title, corpus in corpora:
+        labelled = sum(1 for _, _, expected in corpus if expected is not None)
+        htmls    = [html for _, html, _ in corpus]
+        parsed   = [DiceLinks.process_dice_description(html) for html in htmls]
+
+        candidates = [
+            ("legacy (raw HTML regex)", legacy_extract_emails, htmls),
+            ("engine (own parse)", DiceLinks.extract_emails_from_html, htmls),
+            ("engine (reusing JD parse)",
+             lambda jd: DiceLinks.extract_emails(jd["Full_Text"], jd["Mailto"]), parsed),
+        ]
+        print(f"📧 Email extraction, {title}: {len(corpus)} pages ({labelled} labelled)")
+        print(f"   {'extractor':<28}{'ms/page':>9}{'precision':>11}{'recall':>8}")
+        for name, extract, items in candidates:
+            ms = time_per_item(extract, items)
+            by_page = dict(zip(htmls, items))
+            precision, recall = precision_recall(corpus, lambda html: extract(by_page[html]))
+            print(f"   {name:<28}{ms:>9.3f}{precision:>11.2%}{recall:>8.2%}")
+    return 0
+
+def synthetic_history(rows, days=30):
+    """Job-store rows shaped like dice_jobs_list.xlsx: ~2 KB of JD text, half with emails."""
+    rng   = random.Random(rows)
+    words = " ".join(JD_SENTENCES + JD_SKILLS).split()
+    start = time.time() - days * 86400
+    records = []
+    for i in range(rows):
+        has_email = i % 2 == 0
+        sent      = has_email and i % 3 != 0
+        records.append({
+            "Title": rng.choice(JD_TITLES), "URL": f"https://www.dice.com/job-detail/{i:08x}",
+            "Company": f"Vendor {rng.randint(0, 400)}", "Location": rng.choice(JD_CITIES),
+            "Employment_Type": "Contract", "Salary": "$60 - $75 per hour",
+            "Job_JD": " ".join(rng.choices(words, k=330)),
+            "ATS_Score": f"{rng.uniform(5, 95):.2f}%", "Badges": "Contract W2 | Remote",
+            "Email": f"recruiter{i}@vendor.com" if has_email else "N/A",
+            "Email_Sent": "Y" if sent else "N/A",
+            "Email_Not_Sent_Reason": "Sent successfully" if sent else "Less ATS score",
+            "Added_At": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(start + i * days * 86400 / rows)),
+        })
+    return records
+
+def dir_size_mb(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path) / 1e6
+    return sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(path) for f in files) / 1e6
+
+def bench_history(args):
+    DiceLinks = import_dicelinks()
+    import pandas as pd
+    for rows in [int(n) for n in args.rows.split(",")]:
+        workdir = tempfile.mkdtemp(prefix="dicebench-history-")
+        try:
+            records = synthetic_history(rows)
+            archive = DiceLinks.HistoryArchive(os.path.join(workdir, "history"))
+            store   = DiceLinks.JobStore(os.path.join(workdir, "dice_jobs.db"), history_dir=archive.root)
+            store.add_records(records)
+            archive.sync(store)
+            xlsx = os.path.join(workdir, "dice_jobs_list.xlsx")
+            with_xlsx = rows <= args.xlsx_max_rows
+            if with_xlsx:
+                store.export_excel(xlsx)
+
+            def sqlite_urls():
+                with store.lock:
+                    return {row[0] for row in store.conn.execute('SELECT "URL" FROM jobs')}
+
+            candidates = [
+                ("xlsx, all columns", lambda: pd.read_excel(xlsx, engine="openpyxl"), with_xlsx, xlsx),
+                ("xlsx, URL column", lambda: pd.read_excel(xlsx, engine="openpyxl", usecols=["URL"]), with_xlsx, xlsx),
+                ("sqlite, URL column", sqlite_urls, True, store.path),
+                ("parquet, URL column (mmap)", archive.urls, True, archive.root),
+                ("parquet, analytics columns", lambda: DiceLinks.history_stats(archive), True, archive.root),
+                ("parquet, all columns", lambda: archive.query(DiceLinks.JOB_COLUMNS), True, archive.root),
+            ]
+            print(f"\n📚 Job history, {rows:,} rows over {len(archive.partitions())} daily partitions")
+            print(f"   {'load':<30}{'ms':>10}{'MB on disk':>12}")
+            for name, load, enabled, path in candidates:
+                if not enabled:
+                    print(f"   {name:<30}{'skipped':>10}")
+                    continue
+                repeat = 1 if name.startswith("xlsx") else 3
+                ms = time_per_item(lambda _: load(), [None], repeat=repeat)
+                print(f"   {name:<30}{ms:>10.1f}{dir_size_mb(path):>12.1f}")
+            store.close()
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+# Stand-in relevance label for the stored history: the JD itself talks about
+# Go as a language ("golang", "Go, Python", "(Go)", "Go developer"...)
+GO_ROLE_PATTERN = re.compile(
+    r"golang|[,/(]\s*Go\b|\bGo\s*[,/)]|\bGo\s+(?:developer|engineer|programming|language|lang|microservices)", re.I)
+
+def legacy_title_matches(title, keywords):
+    """The title filter this repo used before the matcher: plain substring test."""
+    return any(k in (title or "").lower() for k in keywords)
+
+def scan_skills(text, taxonomy):
+    """Naive skill extraction: one substring + boundary regex per phrase."""
+    lowered = (text or "").lower()
+    found = set()
+    for canonical, synonyms in taxonomy.items():
+        for phrase in [canonical, *synonyms]:
+            if phrase.lower() in lowered and re.search(
+                    rf"(?<![A-Za-z0-9]){re.escape(phrase)}(?![A-Za-z0-9])", text,
+                    0 if phrase != phrase.lower() else re.I):
+                found.add(canonical)
+                break
+    return found
+
+def bench_skills(args):
+    DiceLinks = import_dicelinks()
+    import pandas as pd
+    df = pd.read_excel(args.xlsx, engine="openpyxl")
+    titles = df["Title"].fillna("").astype(str).tolist()
+    jds    = df["Job_JD"].fillna("").astype(str).tolist()
+    labels = [bool(GO_ROLE_PATTERN.search(f"{title} {jd}")) for title, jd in zip(titles, jds)]
+    keywords = DiceLinks.TITLE_KEYWORDS
+
+    print(f"🎯 Title filter on {len(titles)} stored titles ({sum(labels)} look like Go roles from their JD)")
+    print(f"   {'filter':<26}{'µs/title':>9}{'kept':>7}{'false pos':>11}{'FP rate':>9}{'missed':>8}")
+    for name, match in [("legacy substring", lambda t: legacy_title_matches(t, keywords)),
+                        ("aho-corasick, whole word", DiceLinks.title_matches)]:
+        us   = time_per_item(match, titles) * 1000
+        kept = [match(title) for title in titles]
+        fp   = sum(1 for k, relevant in zip(kept, labels) if k and not relevant)
+        miss = sum(1 for k, relevant in zip(kept, labels) if relevant and not k)
+        print(f"   {name:<26}{us:>9.2f}{sum(kept):>7}{fp:>11}{fp / max(1, sum(kept)):>9.1%}{miss:>8}")
+
+    taxonomy = DiceLinks.load_skill_taxonomy()
+    matcher  = DiceLinks.skill_matcher()
+    phrases  = sum(1 + len(synonyms) for synonyms in taxonomy.values())
+    print(f"\n🧩 Skill extraction from {len(jds)} JDs ({len(taxonomy)} skills, {phrases} phrases)")
+    print(f"   {'extractor':<26}{'ms/JD':>9}{'skills/JD':>11}")
+    for name, extract in [("per-phrase regex scan", lambda jd: scan_skills(jd, taxonomy)),
+                          ("aho-corasick, one pass", lambda jd: set(matcher.skills(jd)))]:
+        ms    = time_per_item(extract, jds)
+        found = sum(len(extract(jd)) for jd in jds)
+        print(f"   {name:<26}{ms:>9.3f}{found / max(1, len(jds)):>11.1f}")
+    disagree = sum(1 for jd in jds if scan_skills(jd, taxonomy) != set(matcher.skills(jd)))
+    print(f"   JDs where the two disagree: {disagree}")
+    return 0
+
+def enrich_inputs(DiceLinks, count, distinct=200):
+    """count search cards plus a detail and score for each; `distinct` JD pages are parsed and reused."""
+    html  = search_page(count, count, 0)
+    cards = DiceLinks.parse_job_cards(html)
+    pages = []
+    for i in range(distinct):
+        JD_data = DiceLinks.process_dice_description(synthetic_job_page(i))
+        emails  = DiceLinks.extract_emails(JD_data["Full_Text"], JD_data.get("Mailto", ()))
+        pages.append({"JD_data": JD_data, "Emails": emails})
+    rng    = random.Random(count)
+    scores = [round(rng.uniform(20, 90), 1) for _ in cards]
+    return cards, [pages[i % distinct] for i in range(len(cards))], scores
+
+def legacy_enrich(DiceLinks, cards, details, scores):
+    """The original main loop: one DataFrame, filled cell by cell through iterrows() and df.at."""
+    import pandas as pd
+    df = pd.DataFrame(cards, columns=DiceLinks.SEARCH_COLUMNS)
+    for column in ("Job_JD", "ATS_Score", "Badges", "Email", "Email_Sent", "Email_Not_Sent_Reason"):
+        df[column] = None
+    for (index, row), detail, score in zip(df.iterrows(), details, scores):
+        JD_data = detail["JD_data"]
+        email   = DiceLinks.format_emails(detail["Emails"])
+        df.at[index, "ATS_Score"] = f"{score}%"
+        df.at[index, "Email"]     = email
+        if JD_data:
+            df.at[index, "Company"] = JD_data.get("Company", "")
+            df.at[index, "Badges"]  = JD_data.get("Badges", "")
+            df.at[index, "Title"]   = JD_data.get("Title", "")
+            df.at[index, "Job_JD"]  = str(JD_data.get("Full_Text", ""))
+        if score >= DiceLinks.ATS_EMAIL_THRESHOLD and email != "N/A":
+            df.at[index, "Email_Sent"], df.at[index, "Email_Not_Sent_Reason"] = "Y", "Sent successfully"
+        elif score >= DiceLinks.ATS_EMAIL_THRESHOLD:
+            df.at[index, "Email_Sent"], df.at[index, "Email_Not_Sent_Reason"] = "N/A", "No email"
+        else:
+            df.at[index, "Email_Sent"], df.at[index, "Email_Not_Sent_Reason"] = "N/A", "Less ATS score"
+    return df
+
+def dict_enrich(DiceLinks, cards, details, scores):
+    """Per-job dicts with text columns, as the streaming pipeline kept them before JobRecord."""
+    jobs = []
+    for card, detail, score in zip(cards, details, scores):
+        job, JD_data = dict(card), detail["JD_data"]
+        job["ATS_Score"] = f"{score}%"
+        job["Email"]     = DiceLinks.format_emails(detail["Emails"])
+        if JD_data:
+            job["Company"] = JD_data.get("Company", "")
+            job["Badges"]  = JD_data.get("Badges", "")
+            job["Title"]   = JD_data.get("Title", "")
+            job["Job_JD"]  = str(JD_data.get("Full_Text", ""))
+        if score >= DiceLinks.ATS_EMAIL_THRESHOLD and job["Email"] != "N/A":
+            job["Email_Sent"], job["Email_Not_Sent_Reason"] = "Y", "Sent successfully"
+        elif score >= DiceLinks.ATS_EMAIL_THRESHOLD:
+            job["Email_Sent"], job["Email_Not_Sent_Reason"] = "N/A", "No email"
+        else:
+            job["Email_Sent"], job["Email_Not_Sent_Reason"] = "N/A", "Less ATS score"
+        jobs.append(job)
+    return jobs
+
+def record_enrich(DiceLinks, cards, details, scores):
+    """JobRecord.from_card + apply_detail + set_email_status, as main() does now."""
+    EmailStatus, jobs = DiceLinks.EmailStatus, []
+    for card, detail, score in zip(cards, details, scores):
+        job = DiceLinks.JobRecord.from_card(card)
+        job.apply_detail(detail, score)
+        if score < DiceLinks.ATS_EMAIL_THRESHOLD:
+            job.set_email_status(EmailStatus.LOW_SCORE)
+        else:
+            job.set_email_status(EmailStatus.SENT if job.emails else EmailStatus.NO_EMAIL)
+        jobs.append(job)
+    return jobs
+
+def measure(fn, repeat=3):
+    """(best seconds, tracemalloc peak MB, MB still held by the result) for fn()."""
+    import gc
+    import tracemalloc
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        result  = fn()
+        best    = min(best, time.perf_counter() - started)
+        del result
+    gc.collect()
+    tracemalloc.start()
+    result = fn()
+    gc.collect()
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return best, peak / 2**20, held / 2**20
+
+def bench_enrich(args):
+    DiceLinks = import_dicelinks()
+    import pandas as pd
+    cards, details, scores = enrich_inputs(DiceLinks, args.count)
+    records = record_enrich(DiceLinks, cards, details, scores)
+    legacy  = legacy_enrich(DiceLinks, cards, details, scores)
+    exported = DiceLinks.records_frame(records)
+    same = exported.astype(object).fillna("").equals(legacy[DiceLinks.JOB_COLUMNS].astype(object).fillna(""))
+    assert same, "JobRecord rows differ from the legacy loop"
+
+    print(f"🧱 Enrichment stage on {len(cards)} jobs (JD, ATS score, email status; no I/O)")
+    print(f"   {'path':<34}{'total ms':>10}{'µs/job':>9}{'peak MB':>9}{'held MB':>9}")
+    paths = [("DataFrame + iterrows/df.at", lambda: legacy_enrich(DiceLinks, cards, details, scores)),
+             ("dict per job, text columns", lambda: dict_enrich(DiceLinks, cards, details, scores)),
+             ("JobRecord (slots, typed)", lambda: record_enrich(DiceLinks, cards, details, scores)),
+             ("  + records_frame() at export", lambda: DiceLinks.records_frame(record_enrich(DiceLinks, cards, details, scores)))]
+    for name, fn in paths:
+        seconds, peak, held = measure(fn, args.repeat)
+        print(f"   {name:<34}{seconds * 1000:>10.1f}{seconds * 1e6 / len(cards):>9.1f}{peak:>9.2f}{held:>9.2f}")
+    deep_mb = lambda df: df.memory_usage(deep=True).sum() / 2**20
+    print(f"   DataFrame size incl. buffers tracemalloc cannot see: legacy {deep_mb(legacy):.2f} MB, "
+          f"export {deep_mb(exported):.2f} MB")
+    one = records[0]
+    print(f"   one JobRecord: {sys.getsizeof(one)} B (no __dict__: {not hasattr(one, '__dict__')}), "
+          f"one job dict: {sys.getsizeof(dict_enrich(DiceLinks, cards[:1], details[:1], scores[:1])[0])} B, "
+          f"pandas {pd.__version__}")
+    return 0
+
+def bench_gmail(args):
+    """
+    The real googleapiclient send path against a local fake Gmail: cold
+    auth (token refresh), warm auth (access token kept in process memory),
+    MIME build and batch API latency per message, and how fast a run with no
+    usable token gives up.
+    """
+    DiceLinks = import_dicelinks()
+    workdir   = tempfile.mkdtemp(prefix="dicebench-gmail-")
+    shutil.copy(os.path.join(HERE, RESUME_FILE), workdir)
+    os.chdir(workdir)
+    server = start_fake_gmail(args.latency_ms, token_delay=args.token_ms / 1000.0)
+    base   = f"http://127.0.0.1:{server.server_port}"
+    DiceLinks.GMAIL_API_ENDPOINT = base
+    DiceLinks.GMAIL_TOKEN_URI    = f"{base}/token"
+
+    def auth(label):
+        write_token_file(DiceLinks.TOKEN_FILE)   # as every CI run does from the secret
+        DiceLinks.METRICS.reset()
+        hits    = server.token_hits
+        started = time.perf_counter()
+        service = DiceLinks.get_gmail_service(interactive=False)
+        elapsed = time.perf_counter() - started
+        print(f"   {label:<38}{elapsed * 1000:>9.1f} ms   token refreshes: {server.token_hits - hits}")
+        return service
+
+    print(f"🔐 Gmail auth against a fake endpoint ({args.token_ms:.0f} ms token refresh, "
+          f"{args.latency_ms:.0f} ms per request)")
+    started = time.perf_counter()
+    import googleapiclient.discovery, google_auth_httplib2, google.oauth2.credentials   # noqa: F401
+    print(f"   {'client library imports (once per run)':<38}{(time.perf_counter() - started) * 1000:>9.1f} ms")
+    auth("cold: no cached access token")
+    service = auth("warm: access token in process memory")
+
+    DiceLinks.METRICS.reset()
+    mail = DiceLinks.MailQueue(service=service)
+    for i in range(args.messages):
+        mail.add(i, f"recruiter{i}@staffing.example", f"Golang Developer {i}")
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        results = mail.flush()
+    sent   = sum(ok for outcomes in results.values() for _, ok, _, _ in outcomes)
+    stages = DiceLinks.METRICS.report()["stages"]
+    print(f"\n📧 {sent}/{args.messages} messages sent in {server.batches} batch round-trips")
+    for name in ("mime", "gmail"):
+        stats = stages[name]
+        print(f"   {name:<8} calls {stats['calls']:>4}   p50 {stats['p50_ms']:>8.2f} ms   p95 {stats['p95_ms']:>8.2f} ms   "
+              f"{stats['seconds'] * 1000 / max(1, args.messages):.2f} ms per message")
+
+    print("\n⛔ Non-interactive run without a usable token")
+    DiceLinks._access_tokens.clear()
+    if os.path.exists(DiceLinks.TOKEN_FILE):
+        os.remove(DiceLinks.TOKEN_FILE)
+    for label, prepare in [("no token.json", lambda: None),
+                           ("token refresh hangs", lambda: write_token_file(DiceLinks.TOKEN_FILE))]:
+        prepare()
+        server.token_delay, DiceLinks.GMAIL_TIMEOUT = (30.0, 1.0) if "hangs" in label else (0.0, 20.0)
+        started = time.perf_counter()
+        try:
+            DiceLinks.get_gmail_service(interactive=False)
+            outcome = "authenticated?!"
+        except DiceLinks.GmailAuthError as e:
+            outcome = f"GmailAuthError: {str(e)[:60]}"
+        print(f"   {label:<22}{(time.perf_counter() - started) * 1000:>9.1f} ms   {outcome}")
+    return 0 if sent == args.messages else 1
+
+def legacy_ats_score(resume_text, jd_keywords):
+    """calculate_ats_score() as it was: a new TfidfVectorizer fitted on two documents per call."""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.metrics.pairwise import cosine_similarity
+    res_clean = re.sub(r"[^\w\s]", " ", resume_text).lower()
+    jd_clean  = re.sub(r"[^\w\s]", " ", jd_keywords).lower()
+    jd_words, res_words = set(jd_clean.split()), set(res_clean.split())
+    keyword_score = len(jd_words & res_words) / len(jd_words) if jd_words else 0
+    try:
+        tfidf = TfidfVectorizer(stop_words="english", ngram_range=(1, 2)).fit_transform([res_clean, jd_clean])
+        context_score = cosine_similarity(tfidf[0:1], tfidf[1:2])[0][0]
+    except ValueError:
+        context_score = 0
+    return round((keyword_score * 0.7 + context_score * 0.3) * 100, 2)
+
+def bench_ats(args):
+    """
+    Per-job vs batch ATS scoring of the same synthetic JDs, no score cache.
+    Fails if any job scores differently alone than inside a batch.
+    """
+    DiceLinks = import_dicelinks()
+    counts = [int(n) for n in args.counts.split(",") if n.strip()]
+    resume = DiceLinks.read_word_resume(os.path.join(HERE, RESUME_FILE))
+    jds    = [DiceLinks.process_dice_description(synthetic_job_page(i)) for i in range(max(counts))]
+    texts  = [DiceLinks.extract_jd_keywords(jd) for jd in jds]
+    DiceLinks.score_jobs(resume, jds[:1])   # sklearn / scipy imports are not part of the comparison
+
+    print(f"🎯 ATS scoring, {len(resume.split())}-word resume, no score cache")
+    print(f"   {'JDs':>6}{'per-job (old) ms':>18}{'per-job (API) ms':>18}{'batch ms':>10}{'speedup':>9}{'mean |Δ|':>10}")
+    for n in counts:
+        timings = {}
+        for name, run in [("old", lambda: [legacy_ats_score(resume, text) for text in texts[:n]]),
+                          ("api", lambda: [DiceLinks.calculate_ats_score(resume, text) for text in texts[:n]]),
+                          ("batch", lambda: DiceLinks.score_jobs(resume, jds[:n]))]:
+            best = float("inf")
+            for _ in range(args.repeat if n < 1000 or name == "batch" else 1):
+                started = time.perf_counter()
+                scores  = run()
+                best    = min(best, time.perf_counter() - started)
+            timings[name] = (best, scores)
+        old, batch = timings["old"][1], timings["batch"][1]
+        delta = sum(abs(a - b) for a, b in zip(old, batch)) / n
+        print(f"   {n:>6}{timings['old'][0] * 1000:>18.1f}{timings['api'][0] * 1000:>18.1f}"
+              f"{timings['batch'][0] * 1000:>10.1f}{timings['old'][0] / timings['batch'][0]:>8.1f}x{delta:>10.2f}")
+    print("   mean |Δ|: batch vs old score in points — the resume now also carries the canonical")
+    print("   names of its skills, as the JD keywords always did, so resume-side aliases match too")
+
+    # A score must not depend on which jobs share its micro-batch (SCORE_BATCH_SIZE)
+    n      = min(max(counts), 100)
+    alone  = [DiceLinks.score_jobs(resume, [jd])[0] for jd in jds[:n]]
+    size   = DiceLinks.SCORE_BATCH_SIZE
+    batch  = [score for start in range(0, n, size) for score in DiceLinks.score_jobs(resume, jds[start:start + size])]
+    whole  = DiceLinks.score_jobs(resume, jds[:n])
+    drift  = max(max(abs(a - b), abs(a - c)) for a, b, c in zip(alone, batch, whole))
+    print(f"   {'✅' if drift == 0 else '❌'} alone vs batch of {size} vs batch of {n}: max |Δ| {drift:.2f}")
+    return 0 if drift == 0 else 1
+
+PARSE_FIXTURES = os.path.join(HERE, "bench_fixtures", "parse")
+# Baseline output keys of process_dice_description(); newer keys (e.g. Mailto) are not compared
+LEGACY_JD_KEYS = ("Title", "Company", "Location", "Experience", "Duration",
+                  "Employment_Type", "Badges", "Sections", "Full_Text")
+
+def legacy_parse_cards(html_text, parser="html.parser"):
+    """process_job_links() as it was, minus the title filter: one find_next() scan per card field."""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html_text, parser)
+    jobs_data = []
+    for job in soup.find_all("a", attrs={"data-testid": "job-search-job-detail-link"}):
+        fields = {}
+        for field, kwargs in [("Location",        {"class_": "text-sm font-normal text-zinc-600"}),
+                              ("Employment_Type", {"id": "employmentType-label"}),
+                              ("Salary",          {"id": "salary-label"}),
+                              ("Company",         {"class_": "mb-0 line-clamp-2 text-sm sm:line-clamp-1"})]:
+            tag = job.find_next("p", **kwargs)
+            fields[field] = tag.get_text(strip=True) if tag else None
+        jobs_data.append({"Title": job.get_text(strip=True), "URL": job.get("href"), **fields})
+    return jobs_data
+
+def legacy_process_description(html_text, parser="html.parser"):
+    """process_dice_description() as it was: get_text() and find_next() per tag."""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html_text, parser)
+    job_data = {key: None for key in LEGACY_JD_KEYS}
+    job_data.update(Badges=[], Sections={})
+
+    header_card = soup.find("div", {"data-testid": "job-detail-header-card"})
+    if header_card:
+        title_tag = header_card.find("h1")
+        if title_tag: job_data["Title"] = title_tag.get_text(strip=True)
+        company_tag = header_card.find("a", href=re.compile("company-profile"))
+        if company_tag: job_data["Company"] = company_tag.get_text(strip=True)
+        badge_container = header_card.find("div", class_=re.compile("items-start|badge"))
+        if badge_container:
+            badges = badge_container.find_all("div", class_=re.compile("SeuiInfoBadge|badge"))
+            job_data["Badges"] = " | ".join([b.get_text(strip=True) for b in badges])
+
+    container = soup.find("div", class_=re.compile("jobDescription|description"))
+    if not container:
+        container = soup.find("body") or soup
+
+    for p in container.find_all(["p", "div", "li"]):
+        full_line = p.get_text(" ", strip=True)
+        if not full_line: continue
+        lower_line = full_line.lower()
+        if "position:" in lower_line or "job title:" in lower_line:
+            if not job_data["Title"]:
+                job_data["Title"] = re.sub(r"(job title|position):\s*", "", full_line, flags=re.I).strip()
+        if "location:" in lower_line:
+            job_data["Location"] = re.search(r"Location:\s*(.*?)(?=Duration:|$)", full_line, re.I).group(1).strip()
+        if "duration:" in lower_line:
+            match = re.search(r"Duration:\s*(.*)", full_line, re.I)
+            if match:
+                job_data["Duration"] = match.group(1).strip()
+        if "experience:" in lower_line:
+            job_data["Experience"] = re.sub(r"experience:\s*", "", full_line, flags=re.I).strip()
+        if "employment type:" in lower_line:
+            job_data["Employment_Type"] = re.sub(r"employment type:\s*", "", full_line, flags=re.I).strip()
+
+    for strong in container.find_all("strong"):
+        section_title = strong.get_text(strip=True)
+        if section_title.lower().rstrip(':') in ['position', 'location', 'duration', 'experience', 'main skills']:
+            continue
+        ul = strong.find_next("ul")
+        if ul:
+            items = [li.get_text(" ", strip=True) for li in ul.find_all("li")]
+            if items:
+                job_data["Sections"][section_title] = items
+
+    job_data["Full_Text"] = container.get_text(" ", strip=True)
+    return job_data
+
+def parse_fixture_pages(directory):
+    """{name: html} for the search_*.html and job_*.html pages in a parse fixture directory."""
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(directory, "search_*.html")) + glob.glob(os.path.join(directory, "job_*.html"))):
+        with open(path, encoding="utf-8") as f:
+            pages[os.path.basename(path)] = f.read()
+    if not pages:
+        sys.exit(f"No search_*.html / job_*.html fixtures in {directory}")
+    return pages
+
+def parse_page(name, html, cards, description):
+    if name.startswith("search_"):
+        return cards(html)
+    return {key: value for key, value in description(html).items() if key in LEGACY_JD_KEYS}
+
+def available_parsers():
+    try:
+        import lxml  # noqa: F401
+        return ["html.parser", "lxml"]
+    except ImportError:
+        return ["html.parser"]
+
+def bench_parse(args):
+    """
+    Checks parse_job_cards() / process_dice_description() against the
+    baseline parser's saved output on every fixture page, with each
+    installed backend, then times old vs new on fixture and synthetic pages.
+    """
+    DiceLinks = import_dicelinks()
+    pages     = parse_fixture_pages(args.fixtures)
+    expected_path = os.path.join(args.fixtures, "expected.json")
+    if args.write_expected:
+        expected = {name: parse_page(name, html, legacy_parse_cards, legacy_process_description)
+                    for name, html in pages.items()}
+        with open(expected_path, "w", encoding="utf-8") as f:
+            json.dump(expected, f, indent=2, ensure_ascii=False, sort_keys=True)
+            f.write("\n")
+        print(f"📝 Baseline parser output for {len(expected)} pages → {expected_path}")
+        return 0
+    with open(expected_path, encoding="utf-8") as f:
+        expected = json.load(f)
+
+    original, failures = DiceLinks.HTML_PARSER, []
+    try:
+        print(f"🧪 Parser output vs baseline ({len(pages)} fixture pages)")
+        for parser in available_parsers():
+            DiceLinks.HTML_PARSER = parser
+            bad = []
+            for name, html in pages.items():
+                # JSON round trip so tuples/lists compare the way they were saved
+                got = json.loads(json.dumps(parse_page(name, html, DiceLinks.parse_job_cards,
+                                                       DiceLinks.process_dice_description)))
+                if got != expected.get(name):
+                    bad.append(name)
+            failures += bad
+            print(f"   {'❌' if bad else '✅'} {parser:<12} {len(pages) - len(bad)}/{len(pages)} pages identical"
+                  + (f" — differs: {', '.join(bad)}" if bad else ""))
+
+        search = [search_page(args.cards, args.cards, 0)]
+        jobs   = [synthetic_job_page(i) for i in range(args.pages)]
+        print(f"\n⏱  Parse throughput, pages/s (best of {args.repeat})")
+        print(f"   {'page set':<28}{'parser':<13}{'old':>9}{'new':>9}{'speedup':>9}")
+        for label, items, old, new in [
+                ("fixtures", list(pages.items()),
+                 lambda item, p: parse_page(*item, lambda h: legacy_parse_cards(h, p), lambda h: legacy_process_description(h, p)),
+                 lambda item, p: parse_page(*item, DiceLinks.parse_job_cards, DiceLinks.process_dice_description)),
+                (f"search page, {args.cards} cards", search,
+                 legacy_parse_cards, lambda html, p: DiceLinks.parse_job_cards(html)),
+                (f"job pages ×{args.pages}", jobs,
+                 legacy_process_description, lambda html, p: DiceLinks.process_dice_description(html))]:
+            for parser in available_parsers():
+                DiceLinks.HTML_PARSER = parser
+                old_s = time_per_item(lambda item: old(item, parser), items, args.repeat)
+                new_s = time_per_item(lambda item: new(item, parser), items, args.repeat)
+                print(f"   {label:<28}{parser:<13}{1000 / old_s:>9.1f}{1000 / new_s:>9.1f}{old_s / new_s:>8.1f}x")
+    finally:
+        DiceLinks.HTML_PARSER = original
+    return 1 if failures else 0
+
+def bench_telegram(args):
+    """
+    Sends job cards through TelegramNotifier to the stub's rate-limited
+    Telegram endpoint at DiceLinks' default limits: no request may draw a 429.
+    Then forces one 429 and checks the retry waits out its retry_after.
+    """
+    DiceLinks = import_dicelinks()
+    server = start_stub(0, 20, args.latency_ms)
+    point_at_stubs(DiceLinks, server, FakeGmail(args.latency_ms))
+    failures = 0
+
+    # 1. Default pacing against the real per-chat limits: one card per message
+    server.telegram_gate = gate = TelegramGate(DiceLinks.TELEGRAM_PER_SECOND, DiceLinks.TELEGRAM_PER_MINUTE)
+    limiter  = DiceLinks.TelegramLimiter()
+    card     = "x" * (DiceLinks.TELEGRAM_MAX_CHARS // 2 + 1)
+    started  = time.perf_counter()
+    notifier = DiceLinks.TelegramNotifier(limiter=limiter, linger=0.05)
+    for _ in range(args.messages):
+        notifier.submit(card)
+    notifier.close()
+    elapsed = time.perf_counter() - started
+    ok = gate.rejected == 0 and notifier.messages_sent == args.messages
+    failures += not ok
+    print(f"📨 Telegram: {args.messages} messages at {DiceLinks.TELEGRAM_PER_SECOND}/s, "
+          f"{DiceLinks.TELEGRAM_PER_MINUTE}/min against a rate-enforcing stub")
+    print(f"   {'✅' if ok else '❌'} {notifier.messages_sent} delivered, {gate.rejected} × 429 in {elapsed:.1f}s")
+
+    # 2. A server-side 429: the retry must wait at least retry_after
+    server.telegram_gate = gate = TelegramGate(1000, 60000, force=1, force_retry_after=args.retry_after)
+    status = DiceLinks.post_telegram_message("retry_after check", limiter=DiceLinks.TelegramLimiter())
+    waited = gate.posts[1][0] - gate.posts[0][0] if len(gate.posts) > 1 else 0.0
+    ok = status == 200 and waited >= args.retry_after
+    failures += not ok
+    print(f"   {'✅' if ok else '❌'} forced 429 with retry_after={args.retry_after}s: "
+          f"retried after {waited:.1f}s, final status {status}")
+    server.shutdown()
+    return 1 if failures else 0
+
+def bench_watch(args):
+    """
+    Starts `watch` against the stub with a backlog of jobs, then publishes
+    new postings one at a time and measures how long each takes to be
+    processed (scored, emailed, stored, queued for Telegram).
+    """
+    DiceLinks = import_dicelinks()
+    workdir   = tempfile.mkdtemp(prefix="dicebench-watch-")
+    shutil.copy(os.path.join(HERE, RESUME_FILE), workdir)
+    os.chdir(workdir)
+    rng = random.Random(args.postings)
+    posted, delays, processed = {}, [], []
+    done = threading.Event()
+
+    def on_job(job):
+        processed.append(job.url)
+        job_id = int(job.url.rsplit("/", 1)[1])
+        if job_id in posted:
+            delays.append(time.time() - posted[job_id])
+            if len(delays) == args.postings:
+                done.set()
+
+    try:
+        server = start_stub(args.backlog, 20, args.latency_ms, newest_first=args.order == "newest")
+        point_at_stubs(DiceLinks, server, FakeGmail(args.latency_ms))
+        if args.order == "newest":
+            DiceLinks.SEARCH_KNOWN_PAGES = 1   # what a date-sorted search URL would be run with
+        stop     = threading.Event()
+        schedule = DiceLinks.PollSchedule(args.min_interval, args.max_interval)
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            watcher = threading.Thread(target=DiceLinks.watch, name="watch", daemon=True,
+                                       kwargs=dict(schedule=schedule, stop=stop, on_job=on_job))
+            watcher.start()
+            while len(processed) < args.backlog and watcher.is_alive():
+                time.sleep(0.05)
+            for _ in range(args.postings):
+                time.sleep(rng.uniform(0, args.gap))
+                posted[publish_posting(server, rng)] = time.time()
+            done.wait(args.postings * (args.gap + args.max_interval) + 60)
+            stop.set()
+            watcher.join()
+        server.shutdown()
+    finally:
+        os.chdir(HERE)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"👀 watch: {args.postings} postings published over a {args.backlog}-job backlog ({args.order} order), "
+          f"polling every {args.min_interval:g}-{args.max_interval:g}s")
+    if len(delays) < args.postings:
+        print(f"❌ only {len(delays)} of {args.postings} postings were processed")
+        return 1
+    print(f"   time-to-process  p50 {DiceLinks.percentile(delays, 50):.1f}s   p95 {DiceLinks.percentile(delays, 95):.1f}s   "
+          f"max {max(delays):.1f}s   (scheduled workflow: up to 27 min)")
+    return 0
+
+# ─────────────────────────────────────────────────────────────────
+# FAULT INJECTION — SIGKILL a run mid-send / mid-store, then resume it
+# ─────────────────────────────────────────────────────────────────
+FAULT_POINTS = ("send", "store")
+
+class _LoggedSend(_FakeSend):
+    """A fake send that is on disk before it counts, so a killed run's sends are not lost."""
+
+    def __init__(self, gmail, body):
+        super().__init__(gmail)
+        self.body = body
+
+    def execute(self):
+        import base64
+        import email
+        to = email.message_from_bytes(base64.urlsafe_b64decode(self.body["raw"]))["To"]
+        result = super().execute()
+        with open(self.gmail.log_path, "a", encoding="utf-8") as f:
+            f.write(f"{to}\n")
+            f.flush()
+            os.fsync(f.fileno())
+        if self.gmail.kill_after and self.gmail.sent >= self.gmail.kill_after:
+            os.kill(os.getpid(), signal.SIGKILL)   # mid-batch: later messages of the batch never go out
+        return result
+
+class LoggedGmail(FakeGmail):
+    def __init__(self, log_path, kill_after=0, latency_ms=DEFAULT_LATENCY_MS):
+        super().__init__(latency_ms)
+        self.log_path   = log_path
+        self.kill_after = kill_after
+
+    def send(self, userId, body):
+        return _LoggedSend(self, body)
+
+def fault_run(args):
+    """One DiceLinks.main() in the current directory against a stub started by the parent, maybe killed."""
+    DiceLinks = import_dicelinks()
+    server    = argparse.Namespace(server_port=args.port)
+    gmail     = LoggedGmail(args.sent_log, kill_after=args.kill_after if args.kill == "send" else 0)
+    point_at_stubs(DiceLinks, server, gmail)
+    if args.kill == "store":
+        add_records, calls = DiceLinks.JobStore.add_records, []
+
+        def add_half_then_die(store, records):
+            calls.append(len(records))
+            if len(calls) < args.kill_after:
+                return add_records(store, records)
+            add_records(store, records[:len(records) // 2])   # committed: half the batch is in the store
+            os.kill(os.getpid(), signal.SIGKILL)
+        DiceLinks.JobStore.add_records = add_half_then_die
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        DiceLinks.main()
+    return 0
+
+def run_fault_child(workdir, port, sent_log, kill="none", kill_after=0):
+    cmd = [sys.executable, os.path.abspath(__file__), "fault-run", "--port", str(port),
+           "--sent-log", sent_log, "--kill", kill, "--kill-after", str(kill_after)]
+    return subprocess.run(cmd, cwd=workdir).returncode
+
+def fault_outcome(workdir, sent_log):
+    """Recipients sent to (with repeats), stored jobs by URL, and the journal left behind."""
+    import sqlite3
+    sent = []
+    if os.path.exists(sent_log):
+        with open(sent_log, encoding="utf-8") as f:
+            sent = [line.strip() for line in f if line.strip()]
+    conn = sqlite3.connect(os.path.join(workdir, "dice_jobs.db"))
+    try:
+        jobs = {url: (email, reason) for url, email, reason in
+                conn.execute("SELECT URL, Email, Email_Not_Sent_Reason FROM jobs")}
+        left = conn.execute("SELECT COUNT(*) FROM journal").fetchone()[0]
+        meta = (conn.execute("SELECT value FROM journal_meta WHERE key = 'run'").fetchone() or [None])[0]
+    finally:
+        conn.close()
+    return sent, jobs, left, meta
+
+def fault_unexplained(ref_sent, ref_jobs, sent, jobs):
+    """
+    Recipients whose email differs from the clean run for no good reason. A
+    job may go unemailed because the kill interrupted its send, or because it
+    is a repost of a job emailed (or interrupted) in this run. Which job of a
+    repost pair counts as the original depends on fetch order, so either
+    one may be the one emailed.
+    """
+    by_url    = {url: email for url, (email, _) in jobs.items()}
+    attempted = set(sent) | {email for email, reason in jobs.values() if str(reason or "").startswith("Interrupted")}
+
+    def explained(email, reasons):
+        reason = str(reasons.get(email) or "")
+        if reason.startswith("Interrupted"):
+            return True
+        original = re.match(r"Near-duplicate of (\S+)", reason)
+        return bool(original) and by_url.get(original.group(1)) in attempted
+
+    reasons     = {email: reason for email, reason in jobs.values()}
+    ref_reasons = {email: reason for email, reason in ref_jobs.values()}
+    missing = [email for email in set(ref_sent) - set(sent) if not explained(email, reasons)]
+    extra   = [email for email in set(sent) - set(ref_sent) if not str(ref_reasons.get(email) or "").startswith("Near-duplicate")]
+    return missing + extra
+
+def bench_faults(args):
+    """
+    Kills a run with SIGKILL part-way through a Gmail batch and part-way
+    through storing a batch, restarts it, and checks against a clean run:
+    every job stored, the journal drained, no recipient emailed twice, and
+    every email that never went out belonging to a job marked interrupted.
+    """
+    server = start_stub(args.jobs, 20, args.latency_ms)
+    root   = tempfile.mkdtemp(prefix="dicebench-faults-")
+
+    def workdir(name):
+        path = os.path.join(root, name)
+        os.makedirs(path)
+        shutil.copy(os.path.join(HERE, RESUME_FILE), path)
+        return path, os.path.join(path, "sent.log")
+
+    try:
+        clean, clean_log = workdir("clean")
+        if run_fault_child(clean, server.server_port, clean_log) != 0:
+            sys.exit("Clean reference run failed")
+        ref_sent, ref_jobs, _, _ = fault_outcome(clean, clean_log)
+        print(f"💥 Fault injection, {args.jobs} jobs — clean run: {len(ref_jobs)} stored, {len(ref_sent)} emails")
+
+        failures = 0
+        for point in args.kill.split(","):
+            path, log = workdir(point)
+            killed  = run_fault_child(path, server.server_port, log, point, args.kill_after)
+            _, partial, _, _ = fault_outcome(path, log)
+            resumed = run_fault_child(path, server.server_port, log)
+            sent, jobs, left, meta = fault_outcome(path, log)
+            counts  = {to: sent.count(to) for to in set(sent)}
+            repeats = sorted(to for to, n in counts.items() if n > 1)
+            unexplained = sorted(fault_unexplained(ref_sent, ref_jobs, sent, jobs))
+            interrupted = sum(str(reason or "").startswith("Interrupted") for _, reason in jobs.values())
+            problems = [
+                f"killed run exited {killed}" if killed != -signal.SIGKILL else "",
+                f"resumed run exited {resumed}" if resumed != 0 else "",
+                f"{len(ref_jobs) - len(jobs)} jobs missing" if set(jobs) != set(ref_jobs) else "",
+                f"{len(repeats)} recipients emailed twice" if repeats else "",
+                f"{len(unexplained)} emails neither sent nor marked interrupted" if unexplained else "",
+                f"journal left {left} entries, run {meta!r}" if left or meta != "finished" else "",
+            ]
+            problems = [p for p in problems if p]
+            failures += bool(problems)
+            print(f"   {'❌' if problems else '✅'} kill mid-{point:<6} stored {len(partial):>4} before the kill, "
+                  f"{len(jobs):>4} after resume · {len(sent):>4} emails, "
+                  f"{interrupted} interrupted (not re-sent), {len(repeats)} duplicates"
+                  + (f" — {'; '.join(problems)}" if problems else ""))
+        return 1 if failures else 0
+    finally:
+        server.shutdown()
+        shutil.rmtree(root, ignore_errors=True)
+
+# ─────────────────────────────────────────────────────────────────
+# CLI
+# ─────────────────────────────────────────────────────────────────
+def build_arg_parser():
+    parser = argparse.ArgumentParser(prog="DiceBench", description="Offline end-to-end benchmark for DiceLinks.")
+    parser.add_argument("--scales", default=",".join(map(str, DEFAULT_SCALES)),
+                        help="comma-separated job counts (default: 10,100,1000,10000)")
+    parser.add_argument("--latency-ms", type=float, default=DEFAULT_LATENCY_MS,
+                        help="stub delay per request (default: 5)")
+    parser.add_argument("--fixtures", help="directory of recorded job_*.html pages to replay")
+    parser.add_argument("--json", help="write all results to this file")
+    parser.add_argument("--save-baseline", metavar="PATH", help="save results as a regression baseline")
+    parser.add_argument("--baseline", metavar="PATH", help="fail if a stage regressed against this baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown factor per stage (default: 1.5)")
+    sub = parser.add_subparsers(dest="command")
+
+    one = sub.add_parser("one", help="run a single scale in this process")
+    one.add_argument("--jobs", type=int, required=True)
+    one.add_argument("--latency-ms", type=float, default=DEFAULT_LATENCY_MS)
+    one.add_argument("--fixtures")
+    one.add_argument("--out", help="write the result JSON here instead of printing it")
+
+    emails = sub.add_parser("emails", help="email extractor speed and precision/recall")
+    emails.add_argument("--corpus", default=EMAIL_FIXTURES,
+                        help="directory of *.html pages, labels.json = {page: [emails]} (default: bench_fixtures/emails)")
+    emails.add_argument("--pages", type=int, default=200, help="synthetic pages, 0 = labelled pages only")
+
+    history = sub.add_parser("history", help="job-history load time: xlsx vs SQLite vs Parquet")
+    history.add_argument("--rows", default="10000,100000", help="comma-separated row counts")
+    history.add_argument("--xlsx-max-rows", type=int, default=100000,
+                         help="skip the (slow to write) xlsx above this many rows")
+
+    watcher = sub.add_parser("watch", help="time-to-notify for new postings under `DiceLinks.py watch`")
+    watcher.add_argument("--backlog", type=int, default=40, help="jobs already listed at start")
+    watcher.add_argument("--postings", type=int, default=10, help="new postings published one by one")
+    watcher.add_argument("--gap", type=float, default=3.0, help="max seconds between postings")
+    watcher.add_argument("--min-interval", type=float, default=2.0, help="watch poll floor (s)")
+    watcher.add_argument("--max-interval", type=float, default=10.0, help="watch poll ceiling (s)")
+    watcher.add_argument("--latency-ms", type=float, default=DEFAULT_LATENCY_MS)
+    watcher.add_argument("--order", choices=("relevance", "newest"), default="relevance",
+                         help="search result order: new postings at a random rank (DICE_URL) or on page 0")
+
+    skills = sub.add_parser("skills", help="title filter and JD skill matcher: speed and false positives")
+    skills.add_argument("--xlsx", default=os.path.join(HERE, "dice_jobs_list.xlsx"), help="job history to test on")
+
+    enrich = sub.add_parser("enrich", help="enrichment stage time and memory: DataFrame vs dicts vs JobRecord")
+    enrich.add_argument("--count", type=int, default=10000, help="jobs to enrich")
+    enrich.add_argument("--repeat", type=int, default=3, help="timed runs, best is reported")
+
+    gmail = sub.add_parser("gmail", help="Gmail auth, MIME and API latency against a local fake endpoint")
+    gmail.add_argument("--messages", type=int, default=120, help="emails to send")
+    gmail.add_argument("--token-ms", type=float, default=250, help="fake token refresh latency (ms)")
+    gmail.add_argument("--latency-ms", type=float, default=DEFAULT_LATENCY_MS)
+
+    workers = sub.add_parser("workers", help="detail enrichment throughput at several worker counts")
+    workers.add_argument("--workers", default="1,2,4,8,16", help="comma-separated worker counts")
+    workers.add_argument("--jobs", type=int, default=200, help="job pages per run")
+    workers.add_argument("--latency-ms", type=float, default=50, help="stub delay per request (default: 50)")
+    workers.add_argument("--host-rps", type=float, default=0, help="per-host cap, 0 = off (default: 0)")
+
+    ats = sub.add_parser("ats", help="per-job vs batch ATS scoring at several JD counts")
+    ats.add_argument("--counts", default="10,100,1000", help="comma-separated JD counts")
+    ats.add_argument("--repeat", type=int, default=3, help="timed runs, best is reported")
+
+    parse = sub.add_parser("parse", help="card / JD parser output vs baseline fixtures, and throughput per backend")
+    parse.add_argument("--fixtures", default=PARSE_FIXTURES, help="directory of search_*.html / job_*.html + expected.json")
+    parse.add_argument("--write-expected", action="store_true", help="regenerate expected.json from the baseline parser")
+    parse.add_argument("--cards", type=int, default=100, help="cards on the synthetic search page")
+    parse.add_argument("--pages", type=int, default=50, help="synthetic job pages")
+    parse.add_argument("--repeat", type=int, default=3, help="timed runs, best is reported")
+
+    faults = sub.add_parser("faults", help="SIGKILL a run mid-send / mid-store, resume it, check for lost or repeated work")
+    faults.add_argument("--jobs", type=int, default=100, help="jobs per run")
+    faults.add_argument("--kill", default=",".join(FAULT_POINTS), help="comma-separated kill points: send,store")
+    faults.add_argument("--kill-after", type=int, default=5,
+                        help="kill at this email (send) or this store batch (store) (default: 5)")
+    faults.add_argument("--latency-ms", type=float, default=DEFAULT_LATENCY_MS)
+
+    fault = sub.add_parser("fault-run", help="one run for `faults` (internal)")
+    fault.add_argument("--port", type=int, required=True)
+    fault.add_argument("--sent-log", required=True)
+    fault.add_argument("--kill", choices=("none",) + FAULT_POINTS, default="none")
+    fault.add_argument("--kill-after", type=int, default=0)
+
+    telegram = sub.add_parser("telegram", help="Telegram pacing against a rate-enforcing stub, and retry_after handling")
+    telegram.add_argument("--messages", type=int, default=25,
+                          help="one-card messages to send (default 25, past the per-minute limit)")
+    telegram.add_argument("--retry-after", type=int, default=2, help="retry_after of the forced 429 (s)")
+    telegram.add_argument("--latency-ms", type=float, default=DEFAULT_LATENCY_MS)
+
+    rec = sub.add_parser("record", help="save live Dice pages as replay fixtures")
+    rec.add_argument("--out", default="bench_fixtures")
+    rec.add_argument("--query", default="Golang")
+    rec.add_argument("--jobs", type=int, default=5)
+    return parser
+
+def cli(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    if args.command == "one":
+        result = run_one(args.jobs, args.latency_ms, args.fixtures)
+        if args.out:
+            with open(args.out, "w", encoding="utf-8") as f:
+                json.dump(result, f)
+        else:
+            print_result(result)
+        return 0
+    if args.command == "record":
+        return record(args)
+    if args.command == "emails":
+        return bench_emails(args)
+    if args.command == "history":
+        return bench_history(args)
+    if args.command == "enrich":
+        return bench_enrich(args)
+    if args.command == "gmail":
+        return bench_gmail(args)
+    if args.command == "workers":
+        return bench_workers(args)
+    if args.command == "ats":
+        return bench_ats(args)
+    if args.command == "parse":
+        return bench_parse(args)
+    if args.command == "faults":
+        return bench_faults(args)
+    if args.command == "fault-run":
+        return fault_run(args)
+    if args.command == "telegram":
+        return bench_telegram(args)
+    if args.command == "watch":
+        return bench_watch(args)
+    if args.command == "skills":
+        return bench_skills(args)
+    return bench(args)
+
+if __name__ == "__main__":
+    sys.exit(cli())
@@ -1,32 +1,46 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib3.exceptions import InvalidHeader
 import logging
-import pandas as pd
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, CData, NavigableString, Tag
 import time
 import os
 from datetime import datetime
-import docx
 import re
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from zoneinfo import ZoneInfo 
-import pytz
+import html
+from zoneinfo import ZoneInfo
 import base64
-from urllib.parse import urljoin
+import sqlite3
+import hashlib
+import zlib
+import json
+from urllib.parse import urljoin, urlparse, urlencode, parse_qsl, unquote
+from collections import Counter, defaultdict, deque
+from functools import lru_cache, partial
+import importlib.util
+import threading
+import queue
+import random
+import signal
+import argparse
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from enum import Enum
 
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.mime.base import MIMEBase
 from email import encoders
 
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
+# pandas, numpy, pyarrow, scikit-learn, python-docx and the Google API client are
+# imported inside the functions that use them, so a run that finds no new
+# jobs never pays for loading them.
 
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-cst = pytz.timezone('America/Chicago')
+cst = ZoneInfo('America/Chicago')
 
 # ─────────────────────────────────────────────────────────────────
 # CONFIGURATION
@@ -41,165 +55,2103 @@ SENDER_CITY   = "Chicago, IL"
 SCOPES        = ["https://www.googleapis.com/auth/gmail.send"]
 TOKEN_FILE    = "token.json"          # saved after first login
 CREDS_FILE    = "credentials.json"   # downloaded from Google Cloud Console
+# Refreshed access tokens are kept in process memory (watch reuses them across
+# polls); set a path to also keep the last one on disk between local runs
+GMAIL_TOKEN_CACHE  = os.getenv("GMAIL_TOKEN_CACHE")
+GMAIL_TIMEOUT      = float(os.getenv("GMAIL_TIMEOUT", "20"))   # seconds per token refresh / API round-trip
+GMAIL_API_ENDPOINT = os.getenv("GMAIL_API_ENDPOINT")           # e.g. a local fake Gmail for offline runs
+GMAIL_TOKEN_URI    = os.getenv("GMAIL_TOKEN_URI")              # ...and its OAuth token endpoint
 
 DICE_URL = "https://www.dice.com/jobs?filters.postedDate=ONE&filters.employmentType=CONTRACTS%7CTHIRD_PARTY&countryCode=US&latitude=38.7945952&location=United+States&locationPrecision=Country&longitude=-106.5348379&q=Golang"
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 CHAT_ID = os.getenv("CHAT_ID")
-EXCEL_FILE = 'dice_jobs_list.xlsx'
+EXCEL_FILE = 'dice_jobs_list.xlsx'     # on-demand export only
+JOB_DB_FILE = 'dice_jobs.db'           # job history (system of record)
+CACHE_FILE  = 'dice_cache.db'          # parsed job pages + ATS scores
+HISTORY_DIR = 'history'                # date-partitioned Parquet archive for analytics
+CACHE_TTL_HOURS   = 72
+CACHE_MAX_ENTRIES = 5000
+# Last response per search/job page URL (validators + compressed body) for
+# conditional requests; 0 turns the response store off
+RESPONSE_STORE_ENTRIES = int(os.getenv("RESPONSE_STORE_ENTRIES", "2000"))
 resume_path = "Dinesh_Go_Resume.docx" 
+# Every resume each job is scored against — the best match is the one attached
+RESUME_PATHS = [p.strip() for p in os.getenv("RESUME_PATHS", resume_path).split(",") if p.strip()]
 
 TELEGRAM_URL = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
+# Later runs that retry a stored job's Telegram card before giving up on it
+TELEGRAM_ANNOUNCE_ATTEMPTS = 3
+
+# Minimum ATS score (%) before a recruiter is emailed
+ATS_EMAIL_THRESHOLD = 45
+# Bumped whenever the same resume and JD would score differently, so cached
+# scores (and compiled resume profiles) of the old scoring are not reused
+ATS_SCORE_VERSION = 3
+# A job store rebuilt this run (cache miss) may lack the latest jobs, so the
+# same recruiters would be emailed again — in CI the first run holds emails
+EMAIL_ON_REBUILT_STORE = os.getenv("EMAIL_ON_REBUILT_STORE", "0" if os.getenv("CI") else "1") == "1"
+
+# Near-duplicate reposts — estimated Jaccard similarity of title + JD shingles
+NEAR_DUP_THRESHOLD   = float(os.getenv("NEAR_DUP_THRESHOLD", "0.8"))
+NEAR_DUP_WINDOW_DAYS = 30     # older postings are not treated as the same role
+
+# Job detail enrichment — concurrency, politeness and retry settings
+DETAIL_WORKERS      = int(os.getenv("DETAIL_WORKERS", "8"))
+DETAIL_HOST_RPS     = float(os.getenv("DETAIL_HOST_RPS", "4"))    # max requests/sec per host
+DETAIL_RETRY_BUDGET = int(os.getenv("DETAIL_RETRY_BUDGET", "20")) # total retries allowed per run
+DETAIL_MAX_ATTEMPTS = 3                                           # per job page
+RETRY_AFTER_MAX     = 30   # seconds; a longer Retry-After is shortened to this
+
+# Search pagination — pages fetched in parallel per window, hard page cap
+SEARCH_PAGE_WINDOW = int(os.getenv("SEARCH_PAGE_WINDOW", "4"))
+SEARCH_MAX_PAGES   = 50
+# DICE_URL has no date sort: Dice lists results by relevance, so a new posting
+# can rank behind any number of jobs already stored, and every page up to the
+# advertised count is walked (postedDate=ONE keeps that to a few pages, and
+# unchanged pages come back 304). With a newest-first search URL, set this to
+# stop after that many consecutive pages whose matching jobs are all known.
+SEARCH_KNOWN_PAGES = int(os.getenv("SEARCH_KNOWN_PAGES", "0"))
+
+# Searches fetched concurrently on every run — comma-separated, each either a
+# plain Dice query or "<source>:<query>" (see SOURCES)
+SEARCH_QUERIES = [q.strip() for q in os.getenv("SEARCH_QUERIES", "Golang").split(",") if q.strip()]
+
+# Run report — JSON always, Prometheus textfile only when a path is set
+RUN_REPORT_FILE  = os.getenv("RUN_REPORT_FILE", "run_report.json")
+METRICS_TEXTFILE = os.getenv("METRICS_TEXTFILE")   # e.g. /var/lib/node_exporter/textfile/dice.prom
+LOG_LEVEL        = os.getenv("LOG_LEVEL", "INFO")
+
+# Extra skills / synonyms for JD keyword extraction: a JSON file of
+# {"canonical skill": ["synonym", ...]} merged over SKILL_TAXONOMY
+SKILLS_FILE = os.getenv("SKILLS_FILE")
+
+# `watch` daemon — poll interval snaps to the minimum when new postings arrive
+# and backs off towards the maximum while none do, with ±jitter
+WATCH_MIN_SECONDS = float(os.getenv("WATCH_MIN_SECONDS", "30"))
+WATCH_MAX_SECONDS = float(os.getenv("WATCH_MAX_SECONDS", "600"))
+WATCH_BACKOFF     = 1.5
+WATCH_JITTER      = 0.2
 
-def process_job_links(html_text):
-    soup = BeautifulSoup(html_text, "html.parser")
-    jobs_data = []
+# ─────────────────────────────────────────────────────────────────
+# RUN METRICS — per-stage wall time and counters, JSON / Prometheus report
+# ─────────────────────────────────────────────────────────────────
+STAGES        = ["pagination", "detail_fetch", "parse", "near_dup", "ats_scoring", "gmail_auth", "mime", "gmail",
+                 "telegram", "store",
+                 "history_io", "excel_io"]
+METRIC_FIELDS = ["calls", "seconds", "requests", "bytes", "retries", "errors"]
 
-    job_links = soup.find_all(
-        "a",
-        attrs={"data-testid": "job-search-job-detail-link"}
-    )
+class RunMetrics:
+    """
+    Wall time and counters per pipeline stage for one run. Thread-safe.
+    Stage seconds are summed over threads, so concurrent stages can add up to
+    more than the run's wall time. HTTP requests made inside
+    `with METRICS.stage(name)` are charged to that stage by the session hook.
+    """
 
-    for job in job_links:
+    def __init__(self):
+        self.lock  = threading.Lock()
+        self.local = threading.local()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.started = time.monotonic()
+            self.stages  = {}
+            self.samples = {}   # stage -> per-call seconds, for latency percentiles
+            self.info    = {}
+
+    def _stats(self, name):
+        return self.stages.setdefault(name, dict.fromkeys(METRIC_FIELDS, 0))
+
+    def current(self):
+        stack = getattr(self.local, "stack", None)
+        return stack[-1] if stack else None
+
+    @contextmanager
+    def stage(self, name):
+        stack = self.local.__dict__.setdefault("stack", [])
+        stack.append(name)
+        start = time.perf_counter()
         try:
-            title = job.get_text(strip=True)
-            url = job.get("href")
-        except:
-            title = job.get_text(strip=True)
-            url = urljoin("https://www.dice.com", job.get("href"))
-
-        location_tag = job.find_next(
-            "p", class_="text-sm font-normal text-zinc-600"
-        )
-        location = location_tag.get_text(strip=True) if location_tag else None
+            yield
+        except Exception:
+            self.count(name, errors=1)
+            raise
+        finally:
+            stack.pop()
+            elapsed = time.perf_counter() - start
+            with self.lock:
+                stats = self._stats(name)
+                stats["calls"]   += 1
+                stats["seconds"] += elapsed
+                self.samples.setdefault(name, []).append(elapsed)
+
+    def count(self, name=None, **counts):
+        """Adds counts to a stage (default: the stage the calling thread is in)."""
+        name = name or self.current()
+        if name is None:
+            return
+        with self.lock:
+            stats = self._stats(name)
+            for field, n in counts.items():
+                stats[field] = stats.get(field, 0) + n
+
+    def set_info(self, **info):
+        with self.lock:
+            self.info.update(info)
+
+    def total(self, field):
+        with self.lock:
+            return sum(stats.get(field, 0) for stats in self.stages.values())
+
+    def report(self):
+        with self.lock:
+            names  = [n for n in STAGES if n in self.stages] + sorted(set(self.stages) - set(STAGES))
+            stages = {
+                n: {
+                    **self.stages[n],
+                    "seconds": round(self.stages[n]["seconds"], 3),
+                    "p50_ms":  round(percentile(self.samples.get(n, []), 50) * 1000, 2),
+                    "p95_ms":  round(percentile(self.samples.get(n, []), 95) * 1000, 2),
+                }
+                for n in names
+            }
+            return {
+                "finished_at":  datetime.now(cst).isoformat(timespec="seconds"),
+                "wall_seconds": round(time.monotonic() - self.started, 3),
+                **self.info,
+                "stages": stages,
+            }
+
+    def summary(self):
+        """One line for the Telegram completion message."""
+        report = self.report()
+        saved  = f" · 💾 {self.total('bytes_saved') / 1e6:.1f} MB saved" if self.total("bytes_saved") else ""
+        return (f"⏱ {report['wall_seconds']:.0f}s · 🌐 {self.total('requests')} req · "
+                f"📦 {self.total('bytes') / 1e6:.1f} MB{saved} · 🔁 {self.total('retries')} retries · "
+                f"⚠️ {self.total('errors')} errors")
+
+    def write_json(self, path):
+        _write_atomic(path, json.dumps(self.report(), indent=2))
+
+    def write_prometheus(self, path):
+        """Prometheus textfile-collector format (node_exporter --collector.textfile), last run only."""
+        report = self.report()
+        lines  = ["# TYPE dice_run_wall_seconds gauge", f"dice_run_wall_seconds {report['wall_seconds']}"]
+        for key, value in report.items():
+            if key != "wall_seconds" and isinstance(value, (int, float)) and not isinstance(value, bool):
+                lines += [f"# TYPE dice_run_{key} gauge", f"dice_run_{key} {value}"]
+        fields = list(dict.fromkeys(f for stats in report["stages"].values() for f in stats))
+        for field in fields:   # per-run values, so gauges rather than counters
+            lines.append(f"# TYPE dice_stage_{field} gauge")
+            lines += [f'dice_stage_{field}{{stage="{name}"}} {stats.get(field, 0)}'
+                      for name, stats in report["stages"].items()]
+        _write_atomic(path, "\n".join(lines) + "\n")
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers (0 when empty)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, -(-len(ordered) * pct // 100) - 1)]
+
+def _write_atomic(path, text):
+    """Writes through a temp file so readers never see a half-written report."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+METRICS = RunMetrics()
+
+def write_run_report(metrics=METRICS, path=None, textfile=None):
+    path     = path or RUN_REPORT_FILE
+    textfile = textfile or METRICS_TEXTFILE
+    try:
+        metrics.write_json(path)
+        if textfile:
+            metrics.write_prometheus(textfile)
+    except OSError as e:
+        logging.error(f"Could not write run report: {e}")
+        return
+    logging.info(f"Run report written to {path}" + (f" and {textfile}" if textfile else ""))
 
-        employment_tag = job.find_next("p", id="employmentType-label")
-        employment_type = (
-            employment_tag.get_text(strip=True) if employment_tag else None
-        )
+def configure_logging(level=LOG_LEVEL):
+    logging.basicConfig(
+        level=getattr(logging, str(level).upper(), logging.INFO),
+        format="%(asctime)s %(levelname)-7s [%(threadName)s] %(message)s",
+        datefmt="%H:%M:%S",
+    )
+    # urllib3 logs every retry and pool event at INFO/DEBUG — too chatty for run logs
+    logging.getLogger("urllib3").setLevel(logging.WARNING)
 
-        salary_tag = job.find_next("p", id="salary-label")
-        salary = salary_tag.get_text(strip=True) if salary_tag else None
+# ─────────────────────────────────────────────────────────────────
+# HTTP CLIENT — one pooled, retrying session for every network call
+# ─────────────────────────────────────────────────────────────────
+HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/124.0.0.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.5",
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive",
+}
+
+HTTP_POOL_SIZE = max(10, DETAIL_WORKERS * 2)
+
+# Per-endpoint request count and cumulative latency for the run summary
+HTTP_STATS = {}
+_http_stats_lock = threading.Lock()
+
+def endpoint_name(url):
+    """Groups URLs by host + first path segment, hiding ids and bot tokens."""
+    parsed = urlparse(url)
+    first = parsed.path.strip("/").split("/")[0]
+    if first.startswith("bot"):
+        first = "bot*"
+    return f"{parsed.netloc}/{first}"
+
+def _record_response(response, *args, **kwargs):
+    name = endpoint_name(response.url)
+    with _http_stats_lock:
+        stats = HTTP_STATS.setdefault(name, {"requests": 0, "seconds": 0.0, "max_seconds": 0.0})
+        elapsed = response.elapsed.total_seconds()
+        stats["requests"]   += 1
+        stats["seconds"]    += elapsed
+        stats["max_seconds"] = max(stats["max_seconds"], elapsed)
+    retries = getattr(response.raw, "retries", None)
+    METRICS.count(
+        requests=1,
+        bytes=int(response.headers.get("Content-Length") or len(response.content)),
+        retries=len(retries.history) if retries else 0,
+    )
 
-        company_tag = job.find_next(
-            "p", class_="mb-0 line-clamp-2 text-sm sm:line-clamp-1"
-        )
-        company = company_tag.get_text(strip=True) if company_tag else None
-        keywords = ["golang", "go developer", "go engineer", "go", "application support engineer", "backend"]
-
-        if any(k in title.lower() for k in keywords):
-            jobs_data.append({
-                "Title": title,
-                "URL": url,
-                "Location": location,
-                "Employment_Type": employment_type,
-                "Salary": salary,
-                "Company": company
-            })
+class CappedRetry(Retry):
+    """urllib3 Retry that honors Retry-After for at most RETRY_AFTER_MAX seconds."""
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        return None if retry_after is None else min(retry_after, RETRY_AFTER_MAX)
+
+def build_http_session(retries=True):
+    """
+    requests.Session with keep-alive connection pooling, gzip and
+    exponential-backoff retries on 429/5xx that honor Retry-After (capped).
+    POSTs are not retried here — send_telegram_message handles its own 429s.
+    retries=False leaves every retry to the caller: DetailFetcher retries job
+    pages itself, from the run's retry budget, so a second layer here would
+    multiply the requests a rate-limiting host sees.
+    """
+    retry = CappedRetry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    ) if retries else Retry(total=0, raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.hooks["response"].append(_record_response)
+    return session
+
+def retry_after_seconds(headers):
+    """A response's Retry-After (seconds or HTTP date) capped at RETRY_AFTER_MAX; None without one."""
+    value = headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return min(Retry().parse_retry_after(value), RETRY_AFTER_MAX)
+    except InvalidHeader:
+        return None
+
+HTTP        = build_http_session()                # search pages, Telegram
+DETAIL_HTTP = build_http_session(retries=False)   # job pages — DetailFetcher owns the retries
+
+def print_http_stats():
+    """Prints per-endpoint latency and how often pooled connections were reused."""
+    if not HTTP_STATS:
+        return
+    print("🌐 HTTP summary:")
+    for name, stats in sorted(HTTP_STATS.items()):
+        avg_ms = stats["seconds"] / stats["requests"] * 1000
+        print(f"   {name}: {stats['requests']} requests, avg {avg_ms:.0f} ms, max {stats['max_seconds'] * 1000:.0f} ms")
+    adapters = {id(a): a for session in (HTTP, DETAIL_HTTP) for a in session.adapters.values()}.values()
+    for adapter in adapters:
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools[key]
+            if not pool:
+                continue
+            reused = pool.num_requests - pool.num_connections
+            print(f"   {pool.host}: {pool.num_connections} connections opened, {max(reused, 0)} requests reused a connection")
+
+# ─────────────────────────────────────────────────────────────────
+# SKILL MATCHING — Aho-Corasick over a skills taxonomy, whole words only
+# ─────────────────────────────────────────────────────────────────
+# canonical skill -> synonyms. Matching ignores case, except for phrases
+# written with capitals ("Go", "ML"), which must appear exactly like that —
+# otherwise every "go" and "ml" in ordinary prose would count.
+# Resumes and JDs are both canonicalized, so a synonym matches both ways: list
+# only true aliases (or products of the skill: "eks" is Kubernetes). Related
+# but different tools ("datadog" / "prometheus") are skills of their own.
+SKILL_TAXONOMY = {
+    "golang": ["Go", "GO", "go lang", "go-lang", "go language", "go programming"],
+    "goroutines": ["goroutine", "go routines"],
+    "kubernetes": ["k8s", "kube", "eks", "aks", "gke", "openshift"],
+    "docker": ["dockerfile"],
+    "containers": ["container", "containerization", "containerized"],
+    "helm": ["helm charts"],
+    "istio": [],
+    "service mesh": [],
+    "aws": ["amazon web services", "ec2", "s3", "lambda", "sqs", "sns", "dynamodb"],
+    "gcp": ["google cloud", "google cloud platform", "bigquery", "pubsub", "pub/sub"],
+    "azure": ["microsoft azure", "azure devops"],
+    "terraform": [],
+    "infrastructure as code": ["iac"],
+    "ansible": [],
+    "ci/cd": ["cicd", "ci cd", "continuous integration", "continuous delivery", "continuous deployment",
+              "jenkins", "github actions", "gitlab ci", "argocd", "argo cd"],
+    "microservices": ["microservice", "micro-services", "micro services"],
+    "soa": ["service oriented architecture", "service-oriented architecture"],
+    "rest api": ["restful", "rest apis", "restful apis", "rest services", "restful services"],
+    "grpc": ["protobuf", "protocol buffers", "protobufs"],
+    "graphql": [],
+    "kafka": ["apache kafka", "kafka streams"],
+    "event streaming": [],
+    "rabbitmq": ["rabbit mq", "amqp"],
+    "nats": [],
+    "redis": ["elasticache"],
+    "postgresql": ["postgres", "postgre sql", "psql"],
+    "mysql": ["mariadb"],
+    "mongodb": ["mongo"],
+    "cassandra": ["scylladb"],
+    "sql": ["t-sql", "pl/sql", "plsql"],
+    "nosql": ["no-sql"],
+    "elasticsearch": ["elastic search", "opensearch", "elk"],
+    "prometheus": [],
+    "grafana": [],
+    "datadog": [],
+    "opentelemetry": ["otel"],
+    "observability": [],
+    "linux": ["unix", "shell scripting", "bash"],
+    "git": ["github", "gitlab", "bitbucket"],
+    "python": [],
+    "java": ["spring boot", "spring framework"],
+    "javascript": ["JS", "node.js", "nodejs"],
+    "typescript": [],
+    "react": ["reactjs", "react.js"],
+    "c++": ["cpp"],
+    "rust": [],
+    "distributed systems": ["distributed computing"],
+    "scalability": ["scalable systems"],
+    "high availability": [],
+    "concurrency": ["concurrent programming", "multithreading", "multi-threading", "parallelism"],
+    "unit testing": ["unit tests", "tdd", "test driven development"],
+    "integration testing": ["integration tests"],
+    "agile": ["scrum", "kanban", "sprint planning"],
+    "oauth": ["oauth2", "oauth 2.0", "openid connect", "oidc"],
+    "jwt": [],
+    "sso": ["single sign-on", "single sign on"],
+    "machine learning": ["ML", "deep learning", "llm", "llms", "genai", "generative ai"],
+    "backend": ["back-end", "back end", "server-side", "server side"],
+}
+
+class SkillMatcher:
+    """
+    Aho-Corasick automaton over every phrase of a {canonical: [synonyms]}
+    taxonomy, built once. finditer() reads the text in one left-to-right
+    pass whatever the number of phrases, and only reports whole-word hits:
+    "go" matches "Go Developer" and "Go/Python" but not "Google" or "Category".
+    """
+
+    def __init__(self, taxonomy):
+        self.goto = [{}]     # state -> {char: next state}
+        self.fail = [0]
+        self.out  = [()]     # state -> ((phrase length, canonical, exact phrase or None), ...)
+        for canonical, synonyms in taxonomy.items():
+            for phrase in dict.fromkeys([canonical, *synonyms]):
+                exact = phrase if phrase != phrase.lower() else None
+                self._add(phrase.lower(), canonical, exact)
+        self._link()
+
+    def _add(self, phrase, canonical, exact):
+        state = 0
+        for char in phrase:
+            nxt = self.goto[state].get(char)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[state][char] = nxt
+                self.goto.append({})
+                self.out.append(())
+            state = nxt
+        self.out[state] += ((len(phrase), canonical, exact),)
+
+    def _link(self):
+        """Breadth-first failure links; each state also inherits its fallback's outputs."""
+        self.fail = [0] * len(self.goto)
+        pending = deque(self.goto[0].values())
+        while pending:
+            state = pending.popleft()
+            for char, nxt in self.goto[state].items():
+                pending.append(nxt)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[nxt] = target if target != nxt else 0
+                self.out[nxt] += self.out[self.fail[nxt]]
+
+    def finditer(self, text):
+        """(start, end, canonical) for every whole-word phrase occurrence in `text`."""
+        if not text:
+            return
+        lowered = text.lower()
+        aligned = len(lowered) == len(text)   # exact-case checks need matching offsets
+        goto, fail, out = self.goto, self.fail, self.out
+        size, state = len(lowered), 0
+        for i, char in enumerate(lowered):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if not out[state]:
+                continue
+            end = i + 1
+            if end < size and lowered[end].isalnum():
+                continue
+            for length, canonical, exact in out[state]:
+                start = end - length
+                if start and lowered[start - 1].isalnum():
+                    continue
+                if exact and aligned and text[start:end] != exact:
+                    continue
+                yield start, end, canonical
+
+    def search(self, text):
+        """True if any phrase occurs in `text` as a whole word."""
+        return next(self.finditer(text), None) is not None
+
+    def skills(self, text):
+        """{canonical skill: occurrences} in `text`."""
+        return Counter(canonical for _, _, canonical in self.finditer(text))
+
+def load_skill_taxonomy(path=None):
+    """SKILL_TAXONOMY, with the synonyms from a SKILLS_FILE JSON merged in."""
+    taxonomy = {canonical: list(synonyms) for canonical, synonyms in SKILL_TAXONOMY.items()}
+    path = path or SKILLS_FILE
+    if path:
+        with open(path, encoding="utf-8") as f:
+            for canonical, synonyms in json.load(f).items():
+                taxonomy[canonical.lower()] = list(dict.fromkeys(taxonomy.get(canonical.lower(), []) + synonyms))
+    return taxonomy
+
+@lru_cache(maxsize=None)
+def skill_matcher():
+    """The SkillMatcher for the configured taxonomy, compiled on first use."""
+    return SkillMatcher(load_skill_taxonomy())
+
+TITLE_KEYWORDS = ["golang", "go developer", "go engineer", "go", "application support engineer", "backend"]
+
+@lru_cache(maxsize=32)
+def keyword_matcher(keywords):
+    """SkillMatcher for a tuple of title keywords, each expanded with its SKILL_TAXONOMY synonyms."""
+    return SkillMatcher({k: SKILL_TAXONOMY.get(k, []) for k in keywords})
+
+def title_matches(title, keywords=None):
+    keywords = TITLE_KEYWORDS if keywords is None else keywords
+    return keyword_matcher(tuple(keywords)).search(title)
+
+# ─────────────────────────────────────────────────────────────────
+# HTML PARSING — one parse per page, one linear walk per extraction
+# ─────────────────────────────────────────────────────────────────
+def _default_html_parser():
+    """lxml (in requirements.txt, and faster), else the stdlib parser."""
+    try:
+        import lxml  # noqa: F401
+        return "lxml"
+    except ImportError:
+        return "html.parser"
+
+HTML_PARSER = os.getenv("HTML_PARSER") or _default_html_parser()
+
+# Strings get_text() keeps by default — excludes comments, <script>/<style> text etc.
+TEXT_STRING_TYPES = (NavigableString, CData)
+
+def make_soup(html_text):
+    return BeautifulSoup(html_text, HTML_PARSER)
+
+def _class_string(tag):
+    classes = tag.get("class")
+    return " ".join(classes) if isinstance(classes, list) else (classes or "")
+
+# Search card fields: same matches as the old job.find_next("p", ...) calls
+CARD_FIELD_MATCHERS = {
+    "Location":        lambda tag: _class_string(tag) == "text-sm font-normal text-zinc-600",
+    "Employment_Type": lambda tag: tag.get("id") == "employmentType-label",
+    "Salary":          lambda tag: tag.get("id") == "salary-label",
+    "Company":         lambda tag: _class_string(tag) == "mb-0 line-clamp-2 text-sm sm:line-clamp-1",
+}
+
+def parse_job_cards(html_text):
+    """
+    Every job card on a search results page, before any title filtering.
+    A single document-order walk: each card field takes the first matching
+    <p> after the card's link, exactly what find_next() returned, without
+    rescanning the rest of the page once per link and field.
+    """
+    soup = make_soup(html_text)
+    jobs_data = []
+    pending = {field: [] for field in CARD_FIELD_MATCHERS}
+
+    for tag in soup.find_all(True):
+        if tag.name == "a" and tag.get("data-testid") == "job-search-job-detail-link":
+            job = {
+                "Title": tag.get_text(strip=True),
+                "URL": tag.get("href"),
+                "Location": None,
+                "Employment_Type": None,
+                "Salary": None,
+                "Company": None
+            }
+            jobs_data.append(job)
+            for waiting in pending.values():
+                waiting.append(job)
+        elif tag.name == "p":
+            for field, matches in CARD_FIELD_MATCHERS.items():
+                if pending[field] and matches(tag):
+                    text = tag.get_text(strip=True)
+                    for job in pending[field]:
+                        job[field] = text
+                    pending[field].clear()
 
     return jobs_data
 
-def fetch_all_links(dice_url):
-    page_num = 0
-    all_jobs = []
+def process_job_links(html_text):
+    return [job for job in parse_job_cards(html_text) if title_matches(job["Title"])]
 
-    while True:
-        response = requests.get(dice_url, params={"page": page_num}, timeout=10)
+# ─────────────────────────────────────────────────────────────────
+# SEARCH PAGINATION — speculative parallel window, early termination
+# ─────────────────────────────────────────────────────────────────
+RESULT_COUNT_PATTERNS = [
+    re.compile(r'"totalResults"\s*:\s*(\d+)'),
+    re.compile(r'"total"\s*:\s*(\d+)\s*,\s*"pageSize"'),
+    # Element carrying the count, e.g. <span id="totalJobCount">1,234</span> — not "5 jobs" in any text
+    re.compile(r'(?:id|data-testid)="[^"]*(?:total|result|job)[^"]*count[^"]*"[^>]*>\s*([\d,]+)', re.I),
+]
+
+def parse_result_count(html_text):
+    """Total number of search results advertised by the page, or None if not found."""
+    for pattern in RESULT_COUNT_PATTERNS:
+        match = pattern.search(html_text)
+        if match:
+            return int(match.group(1).replace(",", ""))
+    return None
 
-        if response.status_code != 200:
-            break
+def fetch_search_page(dice_url, page_num):
+    """HTML of one search results page, or None if it could not be fetched."""
+    page_html, _ = fetch_search_cards(dice_url, page_num, parse=None)
+    return page_html
 
-        page_jobs = process_job_links(response.text)
+def fetch_search_cards(dice_url, page_num, parse=parse_job_cards):
+    """
+    (HTML, parse(HTML)) of one search results page, or (None, None) if it
+    could not be fetched. Revalidated through the response store: a page
+    that comes back 304 or byte-identical reuses its stored parse.
+    """
+    with METRICS.stage("pagination"):
+        try:
+            fetched = fetch_stored(dice_url, params={"page": page_num}, parse=parse)
+        except Exception as e:
+            logging.error(f"Search page {page_num} failed: {e}")
+            METRICS.count(errors=1)
+            return None, None
+        if fetched.status_code != 200:
+            METRICS.count(errors=1)
+            return None, None
+    if parse and fetched.parsed is None:
+        with METRICS.stage("parse"):
+            fetched.parsed = parse(fetched.text)
+        fetched.save_parse()
+    return fetched.text, fetched.parsed
+
+SEARCH_COLUMNS = ["Title", "URL", "Location", "Employment_Type", "Salary", "Company"]
+
+def fetch_all_links(dice_url, known_urls=None, window=SEARCH_PAGE_WINDOW, max_pages=SEARCH_MAX_PAGES):
+    """fetch_all_jobs() as a DataFrame."""
+    import pandas as pd
+    jobs = fetch_all_jobs(dice_url, known_urls=known_urls, window=window, max_pages=max_pages)
+    return pd.DataFrame(jobs, columns=SEARCH_COLUMNS)
+
+def fetch_all_jobs(dice_url, known_urls=None, window=SEARCH_PAGE_WINDOW, max_pages=SEARCH_MAX_PAGES):
+    """Every job from iter_search_pages() whose title passes title_matches()."""
+    return [
+        job
+        for cards in iter_search_pages(dice_url, known_urls, window, max_pages)
+        for job in cards
+        if title_matches(job["Title"])
+    ]
+
+def iter_search_pages(dice_url, known_urls=None, window=SEARCH_PAGE_WINDOW, max_pages=SEARCH_MAX_PAGES,
+                      matches=None):
+    """
+    Walks the search results in windows of pages fetched in parallel and
+    yields each page's job cards, in page order, as soon as it is parsed.
+    Stops at the advertised result count, at the first empty (or failed) page,
+    or, when SEARCH_KNOWN_PAGES is set (newest-first results only), after that
+    many consecutive pages whose matching jobs are all already in known_urls.
+    Only cards passing `matches` (default: title_matches on the title) can be
+    in the store, so the rest are ignored for that check, and a page without
+    any neither counts towards the stop nor resets it.
+    """
+    known_urls = known_urls if known_urls is not None else set()
+    # known_urls may be a set or a JobStore — only `in` is used
+    matches = matches or (lambda job: title_matches(job["Title"]))
+    known_pages = 0
+
+    def keep_going(cards):
+        nonlocal known_pages
+        if not cards:
+            return False
+        relevant = [job for job in cards if matches(job)]
+        if relevant:
+            known_pages = known_pages + 1 if all(job["URL"] in known_urls for job in relevant) else 0
+        if SEARCH_KNOWN_PAGES and known_pages >= SEARCH_KNOWN_PAGES:
+            logging.info(f"{known_pages} pages of already-stored jobs in a row; stopping pagination.")
+            return False
+        return True
 
-        if not page_jobs:
-            break
+    first_html, first_cards = fetch_search_cards(dice_url, 0)
+    if first_html is None:
+        return
+
+    last_page = max_pages - 1
+    total     = parse_result_count(first_html)
+    if total is not None and first_cards:
+        last_page = min(last_page, -(-total // len(first_cards)) - 1)
+
+    if first_cards:
+        yield first_cards
+    if not keep_going(first_cards):
+        return
+
+    page_num = 1
+    with ThreadPoolExecutor(max_workers=max(1, window)) as pool:
+        while page_num <= last_page:
+            pages = range(page_num, min(page_num + window, last_page + 1))
+            fetched = pool.map(lambda p: fetch_search_cards(dice_url, p), pages)
+            # Pages are consumed in order, so a stop on page N ignores N+1.. from this window
+            for page_html, cards in fetched:
+                if page_html is None:
+                    return
+                if cards:
+                    yield cards
+                if not keep_going(cards):
+                    return
+            page_num += window
+
+# ─────────────────────────────────────────────────────────────────
+# SEARCH SOURCES — one adapter per job board, all searches fanned out
+# ─────────────────────────────────────────────────────────────────
+def dice_search_url(query, template=None):
+    """DICE_URL (or template) with its filters kept and the search query replaced."""
+    parsed = urlparse(template or DICE_URL)
+    params = [(k, v) for k, v in parse_qsl(parsed.query) if k != "q"] + [("q", query)]
+    return parsed._replace(query=urlencode(params)).geturl()
+
+class DiceSource:
+    """
+    Dice search adapter: search pages through iter_search_pages(), cards
+    through parse_job_cards() and job pages through process_dice_description().
+    A source needs name, base_url, iter_pages(known_urls), matches(job) and
+    parse_detail(html).
+    """
+    name     = "dice"
+    base_url = "https://www.dice.com"
+
+    def __init__(self, query=None, url=None, keywords=None):
+        self.query    = query
+        self.url      = url or dice_search_url(query)
+        self.keywords = keywords
+
+    def __repr__(self):
+        return f"{self.name}:{self.query or self.url}"
 
-        all_jobs.extend(page_jobs)
-        page_num += 1
+    def iter_pages(self, known_urls=None):
+        return iter_search_pages(self.url, known_urls, matches=self.matches)
 
-    return pd.DataFrame(all_jobs)
+    def matches(self, job):
+        return title_matches(job["Title"], self.keywords)
 
-def load_existing_jobs():
-    """Load existing jobs from Excel file"""
-    if os.path.exists(EXCEL_FILE):
+    @classmethod
+    def job_url(cls, url):
+        return urljoin(cls.base_url, str(url))
+
+    @staticmethod
+    def parse_detail(html_text):
+        return process_dice_description(html_text)
+
+SOURCES = {"dice": DiceSource}
+
+def build_sources(queries=None):
+    """A source adapter per entry of `queries` (default SEARCH_QUERIES)."""
+    sources = []
+    for entry in (queries or SEARCH_QUERIES):
+        name, sep, query = entry.partition(":")
+        if not sep or name.strip().lower() not in SOURCES:
+            name, query = "dice", entry
+        sources.append(SOURCES[name.strip().lower()](query=query.strip()))
+    return sources
+
+def source_for(job):
+    """Adapter class that produced a JobRecord (Dice for jobs from older runs)."""
+    return SOURCES.get(job.source, DiceSource)
+
+def card_hash(job):
+    """Content hash of a search card, to spot one posting listed under different URLs."""
+    return text_hash("|".join(str(job.get(field) or "") for field in ("Title", "Company", "Location")))
+
+QUEUE_POLL_SECONDS = 0.2   # how often a blocked stage checks whether the run was cancelled
+
+def put_unless(q, item, cancel):
+    """q.put(item), given up once `cancel` is set; returns whether it was queued."""
+    while not cancel.is_set():
+        try:
+            q.put(item, timeout=QUEUE_POLL_SECONDS)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+def get_unless(q, cancel, default=None):
+    """q.get(), or `default` once `cancel` is set."""
+    while not cancel.is_set():
+        try:
+            return q.get(timeout=QUEUE_POLL_SECONDS)
+        except queue.Empty:
+            pass
+    return default
+
+def iter_new_jobs(sources, known_urls=None, seen_urls=(), stats=None, stop_at_known=True):
+    """
+    Runs every source's search concurrently and yields each job once, as a
+    JobRecord, as soon as its page is parsed: title-filtered, de-duplicated across searches
+    by URL and card content hash, and not already in known_urls (a set or a
+    JobStore). Only new jobs take part in the card-hash check; reposts of
+    stored jobs are left to the near-duplicate index. stop_at_known=False
+    walks every page even past known jobs. Closing the generator early stops
+    the searches after their current page.
+    """
+    stats     = stats if stats is not None else Counter()
+    seen_urls = set(seen_urls)
+    seen_hash = set()
+    pages_q   = queue.Queue(maxsize=STREAM_QUEUE_SIZE)
+    closed    = threading.Event()
+
+    def run_search(source):
         try:
-            df_existing = pd.read_excel(EXCEL_FILE, engine='openpyxl')
-            logging.info(f"Loaded {len(df_existing)} existing jobs from {EXCEL_FILE}")
-            return df_existing
+            for cards in source.iter_pages(known_urls if stop_at_known else None):
+                if not put_unless(pages_q, (source, cards), closed):
+                    break
         except Exception as e:
-            logging.error(f"Error loading Excel file: {e}")
-            return pd.DataFrame()
-    else:
-        logging.info("No existing Excel file found. Will create new one.")
-        return pd.DataFrame()
+            logging.error(f"Search {source!r} failed: {e}")
+        finally:
+            put_unless(pages_q, (source, None), closed)
+
+    for source in sources:
+        threading.Thread(target=run_search, args=(source,), name=f"search-{source!r}", daemon=True).start()
 
-def save_to_excel(df_new, df_existing):
-    """Save or append jobs to Excel file"""
+    remaining = len(sources)
     try:
-        if df_existing.empty:
-            df_new.to_excel(EXCEL_FILE, index=False, engine='openpyxl')
-            logging.info(f"Created new Excel file: {EXCEL_FILE}")
-        else:
-            df_combined = pd.concat([df_existing, df_new], ignore_index=True)
-            # Remove duplicates based on URL
-            df_combined = df_combined.drop_duplicates(subset=['URL'], keep='first')
-            df_combined.to_excel(EXCEL_FILE, index=False, engine='openpyxl')
-            logging.info(f"Updated Excel file with {len(df_new)} new jobs")
-        return True
-    except Exception as e:
-        logging.error(f"Error saving to Excel: {e}")
-        return False
+        while remaining:
+            source, cards = pages_q.get()
+            if cards is None:
+                remaining -= 1
+                continue
+            stats["scraped"] += len(cards)
+            for job in cards:
+                if not source.matches(job):
+                    continue
+                url, digest = job["URL"], card_hash(job)
+                if url in seen_urls or digest in seen_hash:
+                    stats["duplicates"] += 1
+                    continue
+                seen_urls.add(url)
+                # Known URLs are checked before their card hash is recorded: a stored
+                # listing must not hide a new URL that happens to share its card
+                if known_urls is not None and url in known_urls:
+                    continue
+                seen_hash.add(digest)
+                yield JobRecord.from_card(job, source.name)
+    finally:
+        closed.set()
 
-def flt_exsis_links(df_scraped):
-    """Filter out existing jobs and return only new ones"""
-    df_existing = load_existing_jobs()
+# ─────────────────────────────────────────────────────────────────
+# JOB RECORD — typed job model passed between pipeline stages
+# ─────────────────────────────────────────────────────────────────
+class EmailStatus(Enum):
+    """Recruiter email outcome; (Email_Sent, Email_Not_Sent_Reason) as stored in the history."""
+    PENDING        = (None, None)
+    SENT           = ("Y", "Sent successfully")
+    FAILED         = ("N", "Gmail API error")
+    AUTH_FAILED    = ("N", "Gmail auth unavailable")
+    INTERRUPTED    = ("N", "Interrupted mid-send (not retried)")
+    LOW_SCORE      = ("N/A", "Less ATS score")
+    NO_EMAIL       = ("N/A", "No email")
+    DISABLED       = ("N/A", "Email disabled")
+    HELD           = ("N/A", "Held: job store was rebuilt")
+    NEAR_DUPLICATE = ("N/A", "Near-duplicate")
+
+    @property
+    def flag(self):
+        return self.value[0]
+
+    @property
+    def reason(self):
+        return self.value[1]
+
+    @classmethod
+    def from_columns(cls, flag, reason):
+        """Status for a stored (Email_Sent, Email_Not_Sent_Reason) pair."""
+        for status in cls:
+            if status.reason and reason and str(reason).startswith(status.reason):
+                return status
+        return {"Y": cls.SENT, "N": cls.FAILED}.get(flag, cls.PENDING)
+
+# JobRecord attribute behind each stored column that is copied as-is
+_RECORD_FIELDS = {
+    "Title": "title", "URL": "url", "Company": "company", "Location": "location",
+    "Employment_Type": "employment_type", "Salary": "salary", "Job_JD": "job_jd", "Badges": "badges",
+}
+
+@dataclass(slots=True)
+class JobRecord:
+    """
+    One job on its way through the pipeline: search card fields, then its
+    detail page, ATS score and email outcome. ats_score is a float (None
+    until scored) and email_status an EmailStatus; the text columns of the
+    history ("72.5%", "Y", "N/A" ...) exist only in to_row(). Each record
+    is owned by one stage at a time, so no locking is needed.
+    """
+    url: str
+    title: str = ""
+    company: str = None
+    location: str = None
+    employment_type: str = None
+    salary: str = None
+    source: str = "dice"
+    job_jd: str = None
+    badges: str = None
+    ats_score: float = None
+    emails: tuple = ()
+    email_status: EmailStatus = EmailStatus.PENDING
+    email_note: str = None   # replaces the status' stock reason, e.g. which posting this repeats
+    resume: str = None
+
+    @classmethod
+    def from_card(cls, card, source="dice"):
+        """Record for a parse_job_cards() dict."""
+        return cls(url=card["URL"], title=card.get("Title") or "", company=card.get("Company"),
+                   location=card.get("Location"), employment_type=card.get("Employment_Type"),
+                   salary=card.get("Salary"), source=source)
+
+    @property
+    def email(self):
+        return format_emails(self.emails)
+
+    @property
+    def email_reason(self):
+        return self.email_note or self.email_status.reason
+
+    def set_email_status(self, status, note=None):
+        self.email_status, self.email_note = status, note
+
+    def apply_detail(self, detail, score):
+        """Fills in the detail page and ATS score; returns the title to email about."""
+        JD_data = detail["JD_data"]
+        self.ats_score = score
+        self.emails    = tuple(sorted(detail["Emails"]))
+        if not JD_data:
+            return self.title
+        badges = JD_data.get("Badges")
+        self.company = JD_data.get("Company", "")
+        self.badges  = " | ".join(badges) if isinstance(badges, (list, tuple)) else badges
+        self.title   = JD_data.get("Title", "")
+        self.job_jd  = str(JD_data.get("Full_Text", ""))
+        return self.title
+
+    def to_row(self):
+        """{column: text} in JOB_COLUMNS order, as stored in the job history."""
+        row = {column: getattr(self, field) for column, field in _RECORD_FIELDS.items()}
+        row["ATS_Score"] = f"{self.ats_score}%" if self.ats_score is not None else None
+        row["Email"]     = self.email if self.ats_score is not None else None
+        row["Email_Sent"], row["Email_Not_Sent_Reason"] = self.email_status.flag, self.email_reason
+        return {column: row[column] for column in JOB_COLUMNS}
+
+    def to_dict(self):
+        """to_row() plus the pipeline-only fields — the journal's JSON form."""
+        return {**self.to_row(), "Source": self.source, "Resume": self.resume}
+
+    @classmethod
+    def from_row(cls, row):
+        """Record from a to_row()/to_dict() dict or a stored history row."""
+        record = cls(**{field: row.get(column) for column, field in _RECORD_FIELDS.items()})
+        record.title     = record.title or ""
+        record.source    = row.get("Source") or "dice"
+        record.resume    = row.get("Resume")
+        record.ats_score = _parse_score(row.get("ATS_Score"))
+        email = row.get("Email")
+        record.emails    = tuple(e.strip() for e in email.split(",")) if email and email != "N/A" else ()
+        reason = row.get("Email_Not_Sent_Reason")
+        record.email_status = EmailStatus.from_columns(row.get("Email_Sent"), reason)
+        if reason and reason != record.email_status.reason:
+            record.email_note = reason
+        return record
+
+def records_frame(records):
+    """DataFrame of JobRecords in JOB_COLUMNS order, built column by column in one go."""
+    import pandas as pd
+    rows = [record.to_row() for record in records]
+    return pd.DataFrame({column: [row[column] for row in rows] for column in JOB_COLUMNS})
 
-    if df_existing.empty:
-        logging.info("No existing data. All scraped jobs are new.")
-        return df_scraped, df_existing
-    existing_urls = set(df_existing['URL'].tolist())
-    df_new = df_scraped[~df_scraped['URL'].isin(existing_urls)]
+# ─────────────────────────────────────────────────────────────────
+# JOB STORE — SQLite system of record, Excel is an on-demand export
+# ─────────────────────────────────────────────────────────────────
+JOB_COLUMNS = [
+    "Title", "URL", "Company", "Location", "Employment_Type", "Salary",
+    "Job_JD", "ATS_Score", "Badges", "Email", "Email_Sent", "Email_Not_Sent_Reason",
+]
+
+class JobStore:
+    """
+    Append-only job history keyed by URL. Inserts cost O(new jobs) and
+    exists() is a single lookup on the unique URL index. `rebuilt` is True
+    when the database was created by this process (restored from the
+    archive or xlsx, or empty), so the newest jobs may be missing from it.
+    A `readonly` store opens an existing database as is: nothing is created,
+    migrated or restored, and writes fail.
+    """
+
+    def __init__(self, path=JOB_DB_FILE, history_dir=HISTORY_DIR, readonly=False):
+        self.path = path
+        self.lock = threading.Lock()
+        if readonly:
+            self.rebuilt = False
+            self.conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+            return
+        is_new    = not os.path.exists(path)
+        self.rebuilt = is_new
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        columns = ", ".join(f'"{c}" TEXT' for c in JOB_COLUMNS if c != "URL")
+        self.conn.execute(
+            f'CREATE TABLE IF NOT EXISTS jobs (id INTEGER PRIMARY KEY, "URL" TEXT NOT NULL, {columns}, Added_At TEXT)'
+        )
+        self.conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS jobs_url ON jobs ("URL")')
+        self.conn.commit()
+        if not is_new:
+            return
+        archive = HistoryArchive(history_dir)
+        if archive.files() and HistoryArchive.available():
+            imported = archive.restore(self)
+            print(f"📥 Restored {imported} jobs from {archive.root}/ into {path}")
+        elif os.path.exists(EXCEL_FILE):
+            imported = self.import_excel(EXCEL_FILE)
+            print(f"📥 Migrated {imported} jobs from {EXCEL_FILE} into {path}")
+
+    def exists(self, url):
+        with self.lock:
+            row = self.conn.execute('SELECT 1 FROM jobs WHERE "URL" = ? LIMIT 1', (str(url),)).fetchone()
+        return row is not None
+
+    __contains__ = exists
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+    def add_jobs(self, df):
+        """Inserts rows whose URL is not stored yet; returns how many were added."""
+        if df is None or df.empty:
+            return 0
+        return self.add_records(df.to_dict("records"))
+
+    def add_records(self, records):
+        """add_jobs() for a list of JobRecords or job dicts."""
+        if not records:
+            return 0
+        added_at = datetime.now(cst).isoformat(timespec="seconds")
+        records  = [r.to_row() if isinstance(r, JobRecord) else r for r in records]
+        rows = [
+            tuple(_to_cell(record.get(c)) for c in JOB_COLUMNS) + (record.get("Added_At") or added_at,)
+            for record in records
+        ]
+        names = ", ".join(f'"{c}"' for c in JOB_COLUMNS)
+        marks = ", ".join("?" for _ in range(len(JOB_COLUMNS) + 1))
+        with self.lock:
+            before = self.conn.total_changes
+            self.conn.executemany(f"INSERT OR IGNORE INTO jobs ({names}, Added_At) VALUES ({marks})", rows)
+            self.conn.commit()
+            return self.conn.total_changes - before
+
+    def iter_since(self, last_id):
+        """(id, job dict with Added_At) for every row stored after `last_id`, oldest first."""
+        names = ", ".join(f'"{c}"' for c in JOB_COLUMNS)
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT id, {names}, Added_At FROM jobs WHERE id > ? ORDER BY id", (last_id,)
+            ).fetchall()
+        for row in rows:
+            yield row[0], dict(zip(JOB_COLUMNS + ["Added_At"], row[1:]))
+
+    def latest(self, count):
+        """The `count` most recently stored jobs as JobRecords, oldest first."""
+        names = ", ".join(f'"{c}"' for c in JOB_COLUMNS)
+        with self.lock:
+            rows = self.conn.execute(f"SELECT {names} FROM jobs ORDER BY id DESC LIMIT ?", (count,)).fetchall()
+        return [JobRecord.from_row(dict(zip(JOB_COLUMNS, row))) for row in reversed(rows)]
+
+    def max_id(self):
+        with self.lock:
+            return self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM jobs").fetchone()[0]
+
+    def to_dataframe(self):
+        import pandas as pd
+        names = ", ".join(f'"{c}"' for c in JOB_COLUMNS)
+        with self.lock:
+            return pd.read_sql_query(f"SELECT {names} FROM jobs ORDER BY id", self.conn)
+
+    def import_excel(self, path):
+        if not os.path.exists(path):
+            return 0
+        import pandas as pd
+        with METRICS.stage("excel_io"):
+            df = pd.read_excel(path, engine='openpyxl')
+        return self.add_jobs(df.drop_duplicates(subset=['URL'], keep='first'))
+
+    def export_excel(self, path=EXCEL_FILE):
+        df = self.to_dataframe()
+        with METRICS.stage("excel_io"):
+            df.to_excel(path, index=False, engine='openpyxl')
+        return len(df)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+def _to_cell(value):
+    """Normalizes a DataFrame cell for SQLite: NaN -> NULL, lists/objects -> text."""
+    if value is None:
+        return None
+    if isinstance(value, float) and value != value:
+        return None
+    if isinstance(value, (list, tuple, set)):
+        return " | ".join(str(v) for v in value)
+    return str(value)
+
+def export_to_excel(path=EXCEL_FILE):
+    """On-demand Excel export of the full job history."""
+    store = JobStore()
+    try:
+        count = store.export_excel(path)
+        print(f"💾 Exported {count} jobs to {path}")
+        return count
+    finally:
+        store.close()
+
+def backup_store(path, db=JOB_DB_FILE):
+    """
+    Consistent, gzip-compressed snapshot of the job store (VACUUM INTO, so a
+    live WAL is folded in) for a copy that outlives the Actions cache.
+    Returns the snapshot size in bytes.
+    """
+    import gzip
+    import shutil
+    if not os.path.exists(db):
+        raise FileNotFoundError(db)
+    snapshot = f"{path}.snapshot"
+    if os.path.exists(snapshot):
+        os.remove(snapshot)
+    conn = sqlite3.connect(db)
+    try:
+        conn.execute("VACUUM INTO ?", (snapshot,))
+    finally:
+        conn.close()
+    try:
+        with open(snapshot, "rb") as src, gzip.open(f"{path}.tmp", "wb") as dst:
+            shutil.copyfileobj(src, dst)
+    finally:
+        os.remove(snapshot)
+    os.replace(f"{path}.tmp", path)
+    return os.path.getsize(path)
+
+def flt_exsis_links(df_scraped, store):
+    """Filter out existing jobs and return only new ones"""
+    if df_scraped.empty:
+        return df_scraped
+    is_new = [not store.exists(url) for url in df_scraped['URL']]
+    df_new = df_scraped[is_new]
 
     logging.info(f"Found {len(df_new)} new jobs out of {len(df_scraped)} scraped jobs")
-    return df_new, df_existing
+    return df_new
+
+# ─────────────────────────────────────────────────────────────────
+# HISTORY ARCHIVE — date-partitioned Parquet copy of the job store
+# ─────────────────────────────────────────────────────────────────
+HISTORY_PARTITION = "added_date"
+HISTORY_SYNC_FILE = "_synced_id"   # "_" prefix: skipped by pyarrow dataset scans
+
+class HistoryArchive:
+    """
+    Append-only columnar copy of the job history under
+    history/added_date=YYYY-MM-DD/part-*.parquet, synced from the JobStore
+    after every run. Readers load only the columns they need: dedup reads
+    the URL column, analytics read ATS_Value, Company and Email — the JD
+    text is never decoded. The SQLite store stays the system of record; a
+    new dice_jobs.db is restored from here when the archive exists.
+    """
+
+    def __init__(self, root=HISTORY_DIR):
+        self.root = root
+
+    @staticmethod
+    def available():
+        return importlib.util.find_spec("pyarrow") is not None
+
+    @staticmethod
+    def schema():
+        import pyarrow as pa
+        fields = [(c, pa.string()) for c in JOB_COLUMNS]
+        return pa.schema(fields + [("ATS_Value", pa.float64()), ("Added_At", pa.string())])
+
+    def files(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            os.path.join(self.root, part, name)
+            for part in os.listdir(self.root) if part.startswith(f"{HISTORY_PARTITION}=")
+            for name in os.listdir(os.path.join(self.root, part)) if name.endswith(".parquet")
+            and not name.startswith(".")
+        )
+
+    def partitions(self):
+        return sorted({os.path.basename(os.path.dirname(path)).split("=", 1)[1] for path in self.files()})
+
+    # ── writing ──────────────────────────────────────────────────
+    def append(self, records):
+        """Writes job dicts into one new part file per Added_At day; returns the row count."""
+        if not records:
+            return 0
+        import pyarrow as pa
+        by_day = defaultdict(list)
+        for record in records:
+            row = {c: _to_cell(record.get(c)) for c in JOB_COLUMNS}
+            row["ATS_Value"] = _parse_score(record.get("ATS_Score"))
+            row["Added_At"]  = _to_cell(record.get("Added_At"))
+            by_day[(row["Added_At"] or "")[:10] or "unknown"].append(row)
+        for day, rows in by_day.items():
+            self._write(day, pa.Table.from_pylist(rows, schema=self.schema()))
+        return len(records)
+
+    def _write(self, day, table):
+        import pyarrow.parquet as pq
+        folder = os.path.join(self.root, f"{HISTORY_PARTITION}={day}")
+        os.makedirs(folder, exist_ok=True)
+        name = f"part-{time.time_ns()}-{os.getpid()}.parquet"
+        tmp  = os.path.join(folder, f".{name}")
+        pq.write_table(table, tmp, compression="zstd")
+        os.replace(tmp, os.path.join(folder, name))
+        return os.path.join(folder, name)
+
+    def synced_id(self):
+        try:
+            with open(os.path.join(self.root, HISTORY_SYNC_FILE)) as f:
+                return int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def mark_synced(self, last_id):
+        os.makedirs(self.root, exist_ok=True)
+        _write_atomic(os.path.join(self.root, HISTORY_SYNC_FILE), str(last_id))
+
+    def sync(self, store):
+        """Appends jobs stored since the last sync; returns how many were written."""
+        last = self.synced_id()
+        if last > store.max_id():
+            last = 0   # the store was rebuilt since the last sync — dedup by URL instead
+        rows = list(store.iter_since(last))
+        if not rows:
+            return 0
+        # Without a sync mark the archive may already hold some of these rows
+        known   = self.urls() if last == 0 and self.files() else set()
+        written = self.append([job for _, job in rows if job["URL"] not in known])
+        self.mark_synced(rows[-1][0])
+        return written
+
+    def restore(self, store):
+        """Loads the whole archive into an empty JobStore; returns how many rows were added."""
+        columns = JOB_COLUMNS + ["Added_At"]
+        added = 0
+        for path in self.files():
+            added += store.add_records(self._read_file(path, columns).to_pylist())
+        self.mark_synced(store.max_id())
+        return added
+
+    def compact(self, keep_today=True):
+        """Merges each day's part files into one; returns the number of files removed."""
+        today = datetime.now(cst).date().isoformat()
+        by_day = defaultdict(list)
+        for path in self.files():
+            by_day[os.path.basename(os.path.dirname(path)).split("=", 1)[1]].append(path)
+        removed = 0
+        for day, paths in by_day.items():
+            if len(paths) < 2 or (keep_today and day == today):
+                continue
+            import pyarrow as pa
+            merged = pa.concat_tables([self._read_file(path) for path in paths])
+            self._write(day, merged)
+            for path in paths:
+                os.remove(path)
+            removed += len(paths) - 1
+        return removed
+
+    # ── reading ──────────────────────────────────────────────────
+    def _read_file(self, path, columns=None):
+        import pyarrow.parquet as pq
+        return pq.read_table(path, columns=columns, memory_map=True)
+
+    def urls(self):
+        """Every archived URL — reads only the URL column chunks, memory-mapped."""
+        urls = set()
+        for path in self.files():
+            urls.update(self._read_file(path, ["URL"]).column(0).to_pylist())
+        return urls
+
+    def query(self, columns, since=None, until=None):
+        """
+        pyarrow Table of just `columns`, optionally limited to Added_At days
+        since..until (inclusive, YYYY-MM-DD) — whole partitions outside the
+        range are skipped without being opened.
+        """
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+        if not self.files():
+            return self.schema().empty_table().select(columns)
+        partitioning = ds.partitioning(pa.schema([(HISTORY_PARTITION, pa.string())]), flavor="hive")
+        dataset = ds.dataset(self.root, format="parquet", partitioning=partitioning)
+        condition = None
+        if since:
+            condition = ds.field(HISTORY_PARTITION) >= since
+        if until:
+            upper = ds.field(HISTORY_PARTITION) <= until
+            condition = upper if condition is None else condition & upper
+        return dataset.to_table(columns=columns, filter=condition)
+
+    def __len__(self):
+        import pyarrow.parquet as pq
+        return sum(pq.read_metadata(path).num_rows for path in self.files())
+
+def history_stats(archive, since=None, until=None, top=10):
+    """ATS score distribution, top companies and email hit rate — without loading any JD text."""
+    import pandas as pd
+    df = archive.query(["ATS_Value", "Company", "Email", "Email_Sent"], since, until).to_pandas()
+    scores    = df["ATS_Value"].dropna()
+    has_email = df["Email"].notna() & ~df["Email"].isin(["", "N/A"])
+    sent      = df["Email_Sent"] == "Y"
+    buckets   = pd.cut(scores.clip(upper=99.99), bins=range(0, 101, 10), right=False)
+    return {
+        "rows": len(df),
+        "ats": {
+            "scored": len(scores),
+            "mean": round(float(scores.mean()), 2) if len(scores) else None,
+            "median": round(float(scores.median()), 2) if len(scores) else None,
+            "above_threshold": int((scores >= ATS_EMAIL_THRESHOLD).sum()),
+            "histogram": {f"{b.left}-{b.right}": int(n) for b, n in buckets.value_counts(sort=False).items()},
+        },
+        "top_companies": {str(k): int(v) for k, v in df["Company"].dropna().value_counts().head(top).items()},
+        "email_hit_rate": round(float(has_email.mean()), 4) if len(df) else None,
+        "emails_sent": int(sent.sum()),
+        "email_send_rate": round(float(sent.sum() / has_email.sum()), 4) if has_email.any() else None,
+    }
+
+def sync_history(store):
+    """Post-run archive sync; skipped when pyarrow is not installed."""
+    if not HistoryArchive.available():
+        logging.info("pyarrow not installed — skipping history archive sync")
+        return 0
+    with METRICS.stage("history_io"):
+        written = HistoryArchive().sync(store)
+    if written:
+        print(f"📦 Archived {written} jobs into {HISTORY_DIR}/")
+    return written
+
+# ─────────────────────────────────────────────────────────────────
+# RUN JOURNAL — per-job progress checkpoints for crash-safe resume
+# ─────────────────────────────────────────────────────────────────
+class RunJournal:
+    """
+    Per-job progress kept next to the job store and committed at every step,
+    so a run that dies part-way can resume where it stopped. States only move
+    forward. "emailing" is written before a send and "emailed" (with the Gmail
+    message ids) after it; a job left in "emailing" is never re-sent, because
+    the send may already have gone out. Stored jobs whose Telegram card
+    never went out are retried by at most TELEGRAM_ANNOUNCE_ATTEMPTS runs.
+    """
+
+    STATES = ("fetched", "scored", "emailing", "emailed", "stored", "notified")
+
+    def __init__(self, path=JOB_DB_FILE):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS journal (
+                url TEXT PRIMARY KEY, state INTEGER, job_json TEXT, message_ids TEXT, updated TEXT,
+                notify_attempts INTEGER DEFAULT 0)
+        """)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(journal)")}
+        if "notify_attempts" not in columns:   # journal written before the cap existed
+            self.conn.execute("ALTER TABLE journal ADD COLUMN notify_attempts INTEGER DEFAULT 0")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS journal_meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.conn.commit()
+
+    def begin_run(self):
+        """Flags a run as in progress; returns False if the previous run never finished."""
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM journal_meta WHERE key = 'run'").fetchone()
+            self.conn.execute("INSERT OR REPLACE INTO journal_meta VALUES ('run', 'running')")
+            self.conn.commit()
+        return row is None or row[0] == "finished"
+
+    def finish_run(self):
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO journal_meta VALUES ('run', 'finished')")
+            self.conn.commit()
+
+    def get(self, url):
+        """(state name, JobRecord) for a URL, or (None, None) if it was never journaled."""
+        with self.lock:
+            row = self.conn.execute("SELECT state, job_json FROM journal WHERE url = ?", (url,)).fetchone()
+        if not row:
+            return None, None
+        return self.STATES[row[0]], JobRecord.from_row(json.loads(row[1]))
+
+    def mark(self, jobs, state, message_ids=None):
+        """Moves every JobRecord in `jobs` to `state` (never backwards) in one transaction."""
+        rank = self.STATES.index(state)
+        now  = datetime.now(cst).isoformat(timespec="seconds")
+        rows = [
+            (job.url, rank, json.dumps(job.to_dict()),
+             json.dumps((message_ids or {}).get(job.url)) if message_ids else None, now)
+            for job in jobs
+        ]
+        with self.lock:
+            self.conn.executemany("""
+                INSERT INTO journal (url, state, job_json, message_ids, updated) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    state = excluded.state, job_json = excluded.job_json, updated = excluded.updated,
+                    message_ids = COALESCE(excluded.message_ids, journal.message_ids)
+                WHERE excluded.state > journal.state
+            """, rows)
+            self.conn.commit()
+
+    def mark_urls(self, urls, state):
+        """mark() for jobs known only by URL — keeps the journaled job."""
+        rank = self.STATES.index(state)
+        now  = datetime.now(cst).isoformat(timespec="seconds")
+        with self.lock:
+            self.conn.executemany(
+                "UPDATE journal SET state = ?, updated = ? WHERE url = ? AND state < ?",
+                [(rank, now, url, rank) for url in urls],
+            )
+            self.conn.commit()
+
+    def unfinished(self, below):
+        """JobRecords of entries whose state is earlier than `below`, oldest first."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT job_json FROM journal WHERE state < ? ORDER BY updated",
+                (self.STATES.index(below),),
+            ).fetchall()
+        return [JobRecord.from_row(json.loads(row[0])) for row in rows]
+
+    def claim_unannounced(self, max_attempts=TELEGRAM_ANNOUNCE_ATTEMPTS):
+        """
+        JobRecords stored but not yet notified, for one more Telegram attempt,
+        which is counted. Entries that already had max_attempts are dropped
+        instead, so a card Telegram keeps rejecting isn't re-sent every run.
+        Returns (jobs, number given up on).
+        """
+        stored, notified = self.STATES.index("stored"), self.STATES.index("notified")
+        with self.lock:
+            given_up = self.conn.execute(
+                "DELETE FROM journal WHERE state >= ? AND state < ? AND notify_attempts >= ?",
+                (stored, notified, max_attempts),
+            ).rowcount
+            self.conn.execute(
+                "UPDATE journal SET notify_attempts = notify_attempts + 1 WHERE state >= ? AND state < ?",
+                (stored, notified),
+            )
+            rows = self.conn.execute(
+                "SELECT job_json FROM journal WHERE state >= ? AND state < ? ORDER BY updated",
+                (stored, notified),
+            ).fetchall()
+            self.conn.commit()
+        return [JobRecord.from_row(json.loads(row[0])) for row in rows], given_up
+
+    def clear(self, done_state):
+        """Forgets jobs that reached done_state — the journal only holds unfinished work."""
+        with self.lock:
+            self.conn.execute("DELETE FROM journal WHERE state >= ?", (self.STATES.index(done_state),))
+            self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+# ─────────────────────────────────────────────────────────────────
+# NEAR-DUPLICATE INDEX — MinHash signatures + LSH buckets in the job store
+# ─────────────────────────────────────────────────────────────────
+MINHASH_PERMUTATIONS = 128
+LSH_BANDS            = 16     # 16 bands x 8 rows: candidates from ~0.7 similarity up
+LSH_ROWS             = MINHASH_PERMUTATIONS // LSH_BANDS
+SHINGLE_WORDS        = 3
+MINHASH_SEED         = 1      # changing the seed or sizes invalidates stored signatures
+_MERSENNE_61         = (1 << 61) - 1
+_minhash_params      = None
+
+def shingles(text):
+    """crc32 of every SHINGLE_WORDS-word window of the normalized text."""
+    words = re.findall(r"[a-z0-9+#]+", (text or "").lower())
+    if len(words) < SHINGLE_WORDS:
+        words = words + [""] * (SHINGLE_WORDS - len(words))
+    return {zlib.crc32(" ".join(words[i:i + SHINGLE_WORDS]).encode("utf-8"))
+            for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+def minhash_signature(text):
+    """MINHASH_PERMUTATIONS minimums of (a*x + b) mod 2^61-1 over the shingle hashes, as bytes."""
+    import numpy as np
+    global _minhash_params
+    if _minhash_params is None:
+        rng = np.random.RandomState(MINHASH_SEED)
+        _minhash_params = (
+            rng.randint(1, 1 << 31, MINHASH_PERMUTATIONS).astype(np.uint64).reshape(-1, 1),
+            rng.randint(0, 1 << 31, MINHASH_PERMUTATIONS).astype(np.uint64).reshape(-1, 1),
+        )
+    a, b = _minhash_params
+    x = np.fromiter(shingles(text), dtype=np.uint64)
+    # a < 2^31 and x < 2^32, so a*x + b stays below 2^64
+    return ((a * x + b) % np.uint64(_MERSENNE_61)).min(axis=1).astype("<u8").tobytes()
+
+def signature_similarity(sig_a, sig_b):
+    """Fraction of equal MinHash slots — an estimate of the Jaccard similarity."""
+    import numpy as np
+    return float((np.frombuffer(sig_a, dtype="<u8") == np.frombuffer(sig_b, dtype="<u8")).mean())
+
+def lsh_buckets(signature):
+    """One (band, bucket) key per LSH band of a signature."""
+    width = LSH_ROWS * 8
+    return [
+        (band, int.from_bytes(hashlib.blake2b(signature[band * width:(band + 1) * width],
+                                              digest_size=8).digest(), "little", signed=True))
+        for band in range(LSH_BANDS)
+    ]
+
+class NearDupIndex:
+    """
+    Persistent MinHash/LSH index of job postings (title + JD), kept in the job
+    store database. find() looks up only the jobs sharing an LSH bucket, so a
+    check costs the same however long the history gets. Each job's ATS score is
+    kept alongside so a repost can reuse it instead of being scored again, and
+    whether its recruiter was emailed, so only reposts of emailed jobs are
+    held back from another email.
+    With persist=False nothing is committed: the run sees its own additions,
+    and they are rolled back on close().
+    """
+
+    def __init__(self, path=JOB_DB_FILE, threshold=NEAR_DUP_THRESHOLD,
+                 window_days=NEAR_DUP_WINDOW_DAYS, persist=True):
+        self.threshold = threshold
+        self.window    = window_days * 86400
+        self.persist   = persist
+        self.lock      = threading.Lock()
+        self.conn      = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS minhash (
+                url TEXT PRIMARY KEY, signature BLOB, score REAL, added REAL, emailed INTEGER);
+            CREATE TABLE IF NOT EXISTS lsh (band INTEGER, bucket INTEGER, url TEXT);
+            CREATE INDEX IF NOT EXISTS lsh_bucket ON lsh (band, bucket);
+            CREATE INDEX IF NOT EXISTS lsh_url ON lsh (url);
+        """)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(minhash)")}
+        if "emailed" not in columns:   # index built before email outcomes were kept
+            self.conn.execute("ALTER TABLE minhash ADD COLUMN emailed INTEGER")
+        self.prune()
+        self.backfill()
+
+    def _commit(self):
+        if self.persist:
+            self.conn.commit()
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM minhash WHERE signature IS NOT NULL").fetchone()[0]
+
+    def _insert(self, url, signature, score=None, added=None, emailed=None):
+        self.conn.execute("INSERT OR REPLACE INTO minhash (url, signature, score, added, emailed) VALUES (?, ?, ?, ?, ?)",
+                          (url, signature, score, added or time.time(), emailed))
+        self.conn.execute("DELETE FROM lsh WHERE url = ?", (url,))
+        self.conn.executemany("INSERT INTO lsh VALUES (?, ?, ?)",
+                              [(band, bucket, url) for band, bucket in lsh_buckets(signature)])
+
+    def find(self, signature, exclude=None):
+        """
+        (url, similarity, score, emailed) of the most similar indexed job at or
+        above threshold, else None. A match whose recruiter was emailed wins
+        over a closer one that wasn't, so emailed is True if any match was.
+        """
+        keys = lsh_buckets(signature)
+        with self.lock:
+            candidates = set()
+            for band, bucket in keys:
+                candidates.update(url for (url,) in self.conn.execute(
+                    "SELECT url FROM lsh WHERE band = ? AND bucket = ?", (band, bucket)))
+            candidates.discard(exclude)
+            best = None
+            for url in candidates:
+                row = self.conn.execute("SELECT signature, score, emailed FROM minhash WHERE url = ?", (url,)).fetchone()
+                if not row or row[0] is None:
+                    continue
+                similarity = signature_similarity(signature, row[0])
+                match = (url, similarity, row[1], bool(row[2]))
+                if similarity >= self.threshold and (best is None or (match[3], match[1]) > (best[3], best[1])):
+                    best = match
+        return best
+
+    def check_and_add(self, url, text):
+        """Indexes a job and returns find()'s match among the jobs indexed before it."""
+        signature = minhash_signature(text)
+        match = self.find(signature, exclude=url)
+        with self.lock:
+            self._insert(url, signature)
+            self._commit()
+        return match
+
+    def set_scores(self, scores):
+        """Records {url: ats_score} for indexed jobs."""
+        with self.lock:
+            self.conn.executemany("UPDATE minhash SET score = ? WHERE url = ?",
+                                  [(score, url) for url, score in scores.items()])
+            self._commit()
+
+    def set_emailed(self, emailed):
+        """Records {url: True if the recruiter was (or may have been) emailed} for indexed jobs."""
+        with self.lock:
+            self.conn.executemany("UPDATE minhash SET emailed = ? WHERE url = ?",
+                                  [(int(sent), url) for url, sent in emailed.items()])
+            self._commit()
+
+    def backfill(self):
+        """Indexes stored jobs that predate the index (or came from an Excel import)."""
+        with self.lock:
+            tables = {name for (name,) in self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            if "jobs" not in tables:
+                return 0
+            rows = self.conn.execute("""
+                SELECT URL, Title, Job_JD, ATS_Score, Added_At, Email_Sent FROM jobs
+                WHERE Job_JD IS NOT NULL AND URL NOT IN (SELECT url FROM minhash)
+            """).fetchall()
+            for url, title, jd, ats, added_at, email_sent in rows:
+                self._insert(url, minhash_signature(f"{title or ''} {jd}"), _parse_score(ats), _timestamp(added_at),
+                             int(email_sent == EmailStatus.SENT.flag))
+            # Entries indexed before email outcomes were kept take theirs from the store
+            self.conn.execute("""
+                UPDATE minhash SET emailed = (SELECT jobs.Email_Sent = ? FROM jobs WHERE jobs.URL = minhash.url)
+                WHERE emailed IS NULL AND url IN (SELECT URL FROM jobs)
+            """, (EmailStatus.SENT.flag,))
+            self._commit()
+        if rows:
+            logging.info(f"Near-duplicate index: backfilled {len(rows)} stored jobs")
+        return len(rows)
+
+    def prune(self):
+        """
+        Drops postings older than the window from the LSH buckets. Their rows
+        stay, without a signature, so backfill() doesn't index them again.
+        """
+        cutoff = time.time() - self.window
+        with self.lock:
+            self.conn.execute("DELETE FROM lsh WHERE url IN (SELECT url FROM minhash WHERE added <= ?)", (cutoff,))
+            self.conn.execute("UPDATE minhash SET signature = NULL WHERE added <= ?", (cutoff,))
+            self._commit()
+
+    def clusters(self):
+        """Groups of indexed URLs that are near-duplicates of each other, largest first."""
+        with self.lock:
+            urls = [url for (url,) in self.conn.execute("SELECT url FROM minhash WHERE signature IS NOT NULL")]
+        parent = {url: url for url in urls}
+
+        def root(url):
+            while parent[url] != url:
+                parent[url] = parent[parent[url]]
+                url = parent[url]
+            return url
+
+        for url in urls:
+            with self.lock:
+                row = self.conn.execute("SELECT signature FROM minhash WHERE url = ?", (url,)).fetchone()
+            match = self.find(row[0], exclude=url)
+            if match and match[0] in parent:
+                parent[root(url)] = root(match[0])
+        groups = {}
+        for url in urls:
+            groups.setdefault(root(url), []).append(url)
+        return sorted((g for g in groups.values() if len(g) > 1), key=len, reverse=True)
+
+    def close(self):
+        with self.lock:
+            if not self.persist:
+                self.conn.rollback()
+            self.conn.close()
+
+def _parse_score(value):
+    """'72.5%' / 72.5 / None -> 72.5 / None."""
+    try:
+        return float(str(value).rstrip("%"))
+    except (TypeError, ValueError):
+        return None
+
+def _timestamp(iso_text):
+    try:
+        return datetime.fromisoformat(iso_text).timestamp()
+    except (TypeError, ValueError):
+        return time.time()
+
+# ─────────────────────────────────────────────────────────────────
+# DETAIL CACHE — parsed pages by URL, ATS scores by content hash
+# ─────────────────────────────────────────────────────────────────
+# Hit/miss counters for the run summary, bumped from every stage thread
+CACHE_STATS      = Counter()
+CACHE_STATS_LOCK = threading.Lock()
 
-def send_telegram_message(message, max_retries=3):
-    """Send message to Telegram with retry logic for rate limiting"""
+def count_cache(**counts):
+    """Adds hits / misses to CACHE_STATS (a bare += on a Counter can lose updates)."""
+    with CACHE_STATS_LOCK:
+        CACHE_STATS.update(counts)
+
+def text_hash(text):
+    """sha1 of whitespace- and case-normalized text."""
+    normalized = " ".join((text or "").lower().split())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+class DetailCache:
+    """
+    On-disk cache of fetch_job_detail() results (keyed by URL, tagged with the
+    JD content hash) and ATS scores (keyed by JD content hash + resume hash).
+    Entries expire after ttl_hours; beyond max_entries the least recently used go.
+    """
+
+    def __init__(self, path=CACHE_FILE, ttl_hours=CACHE_TTL_HOURS, max_entries=CACHE_MAX_ENTRIES):
+        self.ttl         = ttl_hours * 3600
+        self.max_entries = max_entries
+        self.lock        = threading.Lock()
+        self.conn        = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY, content_hash TEXT, jd_json TEXT, emails_json TEXT,
+                created REAL, last_used REAL);
+            CREATE INDEX IF NOT EXISTS pages_hash ON pages (content_hash);
+            CREATE TABLE IF NOT EXISTS scores (
+                content_hash TEXT, resume_hash TEXT, score REAL, created REAL, last_used REAL,
+                PRIMARY KEY (content_hash, resume_hash));
+            CREATE TABLE IF NOT EXISTS resumes (
+                file_hash TEXT PRIMARY KEY, profile_json TEXT, created REAL);
+        """)
+        self.prune()
+
+    def get_page(self, url):
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT jd_json, emails_json FROM pages WHERE url = ? AND created > ?",
+                (url, now - self.ttl),
+            ).fetchone()
+            if row:
+                self.conn.execute("UPDATE pages SET last_used = ? WHERE url = ?", (now, url))
+                self.conn.commit()   # don't hold the write lock the ResponseStore also needs
+        count_cache(**{"page_hit" if row else "page_miss": 1})
+        if not row:
+            return None
+        return {"URL": url, "JD_data": json.loads(row[0]), "Emails": set(json.loads(row[1])), "Error": None}
+
+    def put_page(self, result):
+        jd = result.get("JD_data")
+        content_hash = text_hash(jd.get("Full_Text")) if jd else None
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?)",
+                (result["URL"], content_hash, json.dumps(jd), json.dumps(sorted(result["Emails"])), now, now),
+            )
+            self.conn.commit()   # survive a crash later in the run
+
+    def get_scores(self, content_hashes, resume_hash):
+        """{content_hash: score} for the hashes already scored against this resume."""
+        now   = time.time()
+        found = {}
+        with self.lock:
+            for content_hash in set(content_hashes):
+                row = self.conn.execute(
+                    "SELECT score FROM scores WHERE content_hash = ? AND resume_hash = ? AND created > ?",
+                    (content_hash, resume_hash, now - self.ttl),
+                ).fetchone()
+                if row:
+                    found[content_hash] = row[0]
+                    self.conn.execute(
+                        "UPDATE scores SET last_used = ? WHERE content_hash = ? AND resume_hash = ?",
+                        (now, content_hash, resume_hash),
+                    )
+            self.conn.commit()
+        return found
+
+    def put_scores(self, scores, resume_hash):
+        now = time.time()
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?, ?)",
+                [(h, resume_hash, score, now, now) for h, score in scores.items()],
+            )
+            self.conn.commit()
+
+    def get_profile(self, file_hash):
+        """ResumeProfile compiled from a .docx with this content hash, or None."""
+        with self.lock:
+            row = self.conn.execute("SELECT profile_json FROM resumes WHERE file_hash = ?", (file_hash,)).fetchone()
+        profile = ResumeProfile.from_dict(json.loads(row[0])) if row else None
+        count_cache(**{"resume_hit" if profile else "resume_miss": 1})
+        return profile
+
+    def put_profile(self, profile):
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO resumes VALUES (?, ?, ?)",
+                              (profile.file_hash, json.dumps(profile.to_dict()), time.time()))
+            self.conn.commit()
+
+    def prune(self):
+        """Drops expired entries, then trims each table to the max_entries most recently used."""
+        cutoff = time.time() - self.ttl
+        with self.lock:
+            self.conn.execute("DELETE FROM pages WHERE created <= ?", (cutoff,))
+            self.conn.execute("DELETE FROM scores WHERE created <= ?", (cutoff,))
+            self.conn.execute(
+                "DELETE FROM pages WHERE url NOT IN (SELECT url FROM pages ORDER BY last_used DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+            self.conn.execute(
+                "DELETE FROM scores WHERE rowid NOT IN (SELECT rowid FROM scores ORDER BY last_used DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+            self.conn.commit()
+
+    def close(self):
+        self.prune()
+        with self.lock:
+            self.conn.close()
+
+def print_cache_stats():
+    if not CACHE_STATS:
+        return
+    for kind in ("page", "score", "resume"):
+        hits, misses = CACHE_STATS[f"{kind}_hit"], CACHE_STATS[f"{kind}_miss"]
+        if hits + misses:
+            print(f"🗄️  {kind.title()} cache: {hits} hits, {misses} misses ({hits / (hits + misses):.0%} hit rate)")
+
+# ─────────────────────────────────────────────────────────────────
+# RESPONSE STORE — conditional GETs, compressed bodies, parse skipping
+# ─────────────────────────────────────────────────────────────────
+class ResponseStore:
+    """
+    Last response for each fetched URL: its ETag / Last-Modified validators,
+    a sha1 and a zlib-compressed copy of the body, and the parse of that body
+    (tagged with the parser it came from). Lives next to the DetailCache in
+    dice_cache.db; beyond max_entries the least recently used go.
+    """
+
+    def __init__(self, path=CACHE_FILE, max_entries=RESPONSE_STORE_ENTRIES):
+        self.max_entries = max_entries
+        self.lock        = threading.Lock()
+        self.conn        = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, body_hash TEXT, body BLOB,
+                size INTEGER, parser TEXT, parsed_json TEXT, fetched REAL, last_used REAL)
+        """)
+        self.prune()
+
+    def get(self, url):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT etag, last_modified, body_hash, body, size, parser, parsed_json FROM responses WHERE url = ?",
+                (url,),
+            ).fetchone()
+        if not row:
+            return None
+        keys = ("etag", "last_modified", "body_hash", "body", "size", "parser", "parsed_json")
+        return dict(zip(keys, row))
+
+    def put(self, url, headers, body, body_hash):
+        """Stores a fresh 200 response; any parse of an older body is dropped."""
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, NULL, NULL, ?, ?)",
+                (url, headers.get("ETag"), headers.get("Last-Modified"), body_hash,
+                 zlib.compress(body, 6), len(body), now, now),
+            )
+            self.conn.commit()
+
+    def touch(self, url, headers=None):
+        """Marks a stored response as revalidated, picking up any new validators."""
+        headers = headers or {}
+        with self.lock:
+            self.conn.execute(
+                "UPDATE responses SET last_used = ?, etag = COALESCE(?, etag), "
+                "last_modified = COALESCE(?, last_modified) WHERE url = ?",
+                (time.time(), headers.get("ETag"), headers.get("Last-Modified"), url),
+            )
+            self.conn.commit()
+
+    def put_parse(self, url, body_hash, parser, parsed):
+        with self.lock:
+            self.conn.execute(
+                "UPDATE responses SET parser = ?, parsed_json = ? WHERE url = ? AND body_hash = ?",
+                (parser, json.dumps(parsed, default=sorted), url, body_hash),
+            )
+            self.conn.commit()
+
+    def prune(self):
+        with self.lock:
+            self.conn.execute(
+                "DELETE FROM responses WHERE url NOT IN (SELECT url FROM responses ORDER BY last_used DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+            self.conn.commit()
+
+    def close(self):
+        self.prune()
+        with self.lock:
+            self.conn.close()
+
+_response_store, _response_store_lock = None, threading.Lock()
+
+def response_store():
+    """The process-wide ResponseStore, opened on first use (None when disabled)."""
+    global _response_store
+    with _response_store_lock:
+        if _response_store is None and RESPONSE_STORE_ENTRIES > 0:
+            _response_store = ResponseStore()
+        return _response_store
+
+@lru_cache(maxsize=None)
+def parser_key(parse):
+    """Names a parser by its qualified name and bytecode, so editing it invalidates stored parses."""
+    code = getattr(parse, "__code__", None)
+    return f"{parse.__module__}.{parse.__qualname__}:{zlib.crc32(code.co_code) if code else 0:08x}"
+
+class StoredResponse:
+    """
+    What fetch_stored() returns: status_code and text like a Response, plus
+    `parsed` — the stored parse when the body is unchanged, else None. After
+    parsing a fresh body, set .parsed and call save_parse() to store it.
+    """
+
+    def __init__(self, url, status_code, text, body_hash=None, parsed=None, parse=None, store=None,
+                 headers=None):
+        self.url         = url
+        self.status_code = status_code
+        self.text        = text
+        self.headers     = headers or {}
+        self.body_hash   = body_hash
+        self.parsed      = parsed
+        self._parse      = parse
+        self._store      = store
+
+    def save_parse(self):
+        if self._store and self._parse and self.body_hash and self.parsed is not None:
+            self._store.put_parse(self.url, self.body_hash, parser_key(self._parse), self.parsed)
+
+def fetch_stored(url, params=None, parse=None, timeout=10, store=None, session=None):
+    """
+    session.get() (default HTTP) through the response store. A URL fetched before is requested
+    with If-None-Match / If-Modified-Since; on 304, or on a 200 whose body
+    hashes the same as the stored one, the stored parse by the same `parse`
+    function comes back in .parsed so the caller can skip parsing.
+    Counts conditional / not_modified / unchanged / bytes_saved on the
+    current stage and parse_skipped on "parse".
+    """
+    store = store or response_store()
+    if params:
+        url = requests.Request("GET", url, params=params).prepare().url
+    stored  = store.get(url) if store else None
+    headers = {}
+    if stored and stored["etag"]:
+        headers["If-None-Match"] = stored["etag"]
+    if stored and stored["last_modified"]:
+        headers["If-Modified-Since"] = stored["last_modified"]
+    if headers:
+        METRICS.count(conditional=1)
+
+    response = (session or HTTP).get(url, headers=headers, timeout=timeout)
+    unchanged = False
+    if response.status_code == 304 and stored:
+        METRICS.count(not_modified=1, bytes_saved=stored["size"])
+        store.touch(url, response.headers)
+        body, body_hash, unchanged = zlib.decompress(stored["body"]), stored["body_hash"], True
+    elif response.status_code == 200:
+        body      = response.content
+        body_hash = hashlib.sha1(body).hexdigest()
+        if stored and stored["body_hash"] == body_hash:
+            METRICS.count(unchanged=1)
+            store.touch(url, response.headers)
+            unchanged = True
+        elif store:
+            store.put(url, response.headers, body, body_hash)
+    else:
+        return StoredResponse(url, response.status_code, response.text, headers=response.headers)
+
+    parsed = None
+    if unchanged and parse and stored["parsed_json"] is not None and stored["parser"] == parser_key(parse):
+        parsed = json.loads(stored["parsed_json"])
+        METRICS.count("parse", parse_skipped=1)
+    text = body.decode(response.encoding or "utf-8", errors="replace") if response.status_code == 304 else response.text
+    return StoredResponse(url, 200, text, body_hash, parsed, parse, store)
+
+def print_response_savings():
+    """One line on what the response store saved this run."""
+    conditional = METRICS.total("conditional")
+    if not conditional and not METRICS.total("unchanged"):
+        return
+    print(f"🗂️  Response store: {conditional} conditional requests, {METRICS.total('not_modified')} not modified, "
+          f"{METRICS.total('unchanged')} unchanged bodies · {METRICS.total('parse_skipped')} parses skipped · "
+          f"{METRICS.total('bytes_saved') / 1e6:.2f} MB not re-downloaded")
+
+# ─────────────────────────────────────────────────────────────────
+# TELEGRAM — sliding-window pacing, job cards coalesced into few messages
+# ─────────────────────────────────────────────────────────────────
+TELEGRAM_MAX_CHARS  = 4096   # Bot API limit per message
+TELEGRAM_PER_SECOND = 1      # per-chat limit
+TELEGRAM_PER_MINUTE = 20     # per-chat limit for groups and channels
+
+class RateWindow:
+    """
+    At most `limit` sends in any `period` seconds, tracked as a log of the
+    last `limit` send times. Unlike a token bucket, a burst can't be followed
+    by refills inside the same window, which is how Telegram counts.
+    """
+
+    def __init__(self, limit, period):
+        self.period = period
+        self.sent   = deque(maxlen=limit)
+
+    def wait(self, now):
+        """Seconds until another send fits in the window."""
+        if len(self.sent) < self.sent.maxlen:
+            return 0.0
+        return self.sent[0] + self.period - now
+
+    def record(self, now):
+        self.sent.append(now)
+
+class TelegramLimiter:
+    """Both per-chat limits at once; acquire() blocks until a send is allowed."""
+
+    def __init__(self, per_second=TELEGRAM_PER_SECOND, per_minute=TELEGRAM_PER_MINUTE):
+        self.windows = [
+            RateWindow(per_second, 1.0),
+            RateWindow(per_minute, 60.0),
+        ]
+        self.blocked = 0.0   # monotonic time before which nothing is sent
+        self.lock    = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now  = time.monotonic()
+                wait = max([self.blocked - now] + [window.wait(now) for window in self.windows])
+                if wait <= 0:
+                    # Logged in every window only once all of them allow it
+                    for window in self.windows:
+                        window.record(now)
+                    return
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Nothing is sent for the next `seconds` (server-side 429)."""
+        with self.lock:
+            self.blocked = max(self.blocked, time.monotonic() + seconds)
+
+TELEGRAM_LIMITER = TelegramLimiter()
+
+def post_telegram_message(message, max_retries=3, limiter=None):
+    """
+    Send message to Telegram with retry logic for rate limiting. Returns the
+    last HTTP status code, or None when Telegram could not be reached.
+    """
+    limiter = limiter or TELEGRAM_LIMITER
     payload = {
         "chat_id": CHAT_ID,
         "text": message,
         "parse_mode": "HTML"
     }
     
-    for attempt in range(max_retries):
-        try:
-            response = requests.post(TELEGRAM_URL, json=payload, timeout=10)
+    status  = None
+    with METRICS.stage("telegram"):
+        for attempt in range(max_retries):
+            try:
+                limiter.acquire()
+                response = HTTP.post(TELEGRAM_URL, json=payload, timeout=10)
             
-            if response.status_code == 200:
-                return True
-            elif response.status_code == 429:
-                # Rate limit hit - extract retry_after time
-                try:
-                    error_data = response.json()
-                    retry_after = error_data.get('parameters', {}).get('retry_after', 30)
-                except:
-                    retry_after = 30
+                if response.status_code == 200:
+                    return 200
+                elif response.status_code == 429:
+                    # Rate limit hit - extract retry_after time
+                    try:
+                        error_data = response.json()
+                        retry_after = error_data.get('parameters', {}).get('retry_after', 30)
+                    except:
+                        retry_after = 30
                 
-                logging.warning(f"Rate limit hit. Waiting {retry_after} seconds...")
-                time.sleep(retry_after + 1)  # Add 1 second buffer
-                continue
-            else:
-                logging.error(f"Failed to send message: {response.text}")
-                return False
+                    logging.warning(f"Rate limit hit. Waiting {retry_after} seconds...")
+                    limiter.pause(retry_after + 1)  # Add 1 second buffer
+                    METRICS.count(retries=1)
+                    status = 429
+                    continue
+                else:
+                    logging.error(f"Failed to send message: {response.text}")
+                    METRICS.count(errors=1)
+                    return response.status_code
                 
-        except Exception as e:
-            logging.error(f"Error sending to Telegram (attempt {attempt + 1}): {e}")
-            if attempt < max_retries - 1:
-                time.sleep(5)
-    
-    return False
+            except Exception as e:
+                logging.error(f"Error sending to Telegram (attempt {attempt + 1}): {e}")
+                status = None
+                if attempt < max_retries - 1:
+                    time.sleep(5)
+
+        METRICS.count(errors=1)
+        return status
 
-def end_msg_jobs_telegram(new_job_count):
+def send_telegram_message(message, max_retries=3, limiter=None):
+    return post_telegram_message(message, max_retries, limiter) == 200
+
+def end_msg_jobs_telegram(new_job_count, summary=None):
     now = datetime.now(cst).strftime("%B %d, %Y -- %I:%M %p CST")
+    stats_line = f"\n                ║ {summary}" if summary else ""
     if new_job_count >0:
         message = f"""
                 ╔═════════════════════════════════════════════╗
@@ -207,7 +2159,7 @@ def end_msg_jobs_telegram(new_job_count):
                 ╠═════════════════════════════════════════════╣
                 ║ ⏰ {now}                                    ║
                 ║ 🆕 New Jobs: {str(new_job_count)}           ║
-                ║ 📊 Status: SUCCESS                          ║
+                ║ 📊 Status: SUCCESS                          ║{stats_line}
                 ╚═════════════════════════════════════════════╝
         """
     else:
@@ -216,7 +2168,7 @@ def end_msg_jobs_telegram(new_job_count):
                 ║   DICE SCRAPER COMPLETED ✅                ║
                 ╠═════════════════════════════════════════════╣
                 ║ ⏰ {now}                                   ║
-                ║ 🆕 No new jobs found.                      ║
+                ║ 🆕 No new jobs found.                      ║{stats_line}
                 ╚═════════════════════════════════════════════╝
         """
     
@@ -226,34 +2178,133 @@ def end_msg_jobs_telegram(new_job_count):
         logging.error("Failed to send completion message after retries")
 
 
-def send_jobs_to_telegram(df):
-    for idx, row in df.iterrows():
-        sent_status = row['Email_Sent']
-        status_icon = "✅" if sent_status == "Y" else "❌" if sent_status == "N" else "⏳"
-        message = (
-            f"<b>{row['Title']}</b>\n"
-            f"🏢 {row['Company'] or 'Unknown Company'}\n"
-            f"📍 {row['Location'] or 'Location not listed'}\n"
-            f"📝 Employment: {row['Employment_Type'] or 'N/A'}\n"
-            f"💰 Salary: {row['Salary'] or 'N/A'}\n"
-            f"📊 ATS Score: {row['ATS_Score'] or 'N/A'}\n"
-            f"🏷️ Badges: {row['Badges'] or 'N/A'}\n"
-            f"📧 Email: {row['Email'] or 'N/A'}\n"
-            f"{status_icon} Email Sent: {row['Email_Sent'] or 'N/A'}\n"
-            f"⚠️ Remarks: {row['Email_Not_Sent_Reason'] or 'N/A'}\n"
-            f'🔗 <a href="{row["URL"]}">Apply Now</a>'
-        )
-        
-        if send_telegram_message(message):
-            logging.info(f"Sent job {idx + 1}/{len(df)} to Telegram: {row['Title']}")
+TELEGRAM_FIELD_CHARS = 300   # longest scraped field shown on a card before it is clipped
+
+def format_job_card(job, max_chars=TELEGRAM_MAX_CHARS):
+    """
+    Telegram card for a JobRecord; scraped text is escaped for parse_mode=HTML.
+    Long fields are clipped before escaping, never the finished markup, so a
+    card always fits in max_chars without a cut tag or entity.
+    """
+    limit = TELEGRAM_FIELD_CHARS
+    while True:
+        card = _job_card_markup(job, limit)
+        if len(card) <= max_chars or limit <= 1:
+            return card
+        limit //= 2
+
+def _job_card_markup(job, limit):
+    def clip(key, value):
+        text = str(value)
+        if key != "URL" and len(text) > limit:
+            text = text[:limit - 1] + "…"
+        return html.escape(text)
+
+    row = {key: clip(key, value) if value else value
+           for key, value in {**job.to_row(), "Resume": job.resume}.items()}
+    sent_status = row['Email_Sent']
+    status_icon = "✅" if sent_status == "Y" else "❌" if sent_status == "N" else "⏳"
+    resume_line = f"📄 Resume: {row['Resume']}\n" if row.get('Resume') else ""
+    return (
+        f"<b>{row['Title']}</b>\n"
+        f"🏢 {row['Company'] or 'Unknown Company'}\n"
+        f"📍 {row['Location'] or 'Location not listed'}\n"
+        f"📝 Employment: {row['Employment_Type'] or 'N/A'}\n"
+        f"💰 Salary: {row['Salary'] or 'N/A'}\n"
+        f"📊 ATS Score: {row['ATS_Score'] or 'N/A'}\n"
+        f"{resume_line}"
+        f"🏷️ Badges: {row['Badges'] or 'N/A'}\n"
+        f"📧 Email: {row['Email'] or 'N/A'}\n"
+        f"{status_icon} Email Sent: {row['Email_Sent'] or 'N/A'}\n"
+        f"⚠️ Remarks: {row['Email_Not_Sent_Reason'] or 'N/A'}\n"
+        f'🔗 <a href="{row["URL"]}">Apply Now</a>'
+    )
+
+CARD_SEPARATOR = "\n\n➖➖➖➖➖\n\n"
+
+class TelegramNotifier:
+    """
+    Background sender: submit() job cards while the pipeline keeps running;
+    whatever has queued up by the time a send slot opens goes out as one
+    packed message. close() flushes the queue and waits for the last send.
+    on_sent(keys) is called with the submit() keys of every delivered message.
+    """
+
+    _DONE = object()
+
+    def __init__(self, limiter=None, linger=0.5, on_sent=None):
+        self.limiter = limiter or TELEGRAM_LIMITER
+        self.linger  = linger        # seconds to wait for more cards before sending
+        self.on_sent = on_sent
+        self.queue   = queue.Queue()
+        self.sent_cards    = 0
+        self.failed_cards  = 0
+        self.messages_sent = 0
+        self.thread  = threading.Thread(target=self._run, name="telegram-notifier", daemon=True)
+        self.thread.start()
+
+    def submit(self, card, key=None):
+        self.queue.put((card, key))
+
+    def _run(self):
+        carry = None
+        while True:
+            item, carry = (carry if carry is not None else self.queue.get()), None
+            if item is self._DONE:
+                break
+            # Cards come from format_job_card(), which keeps each under TELEGRAM_MAX_CHARS
+            cards, keys = [item[0]], [item[1]]
+            length = len(cards[0])
+            deadline = time.monotonic() + self.linger
+            # Coalesce: keep packing cards until the next one would not fit
+            # or the queue stays quiet for `linger` seconds
+            while True:
+                try:
+                    item = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is self._DONE or length + len(CARD_SEPARATOR) + len(item[0]) > TELEGRAM_MAX_CHARS:
+                    carry = item
+                    break
+                cards.append(item[0])
+                keys.append(item[1])
+                length += len(CARD_SEPARATOR) + len(item[0])
+            self._send_one(cards, keys)
+
+    def _send_one(self, cards, keys):
+        card_count = len(keys)
+        status = post_telegram_message(CARD_SEPARATOR.join(cards), limiter=self.limiter)
+        if status == 200:
+            self.sent_cards    += card_count
+            self.messages_sent += 1
+            logging.info(f"Sent {card_count} job(s) to Telegram in one message")
+            if self.on_sent:
+                self.on_sent([key for key in keys if key is not None])
+        elif card_count > 1 and status is not None and 400 <= status < 500 and status != 429:
+            # Telegram rejected the packed message (e.g. markup it can't parse in
+            # one card): send the cards one by one so only that card is lost
+            logging.warning(f"Telegram rejected a {card_count}-card message ({status}); sending cards one by one")
+            for card, key in zip(cards, keys):
+                self._send_one([card], [key])
         else:
-            logging.error(f"Failed to send job: {row['Title']}")
-        
-        # Wait between messages to respect rate limits
-        time.sleep(1)
+            self.failed_cards += card_count
+            logging.error(f"Failed to send {card_count} job(s) to Telegram")
+
+    def close(self):
+        self.queue.put(self._DONE)
+        self.thread.join()
+        if self.sent_cards or self.failed_cards:
+            print(f"📤 Telegram: {self.sent_cards} jobs in {self.messages_sent} messages"
+                  + (f", {self.failed_cards} failed" if self.failed_cards else ""))
+
+def send_jobs_to_telegram(df):
+    notifier = TelegramNotifier()
+    for row in df.astype(object).where(df.notna(), None).to_dict("records"):
+        notifier.submit(format_job_card(JobRecord.from_row(row)))
+    notifier.close()
 
 def process_dice_description(html_text):
-    soup = BeautifulSoup(html_text, "html.parser")
+    soup = make_soup(html_text)
 
     job_data = {
         "Title": None,
@@ -264,7 +2315,8 @@ def process_dice_description(html_text):
         "Employment_Type": None,
         "Badges": [],
         "Sections": {},
-        "Full_Text": None
+        "Full_Text": None,
+        "Mailto": mailto_addresses(soup),
     }
 
     # 1. Header Extraction (Same as before)
@@ -286,9 +2338,17 @@ def process_dice_description(html_text):
     if not container:
         container = soup.find("body") or soup
 
+    strings, spans, tags = _index_text(container)
+
+    def text_of(tag, separator=" "):
+        start, end = spans[id(tag)]
+        return separator.join(strings[start:end])
+
     # 3. Process Metadata (Enhanced for Duration)
-    for p in container.find_all(["p", "div", "li"]):
-        full_line = p.get_text(" ", strip=True)
+    for p in tags:
+        if p.name not in ("p", "div", "li"):
+            continue
+        full_line = text_of(p)
         if not full_line: continue
 
         # Lowercase version for easier searching
@@ -316,37 +2376,231 @@ def process_dice_description(html_text):
             job_data["Employment_Type"] = re.sub(r"employment type:\s*", "", full_line, flags=re.I).strip()
 
     # 4. Extract Sections (Bullet points)
-    # We look for the bold headers that usually precede lists
-    for strong in container.find_all("strong"):
-        section_title = strong.get_text(strip=True)
+    # We look for the bold headers that usually precede lists. Each <strong>
+    # is paired with the first <ul> after it, found in the same walk.
+    waiting, pairs = [], []
+    for tag in tags:
+        if tag.name == "strong":
+            waiting.append(tag)
+        elif tag.name == "ul" and waiting:
+            pairs.extend((strong, tag) for strong in waiting)
+            waiting = []
+    if waiting:
+        # Rare: no list left inside the container, so look past its end like find_next did
+        last = tags[-1] if tags else container
+        ul = last.find_next("ul")
+        pairs.extend((strong, ul) for strong in waiting)
+
+    for strong, ul in pairs:
+        section_title = text_of(strong, "")
         # Skip standard metadata labels
         if section_title.lower().rstrip(':') in ['position', 'location', 'duration', 'experience', 'main skills']:
             continue
             
-        ul = strong.find_next("ul")
         if ul:
-            items = [li.get_text(" ", strip=True) for li in ul.find_all("li")]
+            if id(ul) in spans:
+                items = [text_of(li) for li in ul.find_all("li")]
+            else:
+                items = [li.get_text(" ", strip=True) for li in ul.find_all("li")]
             if items:
                 job_data["Sections"][section_title] = items
 
-    job_data["Full_Text"] = container.get_text(" ", strip=True)
+    job_data["Full_Text"] = " ".join(strings)
     return job_data
 
-# def fetch_job_details(job_url):
-#     response = requests.get(job_url, timeout=10)
-#     if response.status_code == 200:
-#         return process_dice_description(response.text)
-#     return None
-def fetch_job_details(job_url):
+def _index_text(root):
+    """
+    One preorder walk over root. Returns (strings, spans, tags):
+    strings — stripped, non-empty text nodes in document order, minus the
+              text of <noscript> (parsed as markup, but never shown, like
+              the <script>/<style> text get_text() already skips);
+    spans   — id(tag) -> (start, end) slice of strings covered by that tag;
+    tags    — every descendant tag in document order.
+    " ".join(strings[start:end]) equals tag.get_text(" ", strip=True) outside <noscript>.
+    """
+    strings, spans, tags = [], {}, []
+    stack = [root]
+    spans[id(root)] = [0, 0]
+    hidden = 0   # open <noscript> tags on the stack
+    for node in root.descendants:
+        while stack[-1] is not node.parent:
+            closed = stack.pop()
+            spans[id(closed)][1] = len(strings)
+            hidden -= closed.name == "noscript"
+        if isinstance(node, Tag):
+            stack.append(node)
+            spans[id(node)] = [len(strings), 0]
+            tags.append(node)
+            hidden += node.name == "noscript"
+        elif not hidden and type(node) in TEXT_STRING_TYPES:
+            text = node.strip()
+            if text:
+                strings.append(text)
+    while stack:
+        spans[id(stack.pop())][1] = len(strings)
+    return strings, spans, tags
+
+# ─────────────────────────────────────────────────────────────────
+# JOB DETAIL STAGE — one GET per job page, shared by JD + email parsing
+# ─────────────────────────────────────────────────────────────────
+# Number of network fetches per job URL in this run — only retries push this above 1
+DETAIL_FETCH_COUNTS = Counter()
+_fetch_counts_lock  = threading.Lock()
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+def fetch_job_detail(job_url, parse=None):
+    """
+    Downloads a job page once and returns everything we need from it:
+    {"URL": ..., "JD_data": parse() dict or None, "Emails": set,
+     "Error": set when the fetch failed in a retryable way (network error, 429, 5xx),
+     "Retry_After": the server's requested wait in seconds (capped), if it sent one}
+    Nothing is retried here; DetailFetcher decides whether to try again.
+    """
     job_url = urljoin("https://www.dice.com", str(job_url))
-    response = requests.get(job_url, timeout=10)
+    result = {"URL": job_url, "JD_data": None, "Emails": set(), "Error": None, "Retry_After": None}
+
+    parse = parse or process_dice_description
+    with _fetch_counts_lock:
+        DETAIL_FETCH_COUNTS[job_url] += 1
+    with METRICS.stage("detail_fetch"):
+        try:
+            response = fetch_stored(job_url, parse=parse, session=DETAIL_HTTP)
+        except Exception as e:
+            print(f"⚠️  Job page fetch failed for {job_url}: {e}")
+            METRICS.count(errors=1)
+            result["Error"] = str(e)
+            return result
+    if response.status_code in RETRYABLE_STATUSES:
+        METRICS.count("detail_fetch", errors=1)
+        result["Error"] = f"HTTP {response.status_code}"
+        result["Retry_After"] = retry_after_seconds(response.headers)
+        return result
+    if response.parsed is not None:
+        # 304 or an identical body — the stored parse (JD + emails) still holds
+        result["JD_data"] = response.parsed["JD_data"]
+        result["Emails"]  = set(response.parsed["Emails"])
+        return result
+
+    with METRICS.stage("parse"):
+        if response.status_code == 200:
+            result["JD_data"] = parse(response.text)
+        JD_data = result["JD_data"]
+        if JD_data and JD_data.get("Full_Text") is not None:
+            # Reuse the page parse: scan only the JD text and its mailto: links
+            result["Emails"] = extract_emails(JD_data["Full_Text"], JD_data.get("Mailto", ()))
+        else:
+            result["Emails"] = extract_emails_from_html(response.text)
     if response.status_code == 200:
-        return process_dice_description(response.text)
-    return None
+        response.parsed = {"JD_data": result["JD_data"], "Emails": sorted(result["Emails"])}
+        response.save_parse()
+    return result
+
+def fetch_job_details(job_url):
+    return fetch_job_detail(job_url)["JD_data"]
+
+class HostRateLimiter:
+    """Hands out evenly spaced request slots per host, shared across worker threads."""
+
+    def __init__(self, rate_per_sec):
+        self.interval  = 1.0 / rate_per_sec if rate_per_sec > 0 else 0.0
+        self.next_slot = {}
+        self.lock      = threading.Lock()
+
+    def wait(self, url):
+        if not self.interval:
+            return
+        host = urlparse(url).netloc
+        with self.lock:
+            now  = time.monotonic()
+            slot = max(now, self.next_slot.get(host, now))
+            self.next_slot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+class RetryBudget:
+    """A run-wide allowance of retries, so a flaky host can't stall the whole run."""
+
+    def __init__(self, total):
+        self.remaining = total
+        self.lock      = threading.Lock()
+
+    def take(self):
+        with self.lock:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            return True
+
+class DetailFetcher:
+    """
+    fetch_job_detail() with the enrichment policy around it: cache lookup,
+    per-host pacing and retries drawn from a shared budget — the only retry
+    layer for job pages (DETAIL_HTTP does none of its own). Thread-safe, so
+    one instance can serve a whole worker pool. `source` is the adapter that
+    knows the board's base URL and job page layout.
+    """
+
+    def __init__(self, host_rps=DETAIL_HOST_RPS, retry_budget=DETAIL_RETRY_BUDGET,
+                 fetch=fetch_job_detail, cache=None):
+        self.limiter = HostRateLimiter(host_rps)
+        self.budget  = RetryBudget(retry_budget)
+        self.fetch   = fetch
+        self.cache   = cache
+
+    def __call__(self, url, source=DiceSource):
+        full_url = source.job_url(url)
+        if self.cache:
+            cached = self.cache.get_page(full_url)
+            if cached:
+                METRICS.count("detail_fetch", cache_hits=1)
+                return cached
+        for attempt in range(DETAIL_MAX_ATTEMPTS):
+            self.limiter.wait(full_url)
+            result = self.fetch(full_url, source.parse_detail)
+            if not result.get("Error"):
+                if self.cache and result["JD_data"]:
+                    self.cache.put_page(result)
+                return result
+            if attempt == DETAIL_MAX_ATTEMPTS - 1 or not self.budget.take():
+                break
+            METRICS.count("detail_fetch", retries=1)
+            time.sleep(max(0.5 * 2 ** attempt, result.get("Retry_After") or 0))
+        logging.warning(f"Giving up on {full_url}: {result['Error']}")
+        return result
+
+def enrich_jobs(job_urls, workers=DETAIL_WORKERS, host_rps=DETAIL_HOST_RPS,
+                retry_budget=DETAIL_RETRY_BUDGET, fetch=fetch_job_detail, cache=None):
+    """
+    Fetches and parses job pages concurrently with a bounded worker pool.
+    Returns one fetch_job_detail() result per input URL, in the same order.
+    Pages found in cache (a DetailCache) are returned without a network fetch.
+    """
+    job_urls = list(job_urls)
+    fetcher  = DetailFetcher(host_rps, retry_budget, fetch, cache)
+
+    if not job_urls:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(job_urls)))) as pool:
+        # map() yields results in submission order regardless of completion order
+        return list(pool.map(fetcher, job_urls))
+
+def format_emails(emails):
+    """Comma-separated string of unique emails, or 'N/A' if none found."""
+    return ", ".join(sorted(emails)) if emails else "N/A"
+
+def check_single_fetch():
+    """Warns about any job URL that was downloaded more than once this run."""
+    repeated = {url: n for url, n in DETAIL_FETCH_COUNTS.items() if n > 1}
+    for url, n in repeated.items():
+        logging.warning(f"Job page fetched {n} times: {url}")
+    print(f"🌐 Job page fetches: {sum(DETAIL_FETCH_COUNTS.values())} for {len(DETAIL_FETCH_COUNTS)} URLs")
+    return not repeated
 
 def read_word_resume(file_path):
     """Safely extracts and cleans text from a .docx file."""
     try:
+        import docx
         doc = docx.Document(file_path)
         # Filter out empty lines to keep the 'signal' high
         text = [p.text.strip() for p in doc.paragraphs if p.text.strip()]
@@ -355,6 +2609,79 @@ def read_word_resume(file_path):
         print(f"❌ Error reading file: {e}")
         return None
 
+def file_hash(path):
+    """sha1 of a file's bytes."""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _ats_analyzer():
+    """Tokenizer + stop words + 1-2 grams of the ATS TF-IDF, shared by resumes and JDs."""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    return TfidfVectorizer(stop_words='english', ngram_range=(1, 2)).build_analyzer()
+
+class ResumeProfile:
+    """
+    A resume compiled for ATS scoring: cleaned text, keyword token set and
+    TF-IDF n-gram counts, so scoring never re-parses the .docx or re-tokenizes
+    the resume. Like the JD keywords, tokens and n-grams include the canonical
+    name of every taxonomy skill the resume mentions ("K8s" -> "kubernetes").
+    Cached in the DetailCache by the .docx content hash.
+    """
+
+    def __init__(self, text, path=None, file_hash=None, tokens=None, ngrams=None):
+        self.path      = path
+        self.name      = os.path.basename(path) if path else "resume"
+        self.file_hash = file_hash
+        self.text      = text or ""
+        self.clean     = clean_ats_text(self.text)
+        self.text_hash = text_hash(f"v{ATS_SCORE_VERSION}:{self.text}")   # key of the score cache
+        if tokens is None or ngrams is None:
+            skills = clean_ats_text(" ".join(skill_matcher().skills(self.text)))
+            tokens = set(self.clean.split()) | set(skills.split())
+            ngrams = dict(Counter(_ats_analyzer()(self.clean)) + Counter(_ats_analyzer()(skills)))
+        self.tokens    = set(tokens)
+        self.ngrams    = ngrams
+
+    @classmethod
+    def from_docx(cls, path, cache=None):
+        """Profile of a .docx, rebuilt only when the file's content changed. None if unreadable."""
+        try:
+            digest = file_hash(path)
+        except OSError as e:
+            print(f"❌ Error reading file: {e}")
+            return None
+        profile = cache.get_profile(digest) if cache else None
+        if profile:
+            profile.path = path
+            return profile
+        text = read_word_resume(path)
+        if text is None:
+            return None
+        profile = cls(text, path=path, file_hash=digest)
+        if cache:
+            cache.put_profile(profile)
+        return profile
+
+    def to_dict(self):
+        return {"path": self.path, "file_hash": self.file_hash, "text": self.text,
+                "tokens": sorted(self.tokens), "ngrams": self.ngrams, "version": ATS_SCORE_VERSION}
+
+    @classmethod
+    def from_dict(cls, data):
+        """The cached profile, or None if it was compiled for another ATS_SCORE_VERSION."""
+        if data.get("version") != ATS_SCORE_VERSION:
+            return None
+        return cls(data["text"], path=data.get("path"), file_hash=data.get("file_hash"),
+                   tokens=data["tokens"], ngrams=data["ngrams"])
+
+def load_resume_profiles(paths=None, cache=None):
+    """ResumeProfiles for every readable resume in `paths` (default RESUME_PATHS)."""
+    profiles = [ResumeProfile.from_docx(path, cache) for path in (paths or RESUME_PATHS)]
+    return [profile for profile in profiles if profile]
+
 def extract_jd_keywords(jd_dict):
     """
     Specifically extracts high-value keywords from the JD dictionary.
@@ -369,123 +2696,371 @@ def extract_jd_keywords(jd_dict):
     
     keywords.extend(must_have)
     keywords.extend(nice_have)
+
+    # 2. Every taxonomy skill the JD mentions, under its canonical name, so
+    #    "k8s" in the JD and "Kubernetes" in the resume count as a match
+    keywords.extend(skill_matcher().skills(jd_dict.get('Full_Text')))
     
-    # 2. Grab the title
+    # 3. Grab the title
     if jd_dict.get('Title'):
         keywords.append(jd_dict['Title'])
         
-    # 3. If keywords are still empty, fallback to the full text
+    # 4. If keywords are still empty, fallback to the full text
     if not keywords:
         return jd_dict.get('Full_Text', "")
         
     return " ".join(keywords)
 
-def calculate_ats_score(resume_text, jd_keywords):
+def clean_ats_text(text):
+    """Lowercases and strips punctuation, the normalization both ATS halves use."""
+    return re.sub(r'[^\w\s]', ' ', text or "").lower()
+
+def calculate_ats_scores(resume_text, jd_keyword_texts):
     """
-    Combines Keyword Presence (Boolean) with Contextual Similarity (TF-IDF).
-    This creates a much more realistic 'Simplify-style' score.
+    Batch version of calculate_ats_score for a single resume text.
+    Returns one score (0-100, 2 decimals) per JD text.
     """
-    # Clean and lowercase everything
-    res_clean = re.sub(r'[^\w\s]', ' ', resume_text).lower()
-    jd_clean = re.sub(r'[^\w\s]', ' ', jd_keywords).lower()
-    
+    return [row[0] for row in ats_score_matrix([ResumeProfile(resume_text)], jd_keyword_texts)]
+
+def ats_score_matrix(profiles, jd_keyword_texts):
+    """
+    Scores every JD text against every ResumeProfile in one vectorized pass.
+    Each (resume, JD) pair is scored exactly as a TF-IDF fitted on just that
+    resume and that JD would score it, so a job's score never depends on
+    which other jobs share its batch. Returns a (len(texts), len(profiles))
+    list of scores (0-100, 2 decimals).
+    """
+    import numpy as np
+    from scipy import sparse
+
+    jd_cleans = [clean_ats_text(text) for text in jd_keyword_texts]
+    if not jd_cleans or not profiles:
+        return [[] for _ in jd_cleans]
+
+    def count_matrix(rows):
+        """Sparse document x term matrix from a list of {term: count} dicts."""
+        vocabulary = {}
+        data, cols, indptr = [], [], [0]
+        for counts in rows:
+            for term, count in counts.items():
+                cols.append(vocabulary.setdefault(term, len(vocabulary)))
+                data.append(count)
+            indptr.append(len(cols))
+        return sparse.csr_matrix((data, cols, indptr), shape=(len(rows), len(vocabulary)), dtype=np.float64)
+
     # --- 1. KEYWORD MATCHING (Smarter than pure math) ---
-    jd_words = set(jd_clean.split())
-    res_words = set(res_clean.split())
-    
-    found_keywords = jd_words.intersection(res_words)
-    keyword_score = (len(found_keywords) / len(jd_words)) if jd_words else 0
-    
-    # --- 2. CONTEXTUAL MATCHING (TF-IDF) ---
-    vectorizer = TfidfVectorizer(stop_words='english', ngram_range=(1, 2))
-    try:
-        tfidf = vectorizer.fit_transform([res_clean, jd_clean])
-        context_score = cosine_similarity(tfidf[0:1], tfidf[1:2])[0][0]
-    except:
-        context_score = 0
+    # share of each JD's distinct words that the resume also has
+    words   = count_matrix([dict.fromkeys(profile.tokens, 1) for profile in profiles]
+                           + [dict.fromkeys(jd.split(), 1) for jd in jd_cleans])
+    res_b   = words[:len(profiles)]
+    jd_b    = words[len(profiles):]
+    overlap = (jd_b @ res_b.T).toarray()
+    jd_size = np.asarray(jd_b.sum(axis=1)).reshape(-1, 1)
+    keyword_scores = np.divide(overlap, jd_size, out=np.zeros_like(overlap), where=jd_size > 0)
+
+    # --- 2. CONTEXTUAL MATCHING (TF-IDF over the pair) ---
+    # With two documents and smooth IDF, an n-gram in both gets weight 1 and
+    # one in a single document 1 + ln(3/2). Shared n-grams are the only ones
+    # in the dot product; each norm is its all-unique value minus a per-pair
+    # correction for the n-grams it shares with the other document.
+    analyzer = _ats_analyzer()
+    counts   = count_matrix([profile.ngrams for profile in profiles]
+                            + [Counter(analyzer(jd)) for jd in jd_cleans])
+    res_c, jd_c = counts[:len(profiles)], counts[len(profiles):]
+    res_p, jd_p = (res_c > 0).astype(np.float64), (jd_c > 0).astype(np.float64)
+    res_sq, jd_sq = res_c.multiply(res_c), jd_c.multiply(jd_c)
+    unique  = (1 + np.log(1.5)) ** 2 - 1
+    dot     = (jd_c @ res_c.T).toarray()
+    res_norm = (np.asarray(res_sq.sum(axis=1)).reshape(1, -1) * (1 + unique)
+                - unique * (jd_p @ res_sq.T).toarray())
+    jd_norm  = (np.asarray(jd_sq.sum(axis=1)).reshape(-1, 1) * (1 + unique)
+                - unique * (jd_sq @ res_p.T).toarray())
+    denom = np.sqrt(res_norm * jd_norm)
+    # An empty side (e.g. only stop words) has no similarity
+    context_scores = np.divide(dot, denom, out=np.zeros_like(dot), where=denom > 0)
 
     # Weighted Average: 70% Keyword Presence, 30% Context/Frequency
-    final_score = (keyword_score * 0.7) + (context_score * 0.3)
-    return round(final_score * 100, 2)
+    final_scores = (keyword_scores * 0.7) + (context_scores * 0.3)
+    return [[round(float(score) * 100, 2) for score in row] for row in final_scores]
 
+def calculate_ats_score(resume_text, jd_keywords):
+    """
+    Combines Keyword Presence (Boolean) with Contextual Similarity (TF-IDF).
+    This creates a much more realistic 'Simplify-style' score.
+    """
+    return calculate_ats_scores(resume_text, [jd_keywords])[0]
 
-def ATS_cal(resume_content,JD_data):
+def score_jobs(resume_content, jd_list, cache=None):
+    """
+    ATS scores for every JD dict of a run in one batch; missing JDs score 0.
+    With a DetailCache, JDs whose scoring text was already scored against this
+    resume reuse the stored score and only the rest go through the vectorizer.
+    """
     if not resume_content:
         print("Could not process the resume. Please check the file path.")
-    jd_keywords = extract_jd_keywords(JD_data)
-    match_score = calculate_ats_score(resume_content, jd_keywords)
-    return f"{match_score}%"
-
+    profile = resume_content if isinstance(resume_content, ResumeProfile) else ResumeProfile(resume_content)
+    return [row[0] for row in score_jobs_multi([profile], jd_list, cache)]
 
-def extract_email_from_page(url: str) -> str:
-    url = urljoin("https://www.dice.com", str(url))
+def score_jobs_multi(profiles, jd_list, cache=None):
     """
-    Fetches the raw HTML of a job page and extracts any email addresses.
-    Returns a comma-separated string of unique emails, or 'N/D' if none found.
-    """
-    HEADERS = {
-        "User-Agent": (
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/124.0.0.0 Safari/537.36"
-        ),
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-        "Accept-Language": "en-US,en;q=0.5",
-    }
-    EMAIL_REGEX = r"[a-zA-Z0-9._%+\-]+@[a-zA-Z0-9.\-]+\.[a-zA-Z]{2,}"
-    
-    # Domains/patterns that are almost always false positives
-    EXCLUDED_PATTERNS = {
-        "sentry", "example", "domain", "email", "user", "test",
-        "noreply", "no-reply", "placeholder"
-    }
-    EXCLUDED_EXTENSIONS = {"png", "jpg", "jpeg", "gif", "svg", "webp", "woff", "woff2", "css", "js"}
+    score_jobs() against several ResumeProfiles at once: one row of scores
+    (one per profile) for each JD dict. Only the (JD, resume) pairs missing
+    from the cache are computed, all in one ats_score_matrix() pass.
+    """
+    texts  = [extract_jd_keywords(jd) if jd else "" for jd in jd_list]
+    hashes = [text_hash(text) for text in texts]
+    rows   = [[0.0] * len(profiles) for _ in jd_list]
+
+    known = [cache.get_scores([h for h, jd in zip(hashes, jd_list) if jd], profile.text_hash) if cache else {}
+             for profile in profiles]
+    todo  = {}   # content hash -> text, for JDs missing a score for any resume
+    for h, text, jd in zip(hashes, texts, jd_list):
+        if jd and any(h not in found for found in known):
+            todo[h] = text
+    if cache:
+        scored = sum(1 for h, jd in zip(hashes, jd_list) if jd)
+        count_cache(score_hit=scored - sum(1 for h, jd in zip(hashes, jd_list) if jd and h in todo),
+                    score_miss=len(todo))
+
+    fresh = dict(zip(todo, ats_score_matrix(profiles, list(todo.values()))))
+    for r, profile in enumerate(profiles):
+        new = {h: scores[r] for h, scores in fresh.items() if h not in known[r]}
+        if cache and new:
+            cache.put_scores(new, profile.text_hash)
+        known[r].update(new)
+    for i, (h, jd) in enumerate(zip(hashes, jd_list)):
+        if jd:
+            rows[i] = [known[r][h] for r in range(len(profiles))]
+    return rows
 
-    try:
-        response = requests.get(url, headers=HEADERS, timeout=10)
-        raw_html = response.text
+def ATS_cal(resume_content,JD_data):
+    return f"{score_jobs(resume_content, [JD_data])[0]}%"
 
-        raw_emails = re.findall(EMAIL_REGEX, raw_html)
 
-        filtered = set()
-        for email in raw_emails:
-            ext = email.split(".")[-1].lower()
-            lower = email.lower()
-            if ext in EXCLUDED_EXTENSIONS:
-                continue
-            if any(pat in lower for pat in EXCLUDED_PATTERNS):
-                continue
-            filtered.add(email)
+# ─────────────────────────────────────────────────────────────────
+# EMAIL EXTRACTION — precompiled, visible text + mailto: links only
+# ─────────────────────────────────────────────────────────────────
+EMAIL_REGEX   = r"[a-zA-Z0-9._%+\-]+@[a-zA-Z0-9.\-]+\.[a-zA-Z]{2,}"
+EMAIL_PATTERN = re.compile(r"(?<![\w.%+-])[A-Za-z0-9._%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}\b")
+
+# "name [at] domain [dot] com", "name(at)domain(dot)com", "name at domain dot com"
+_OBFUSCATED_AT  = r"\s*[\[({<]\s*at\s*[\])}>]\s*|\s+at\s+"
+_OBFUSCATED_DOT = r"\s*[\[({<]\s*dot\s*[\])}>]\s*|\s+dot\s+"
+OBFUSCATED_EMAIL_PATTERN = re.compile(
+    rf"(?<![\w.%+-])([A-Za-z0-9._%+-]+)({_OBFUSCATED_AT})"
+    rf"((?:[A-Za-z0-9-]+(?:{_OBFUSCATED_DOT}|\.))+[A-Za-z]{{2,}})\b",
+    re.I,
+)
+OBFUSCATED_DOT_PATTERN = re.compile(_OBFUSCATED_DOT, re.I)
+
+# Domains/patterns that are almost always false positives
+EXCLUDED_PATTERNS = {
+    "sentry", "example", "domain", "email", "user", "test",
+    "noreply", "no-reply", "placeholder"
+}
+EXCLUDED_EXTENSIONS = {"png", "jpg", "jpeg", "gif", "svg", "webp", "woff", "woff2", "css", "js"}
+
+# Placeholder words are checked per part of the address, not anywhere in it,
+# so a real address that merely contains one survives ("hr.test@acme.com",
+# "bob@sub.domain.com"). The tradeoff: an address whose whole local part is a
+# placeholder ("test@acme.com", "user2@acme.com") or whose domain is exactly
+# <placeholder>.<tld> ("jane@domain.com") is dropped even if it is real.
+EXCLUDED_DOMAIN_PATTERN = re.compile(
+    # Reserved example domains and error-tracker DSNs, at any level of the domain
+    r"(?<![a-z])(?:example|sentry)(?![a-z])"
+    r"|^(?:" + "|".join(sorted(map(re.escape, EXCLUDED_PATTERNS), key=len, reverse=True)) + r")\.[a-z]+$"
+    r"|\.(?:test|invalid|localhost)$"
+    r"|\.(?:" + "|".join(sorted(EXCLUDED_EXTENSIONS)) + r")$"
+)
+# No-reply senders, however the local part is decorated ("jobs-noreply@")
+NO_REPLY_PATTERN = re.compile(r"(?<![a-z])no-?reply(?![a-z])")
+
+# Tags whose text is never shown to a reader
+HIDDEN_TAGS = ("script", "style", "noscript", "template")
+
+def is_plausible_email(email):
+    local, _, domain = email.lower().rpartition("@")
+    if local.rstrip("0123456789") in EXCLUDED_PATTERNS or NO_REPLY_PATTERN.search(local):
+        return False
+    return not EXCLUDED_DOMAIN_PATTERN.search(domain)
 
-        return ", ".join(sorted(filtered)) if filtered else "N/A"
+def mailto_addresses(soup):
+    """Addresses in every <a href="mailto:..."> of a parsed page."""
+    addresses = []
+    for link in soup.find_all("a", href=re.compile(r"^\s*mailto:", re.I)):
+        target = unquote(link["href"].strip()[len("mailto:"):]).split("?", 1)[0]
+        addresses.extend(a.strip() for a in target.split(",") if a.strip())
+    return addresses
 
-    except Exception as e:
-        print(f"⚠️  Email extraction failed for {url}: {e}")
-        return "N/A"
+def extract_emails(text, mailto_links=()):
+    """
+    Plausible recruiter emails in visible page text plus mailto: addresses.
+    Decodes "[at]"/"(dot)"-style obfuscation; a bare "x at y.com" needs a
+    spelled-out "dot" too, so prose like "work at acme.com" is not an email.
+    """
+    text  = text or ""
+    found = EMAIL_PATTERN.findall(text)
+    for local, at, domain in OBFUSCATED_EMAIL_PATTERN.findall(text):
+        if at.strip().lower() == "at" and not OBFUSCATED_DOT_PATTERN.search(domain):
+            continue
+        found.append(f"{local}@{OBFUSCATED_DOT_PATTERN.sub('.', domain)}")
+    found.extend(a for a in mailto_links if EMAIL_PATTERN.fullmatch(a))
+
+    emails = {}
+    for email in found:
+        if is_plausible_email(email):
+            emails.setdefault(email.lower(), email)
+    return set(emails.values())
+
+def visible_text(soup):
+    """Text a reader would see: soup minus script/style blocks."""
+    for tag in soup.find_all(HIDDEN_TAGS):
+        tag.decompose()
+    return soup.get_text(" ", strip=True)
+
+def extract_emails_from_html(raw_html):
+    """Returns the set of plausible recruiter emails found in a page's visible text and mailto: links."""
+    soup = make_soup(raw_html or "")
+    mailtos = mailto_addresses(soup)
+    return extract_emails(visible_text(soup), mailtos)
+
+def extract_email_from_page(url: str) -> str:
+    """
+    Fetches the raw HTML of a job page and extracts any email addresses.
+    Returns a comma-separated string of unique emails, or 'N/A' if none found.
+    """
+    return format_emails(fetch_job_detail(url)["Emails"])
     
 # ─────────────────────────────────────────────────────────────────
 # GMAIL AUTH
 # ─────────────────────────────────────────────────────────────────
-def get_gmail_service():
+class GmailAuthError(RuntimeError):
+    """No usable Gmail token, and nobody at a terminal to run the consent flow."""
+
+def is_interactive():
+    """True when a person can finish the browser consent flow: a TTY and not CI."""
+    return sys.stdin.isatty() and not os.getenv("CI")
+
+def _token_cache_key(creds):
+    # Ties the cached access token to one client + refresh token, so a rotated secret invalidates it
+    return hashlib.sha256(f"{creds.client_id}:{creds.refresh_token}".encode()).hexdigest()[:16]
+
+_access_tokens = {}   # token cache key -> (access token, expiry) refreshed by this process
+
+def load_cached_access_token(creds, path=GMAIL_TOKEN_CACHE):
     """
-    Authenticates via OAuth2 and returns an authenticated Gmail service.
-    On first run it opens a browser window for you to approve access.
-    After that, the token is cached in token.json.
+    Puts a still-valid access token onto creds — one this process refreshed
+    earlier, else the one in `path` if set. True if it did.
     """
+    key = _token_cache_key(creds)
+    try:
+        if key in _access_tokens:
+            creds.token, creds.expiry = _access_tokens[key]
+        elif path:
+            with open(path, encoding="utf-8") as f:
+                cached = json.load(f)
+            if cached.get("key") != key:
+                return False
+            creds.token  = cached["token"]
+            creds.expiry = datetime.fromisoformat(cached["expiry"])   # naive UTC, like google-auth
+        else:
+            return False
+    except (OSError, ValueError, KeyError, TypeError):
+        return False
+    return creds.valid
+
+def save_access_token(creds, path=GMAIL_TOKEN_CACHE):
+    if not creds.token or not creds.expiry:
+        return
+    _access_tokens[_token_cache_key(creds)] = (creds.token, creds.expiry)
+    if not path:
+        return
+    try:
+        _write_atomic(path, json.dumps({"key": _token_cache_key(creds), "token": creds.token,
+                                        "expiry": creds.expiry.isoformat()}))
+        os.chmod(path, 0o600)
+    except OSError as e:
+        logging.warning(f"Could not cache the Gmail access token: {e}")
+
+def get_gmail_credentials(interactive=None):
+    """
+    OAuth2 credentials for sending, cheapest source first: the access token in
+    token.json or one refreshed earlier by this process (or GMAIL_TOKEN_CACHE,
+    if set) while it is still valid, then one refresh
+    (GMAIL_TIMEOUT), then — only with a person at a terminal — the browser
+    consent flow. Non-interactive runs raise GmailAuthError instead of waiting
+    on a local server nobody will ever visit.
+    """
+    from google.oauth2.credentials import Credentials
+    from google.auth.exceptions import GoogleAuthError, TransportError
+
+    interactive = is_interactive() if interactive is None else interactive
     creds = None
     if os.path.exists(TOKEN_FILE):
-        creds = Credentials.from_authorized_user_file(TOKEN_FILE, SCOPES)
-
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
+        try:
+            creds = Credentials.from_authorized_user_file(TOKEN_FILE, SCOPES)
+            if GMAIL_TOKEN_URI:   # the copy loses the expiry, so carry it over
+                creds, creds.expiry = creds.with_token_uri(GMAIL_TOKEN_URI), creds.expiry
+        except ValueError as e:
+            logging.warning(f"Ignoring unreadable {TOKEN_FILE}: {e}")
+
+    if creds and not creds.valid and creds.refresh_token and load_cached_access_token(creds):
+        METRICS.count("gmail_auth", token_reused=1)
+    if creds and creds.valid:
+        return creds
+
+    if creds and creds.refresh_token:
+        from google.auth.transport.requests import Request
+        try:
+            creds.refresh(partial(Request(), timeout=GMAIL_TIMEOUT))
+        except (GoogleAuthError, TransportError) as e:
+            if not interactive:
+                raise GmailAuthError(f"token refresh failed: {e}") from e
+            creds = None
         else:
-            flow = InstalledAppFlow.from_client_secrets_file(CREDS_FILE, SCOPES)
-            creds = flow.run_local_server(port=0)
-        with open(TOKEN_FILE, "w") as token:
-            token.write(creds.to_json())
-
-    return build("gmail", "v1", credentials=creds)
+            METRICS.count("gmail_auth", refreshes=1)
+            save_access_token(creds)
+            with open(TOKEN_FILE, "w") as token:
+                token.write(creds.to_json())
+            return creds
+
+    if not interactive:
+        raise GmailAuthError(f"no usable token in {TOKEN_FILE} and no terminal for the consent flow — "
+                             f"run `python DiceLinks.py gmail-auth` locally and update the token secret")
+    from google_auth_oauthlib.flow import InstalledAppFlow
+    flow  = InstalledAppFlow.from_client_secrets_file(CREDS_FILE, SCOPES)
+    creds = flow.run_local_server(port=0)
+    with open(TOKEN_FILE, "w") as token:
+        token.write(creds.to_json())
+    save_access_token(creds)
+    return creds
+
+def build_gmail_service(creds, endpoint=None, timeout=None):
+    """
+    Gmail client from the discovery document bundled with
+    google-api-python-client — no discovery fetch. `endpoint` (default
+    GMAIL_API_ENDPOINT) replaces the API root, batch URL included, so the
+    whole send path can run against a local fake.
+    """
+    import httplib2
+    import google_auth_httplib2
+    from googleapiclient.discovery import build_from_document
+    from googleapiclient.discovery_cache import get_static_doc
+
+    document = json.loads(get_static_doc("gmail", "v1"))
+    endpoint = endpoint or GMAIL_API_ENDPOINT
+    if endpoint:
+        document["rootUrl"] = endpoint.rstrip("/") + "/"
+    http = google_auth_httplib2.AuthorizedHttp(creds, http=httplib2.Http(timeout=timeout or GMAIL_TIMEOUT))
+    return build_from_document(document, http=http)
+
+def get_gmail_service(interactive=None):
+    """
+    Authenticated Gmail service; see get_gmail_credentials() for where the
+    token comes from. Called lazily, only once a run has an email to send.
+    """
+    with METRICS.stage("gmail_auth"):
+        return build_gmail_service(get_gmail_credentials(interactive))
 
 # ─────────────────────────────────────────────────────────────────
 # EMAIL BUILDER — template with dynamic Job Title
@@ -519,41 +3094,61 @@ def build_email_body(job_title: str) -> str:
 # ─────────────────────────────────────────────────────────────────
 # SEND EMAIL VIA GMAIL API
 # ─────────────────────────────────────────────────────────────────
+GMAIL_BATCH_SIZE = 50    # Gmail recommends keeping batches at 50 requests or fewer
+
+_attachment_cache = {}
+
+def get_resume_attachment(resume_path):
+    """
+    The resume as a ready-encoded MIME part, read and base64-encoded once per
+    run (re-read only if the file changes). None if the file is missing.
+    """
+    if not resume_path or not os.path.exists(resume_path):
+        return None
+    key = (os.path.abspath(resume_path), os.path.getmtime(resume_path))
+    if key not in _attachment_cache:
+        with open(resume_path, "rb") as f:
+            part = MIMEBase("application", "octet-stream")
+            part.set_payload(f.read())
+        encoders.encode_base64(part)
+        filename = os.path.basename(resume_path)
+        part.add_header("Content-Disposition", f'attachment; filename="{filename}"')
+        _attachment_cache[key] = part
+    return _attachment_cache[key]
+
+def build_email_message(to_email: str, job_title: str, resume_path: str):
+    """Returns (subject, raw) — the base64url-encoded MIME message Gmail expects."""
+    title   = job_title.strip() if job_title else "Golang Developer"
+    subject = f"Interested in {title} Position"
+    body    = build_email_body(title)
+
+    # Build MIME message
+    msg = MIMEMultipart()
+    msg["From"]    = f"{SENDER_NAME} <{SENDER_EMAIL}>"
+    msg["To"]      = to_email
+    # msg["Cc"]      = 'charan@symploreus.com'
+    # msg["To"]      = "dkolla1997@gmail.com"
+    msg["Bcc"]      = "kolladinesh26@gmail.com"
+    msg["Subject"] = subject
+    msg.attach(MIMEText(body, "html"))
+
+    # Attach resume if file exists — the encoded part is shared by every message
+    attachment = get_resume_attachment(resume_path)
+    if attachment is not None:
+        msg.attach(attachment)
+    else:
+        print(f"   ⚠️  Resume not found at '{resume_path}' — sending without attachment.")
+
+    raw = base64.urlsafe_b64encode(msg.as_bytes()).decode()
+    return subject, raw
+
 def send_email_via_gmail(service, to_email: str, job_title: str, resume_path: str) -> bool:
     """
     Composes and sends an email with the resume attached using Gmail API.
     Returns True on success, False on failure.
     """
     try:
-        title   = job_title.strip() if job_title else "Golang Developer"
-        subject = f"Interested in {title} Position"
-        body    = build_email_body(title)
-
-        # Build MIME message
-        msg = MIMEMultipart()
-        msg["From"]    = f"{SENDER_NAME} <{SENDER_EMAIL}>"
-        msg["To"]      = to_email
-        # msg["Cc"]      = 'charan@symploreus.com'
-        # msg["To"]      = "dkolla1997@gmail.com"
-        msg["Bcc"]      = "kolladinesh26@gmail.com"
-        msg["Subject"] = subject
-        msg.attach(MIMEText(body, "html"))
-
-        # Attach resume if file exists
-        if resume_path and os.path.exists(resume_path):
-            with open(resume_path, "rb") as f:
-                part = MIMEBase("application", "octet-stream")
-                part.set_payload(f.read())
-                encoders.encode_base64(part)
-                filename = os.path.basename(resume_path)
-                part.add_header("Content-Disposition", f'attachment; filename="{filename}"')
-                msg.attach(part)
-            print(f"   📎 Resume attached: {filename}")
-        else:
-            print(f"   ⚠️  Resume not found at '{resume_path}' — sending without attachment.")
-
-        # Encode and send
-        raw = base64.urlsafe_b64encode(msg.as_bytes()).decode()
+        subject, raw = build_email_message(to_email, job_title, resume_path)
         service.users().messages().send(userId="me", body={"raw": raw}).execute()
         print(f"   ✅ Email sent to: {to_email} | Subject: {subject}")
         return True
@@ -562,81 +3157,797 @@ def send_email_via_gmail(service, to_email: str, job_title: str, resume_path: st
         print(f"   ❌ Failed to send email to {to_email}: {e}")
         return False
 
-def main():
-    resume_content = read_word_resume(resume_path)
-    
-    # Authenticate Gmail once — reused for all emails in this run
-    print("🔐 Authenticating Gmail...")
-    gmail_service = get_gmail_service()
-    print("✅ Gmail authenticated.\n")
+class MailQueue:
+    """
+    Outbound mail queue. add() builds the MIME message right away; flush()
+    sends everything through Gmail batch requests (GMAIL_BATCH_SIZE per HTTP
+    round-trip) and returns {key: [(to_email, sent, error, message_id), ...]}
+    so results can be mapped back to the job they belong to. The service is
+    only built on the first flush; if that fails with GmailAuthError,
+    auth_error is set and every message of the run is reported unsent.
+    """
 
-    df_scraped = fetch_all_links(DICE_URL)
-    df_scraped = df_scraped.drop_duplicates(subset=['URL'], keep='first')
+    def __init__(self, service=None, resume_path=RESUME_PATH, batch_size=GMAIL_BATCH_SIZE,
+                 service_factory=None):
+        self._service        = service
+        self.service_factory = service_factory   # called on first flush if no service was given
+        self.resume_path = resume_path
+        self.batch_size  = batch_size
+        self.pending     = []   # (key, to_email, subject, raw)
+        self.auth_error  = None
+
+    def add(self, key, to_email, job_title, resume_path=None):
+        with METRICS.stage("mime"):
+            subject, raw = build_email_message(to_email, job_title, resume_path or self.resume_path)
+        self.pending.append((key, to_email, subject, raw))
+
+    def __len__(self):
+        return len(self.pending)
+
+    @property
+    def service(self):
+        if self._service is None and self.service_factory:
+            print("🔐 Authenticating Gmail...")
+            self._service = self.service_factory()
+            print("✅ Gmail authenticated.")
+        return self._service
+
+    def flush(self):
+        results = {}
+        pending, self.pending = self.pending, []
+        if pending and self.auth_error is None:
+            try:
+                self.service
+            except GmailAuthError as e:
+                self.auth_error = f"Gmail auth unavailable: {e}"
+                print(f"❌ {self.auth_error}")
+        for start in range(0, len(pending), self.batch_size):
+            chunk = pending[start:start + self.batch_size]
+            if self.auth_error:
+                outcomes = [(False, self.auth_error, None)] * len(chunk)
+            else:
+                with METRICS.stage("gmail"):
+                    outcomes = self._send_chunk(chunk)
+            sent_count = sum(1 for sent, _, _ in outcomes if sent)
+            METRICS.count("gmail", bytes=0 if self.auth_error else sum(len(raw) for _, _, _, raw in chunk),
+                          emails_sent=sent_count, errors=len(chunk) - sent_count)
+            for (key, to_email, subject, _), (sent, error, message_id) in zip(chunk, outcomes):
+                if sent:
+                    print(f"   ✅ Email sent to: {to_email} | Subject: {subject}")
+                else:
+                    print(f"   ❌ Failed to send email to {to_email}: {error}")
+                results.setdefault(key, []).append((to_email, sent, error, message_id))
+        return results
+
+    def _send_chunk(self, chunk):
+        """[(sent, error, message_id)] in chunk order; one batch round-trip when the client supports it."""
+        messages = self.service.users().messages()
+        outcomes = [(False, "not sent", None)] * len(chunk)
+
+        if not hasattr(self.service, "new_batch_http_request"):
+            for i, (_, _, _, raw) in enumerate(chunk):
+                try:
+                    METRICS.count("gmail", requests=1)
+                    response = messages.send(userId="me", body={"raw": raw}).execute()
+                    outcomes[i] = (True, None, (response or {}).get("id"))
+                except Exception as e:
+                    outcomes[i] = (False, str(e), None)
+            return outcomes
+
+        def on_response(request_id, response, exception):
+            if exception is None:
+                outcomes[int(request_id)] = (True, None, (response or {}).get("id"))
+            else:
+                outcomes[int(request_id)] = (False, str(exception), None)
 
-    if df_scraped.empty:
-        print("No jobs found during scraping.")
-        end_msg_jobs_telegram(0)
-        return
-    df_new_raw, df_existing = flt_exsis_links(df_scraped)
-    df_new = df_new_raw.copy()
-    df_new['Job_JD'] = None
-    df_new['ATS_Score'] = None
-    df_new['Badges'] = None
-    df_new['Email']     = None
-    df_new["Email_Sent"]   = None
-    df_new["Email_Not_Sent_Reason"] = None
-
-    if df_new.empty:
-        print("No jobs found during scraping.")
-        end_msg_jobs_telegram(0)
+        batch = self.service.new_batch_http_request(callback=on_response)
+        for i, (_, _, _, raw) in enumerate(chunk):
+            batch.add(messages.send(userId="me", body={"raw": raw}), request_id=str(i))
+        try:
+            METRICS.count("gmail", requests=1)
+            batch.execute()
+        except Exception as e:
+            # The whole round-trip failed — every message in it is unsent
+            return [(False, str(e), None)] * len(chunk)
+        return outcomes
+
+def print_gmail_timing():
+    """One line splitting this run's email cost into auth, MIME build and API latency."""
+    stages = METRICS.report()["stages"]
+    if "gmail_auth" not in stages and "gmail" not in stages:
         return
-    for index, row in df_new.iterrows():
-        JD_data = fetch_job_details(row['URL'])
-        score = ATS_cal(resume_content,JD_data)
-        df_new.at[index, 'ATS_Score'] = str(score)
-        email = extract_email_from_page(row['URL'])
-        df_new.at[index, 'Email'] = email
-
-        if JD_data:
-            job_title = JD_data.get("Title", "")
-            score = ATS_cal(resume_content, JD_data)
-            df_new.at[index, 'ATS_Score'] = f"{score}%"
-            df_new.at[index, 'Company']   = JD_data.get('Company', "")
-            df_new.at[index, 'Badges']    = JD_data.get('Badges', "")
-            df_new.at[index, 'Title']     = JD_data.get('Title', "")
-            df_new.at[index, 'Job_JD']    = str(JD_data.get('Full_Text', ""))
-        
-        # ── 3. Send email if address was found ──────────────────
-        score_value = float(str(score).replace('%', ''))
-        if score and score_value >= 45:  # Only attempt to send if ATS score is 45% or higher
-            if email and email != "N/A":
-                # Handle multiple comma-separated emails on one listing
-                for single_email in [e.strip() for e in email.split(",")]:
-                    sent = send_email_via_gmail(
-                        service     = gmail_service,
-                        to_email    = single_email,
-                        job_title   = job_title,
-                        resume_path = RESUME_PATH,
-                    )
-                    df_new.at[index, "Email_Sent"] = "Y" if sent else "N"
-                    if not sent:
-                        df_new.at[index, "Email_Not_Sent_Reason"] = "Gmail API error"
+    auth, mime, api = (stages.get(name, {}) for name in ("gmail_auth", "mime", "gmail"))
+    print(f"📧 Gmail: auth {auth.get('seconds', 0) * 1000:.0f} ms · MIME p50 {mime.get('p50_ms', 0)} ms "
+          f"× {mime.get('calls', 0)} · API p50 {api.get('p50_ms', 0)} ms / p95 {api.get('p95_ms', 0)} ms "
+          f"per round-trip ({api.get('requests', 0)} requests)")
+
+def run_gmail_auth(check=False):
+    """`gmail-auth`: makes sure token.json works, running the consent flow unless --check."""
+    try:
+        creds = get_gmail_credentials(interactive=not check)
+    except GmailAuthError as e:
+        print(f"❌ {e}")
+        return 1
+    expiry = f"until {creds.expiry:%Y-%m-%d %H:%M} UTC" if creds.expiry else "(no expiry)"
+    print(f"✅ Gmail token in {TOKEN_FILE} valid {expiry}")
+    return 0
+
+def scrape_new_jobs(store, dice_url=None, sources=None):
+    """
+    Scrapes the search results of every source and returns (scraped_count,
+    new_jobs), where new_jobs are the de-duplicated job dicts whose URL is not
+    in the store. Deliberately pandas-free: the common no-new-jobs run stops here.
+    """
+    sources  = sources or ([DiceSource(url=dice_url)] if dice_url else build_sources())
+    stats    = Counter()
+    new_jobs = list(iter_new_jobs(sources, known_urls=store, stats=stats))
+    logging.info(f"Found {len(new_jobs)} new jobs out of {stats['scraped']} scraped jobs "
+                 f"({stats['duplicates']} duplicates across {len(sources)} searches)")
+    return stats["scraped"], new_jobs
+
+# ─────────────────────────────────────────────────────────────────
+# STREAMING PIPELINE
+# scrape page -> dedupe -> fetch detail -> score -> email -> persist -> notify
+# ─────────────────────────────────────────────────────────────────
+STREAM_QUEUE_SIZE  = 50    # jobs buffered between stages — bounds memory
+SCORE_BATCH_SIZE   = 20    # jobs scored / emailed / stored together
+SCORE_BATCH_LINGER = 1.0   # seconds to wait for a batch to fill before processing it
+STAGE_STOP_SECONDS = 15    # a failed run waits this long for its stage threads to stop
+
+_END = object()   # end-of-stream marker passed between stages
+
+def _scrape_stage(store, sources, out_q, stats, resumed=(), stop_at_known=True, cancel=None):
+    """
+    Pushes each unseen job downstream as soon as its search page is parsed,
+    with every search in `sources` running concurrently. Jobs resumed from
+    the journal go first and are not queued twice.
+    stop_at_known=False walks every page even past already-stored jobs.
+    Stops early once `cancel` is set.
+    """
+    cancel = cancel or threading.Event()
+    try:
+        for job in resumed:
+            stats["resumed"] += 1
+            if not put_unless(out_q, job, cancel):
+                return
+        for job in iter_new_jobs(sources, known_urls=store, seen_urls=[job.url for job in resumed],
+                                 stats=stats, stop_at_known=stop_at_known):
+            stats["new"] += 1
+            if not put_unless(out_q, job, cancel):
+                return
+    except Exception as e:
+        logging.error(f"Scrape stage failed: {e}")
+    finally:
+        put_unless(out_q, _END, cancel)
+
+def _detail_stage(fetcher, in_q, out_q, journal=None, cancel=None):
+    """One of DETAIL_WORKERS threads: JobRecord in, (job, detail) out, until _END or `cancel`."""
+    cancel = cancel or threading.Event()
+    while True:
+        job = get_unless(in_q, cancel, default=_END)
+        if job is _END:
+            put_unless(in_q, _END, cancel)   # let the other workers see it too
+            return
+        try:
+            detail = fetcher(job.url, source_for(job))
+        except Exception as e:
+            logging.error(f"Detail stage failed for {job.url}: {e}")
+            detail = {"URL": job.url, "JD_data": None, "Emails": set(), "Error": str(e)}
+        if journal and not detail.get("Error"):
+            journal.mark([job], "fetched")
+        if not put_unless(out_q, (job, detail), cancel):
+            return
+
+def _next_batch(in_q, size=SCORE_BATCH_SIZE, linger=SCORE_BATCH_LINGER):
+    """
+    Up to `size` items from in_q: blocks for the first one, then waits at most
+    `linger` seconds for more. Returns (batch, ended).
+    """
+    first = in_q.get()
+    if first is _END:
+        return [], True
+    batch    = [first]
+    deadline = time.monotonic() + linger
+    while len(batch) < size:
+        try:
+            item = in_q.get(timeout=max(0.0, deadline - time.monotonic()))
+        except queue.Empty:
+            break
+        if item is _END:
+            return batch, True
+        batch.append(item)
+    return batch, False
+
+class WarmState:
+    """
+    Everything a run opens before it can process a job: job store, detail
+    cache, near-duplicate index, journal, resume profiles and the Gmail
+    service. main() builds one and closes it when it is done; `watch` keeps
+    one alive across polls, so none of it is rebuilt per poll.
+    """
+
+    def __init__(self, persist=True):
+        self.store    = JobStore()
+        self.cache    = DetailCache()
+        self.neardup  = NearDupIndex(persist=persist)
+        self.journal  = RunJournal() if persist else None
+        self.lock     = threading.Lock()
+        self._profiles, self._profiles_key = None, None
+        self._gmail   = None
+
+    def resume_profiles(self):
+        """ResumeProfiles, reloaded only when a resume file changes on disk."""
+        key = tuple(os.path.getmtime(path) if os.path.exists(path) else None for path in RESUME_PATHS)
+        with self.lock:
+            if self._profiles is None or key != self._profiles_key:
+                self._profiles, self._profiles_key = load_resume_profiles(cache=self.cache), key
+            return self._profiles
+
+    def gmail_service(self):
+        """Authenticated once; the client refreshes its own access token afterwards."""
+        with self.lock:
+            if self._gmail is None:
+                self._gmail = get_gmail_service()
+            return self._gmail
+
+    def close(self):
+        self.cache.close()
+        self.neardup.close()
+        if self.journal:
+            self.journal.close()
+        self.store.close()
+
+def main(send_emails=True, notify=True, persist=True, on_job=None, dice_url=None, sources=None,
+         warm=None, end_message=True):
+    """
+    Full run as a stream of stages joined by bounded queues, so the first
+    jobs are scored, emailed, stored and announced while later search pages
+    and detail pages are still being fetched. on_job(job) is called for every
+    finished job dict. Returns the number of new jobs processed. Searches
+    come from `sources` (default build_sources()), or a single Dice dice_url.
+
+    When persisting, every step is checkpointed in a RunJournal: a restarted
+    run first finishes the jobs an interrupted run left behind and never
+    emails the same job twice. Reposts of a role already seen (NearDupIndex)
+    reuse its ATS score and are not emailed again.
+
+    `warm` (a WarmState) is reused and left open; without one the run builds
+    and closes its own. A run that raises stops its stage threads, flushes
+    queued Telegram cards and leaves the journal "running" for the next run.
+    """
+    sources  = sources or ([DiceSource(url=dice_url)] if dice_url else build_sources())
+    METRICS.reset()
+    DETAIL_FETCH_COUNTS.clear()
+    owned    = warm is None
+    warm     = warm or WarmState(persist=persist)
+    store, cache, neardup, journal = warm.store, warm.cache, warm.neardup, warm.journal
+    fetcher  = DetailFetcher(cache=cache)   # per run: the retry budget is per run
+    stats    = Counter()
+    jobs_q   = queue.Queue(maxsize=STREAM_QUEUE_SIZE)
+    scored_q = queue.Queue(maxsize=STREAM_QUEUE_SIZE)
+    cancel   = threading.Event()   # set if this run fails, so the stage threads stop
+    threads, notifier, finished = [], None, False
+    try:
+        # Jobs an interrupted run had not stored yet are processed again (their
+        # pages and scores come from the cache); stored-but-unannounced jobs
+        # only need their Telegram card.
+        resumed, unannounced, clean_start = [], [], True
+        if journal:
+            # After a crash, later search pages may never have been processed, so
+            # don't stop paginating at the first page of already-stored jobs
+            clean_start = journal.begin_run()
+            unfinished  = journal.unfinished(below="stored")
+            resumed     = [job for job in unfinished if not store.exists(job.url)]
+            # Committed to the store just before the crash, but never journaled as
+            # stored: only their Telegram card is missing
+            journal.mark([job for job in unfinished if store.exists(job.url)], "stored")
+            # A send the crash cut short may have gone out: reposts of it are not emailed either
+            attempted = {}
+            for job in unfinished:
+                state, saved = journal.get(job.url)
+                if state in ("emailing", "emailed"):
+                    attempted[job.url] = state == "emailing" or saved.email_status is EmailStatus.SENT
+            neardup.set_emailed(attempted)
+            if notify:
+                unannounced, given_up = journal.claim_unannounced()
+                if given_up:
+                    print(f"⚠️  Gave up announcing {given_up} stored jobs after {TELEGRAM_ANNOUNCE_ATTEMPTS} failed runs")
+            if resumed or unannounced:
+                print(f"♻️  Resuming interrupted run: {len(resumed)} jobs to finish, {len(unannounced)} to announce")
+
+        threads = [threading.Thread(target=_scrape_stage,
+                                    args=(store, sources, jobs_q, stats, resumed, clean_start, cancel),
+                                    name="scrape", daemon=True)]
+        threads += [threading.Thread(target=_detail_stage, args=(fetcher, jobs_q, scored_q, journal, cancel),
+                                     name=f"detail-{i}", daemon=True) for i in range(DETAIL_WORKERS)]
+        for thread in threads:
+            thread.start()
+
+        def close_detail_stage():
+            for thread in threads:
+                thread.join()
+            put_unless(scored_q, _END, cancel)
+        threading.Thread(target=close_detail_stage, name="detail-close", daemon=True).start()
+
+        on_sent  = (lambda urls: journal.mark_urls(urls, "notified")) if journal else None
+        notifier = TelegramNotifier(on_sent=on_sent) if notify else None
+        mail     = MailQueue(service_factory=warm.gmail_service) if send_emails else None
+        hold_emails = mail is not None and persist and store.rebuilt and not EMAIL_ON_REBUILT_STORE
+        if hold_emails:
+            print(f"⚠️  {JOB_DB_FILE} was rebuilt this run and may miss recently emailed jobs — "
+                  f"holding emails (EMAIL_ON_REBUILT_STORE=1 sends anyway)")
+        profiles  = None   # ResumeProfiles, loaded with the first batch
+        processed = 0
+
+        for job in unannounced:
+            notifier.submit(format_job_card(job), key=job.url)
+
+        ended = False
+        while not ended:
+            batch, ended = _next_batch(scored_q)
+            if not batch:
+                break
+            if profiles is None:
+                profiles = warm.resume_profiles()
+                if not profiles:
+                    print("Could not process the resume. Please check the file path.")
+                    profiles = [ResumeProfile("")]
+
+            reposts = {}   # batch index -> (original URL, similarity, original's score, original emailed)
+            with METRICS.stage("near_dup"):
+                for i, (job, detail) in enumerate(batch):
+                    JD_data = detail["JD_data"]
+                    if not JD_data:
+                        continue
+                    text  = f"{JD_data.get('Title') or job.title} {JD_data.get('Full_Text') or ''}"
+                    match = neardup.check_and_add(job.url, text)
+                    if match:
+                        reposts[i] = match
+            stats["near_duplicates"] += len(reposts)
+
+            # A repost reuses its original's score when there is one; the rest are scored as a batch
+            reused = {i: match[2] for i, match in reposts.items() if match[2] is not None}
+            with METRICS.stage("ats_scoring"):
+                rows = score_jobs_multi(profiles,
+                                        [None if i in reused else detail["JD_data"] for i, (_, detail) in enumerate(batch)],
+                                        cache=cache)
+            # Each job goes with whichever resume matches it best
+            best   = [max(range(len(profiles)), key=row.__getitem__) for row in rows]
+            scores = [row[b] for row, b in zip(rows, best)]
+            for i, score in reused.items():
+                scores[i] = score
+            neardup.set_scores({batch[i][0].url: score for i, score in enumerate(scores) if i not in reposts})
+
+            emailing = []   # jobs about to be emailed
+            for i, ((job, detail), score) in enumerate(zip(batch, scores)):
+                job_title = job.apply_detail(detail, score)
+                resume    = profiles[best[i]]
+                if len(profiles) > 1 and i not in reused:
+                    job.resume = resume.name
+                state, saved = journal.get(job.url) if journal else (None, None)
+
+                # ── Queue email if address was found ────────────────────
+                if state in ("emailing", "emailed"):
+                    # Already attempted by an interrupted run — never send twice
+                    if state == "emailed":
+                        job.set_email_status(saved.email_status, saved.email_note)
                     else:
-                        df_new.at[index, "Email_Not_Sent_Reason"] = "Sent successfully"
-            else:
-                df_new.at[index, "Email_Sent"] = "N/A"
-                df_new.at[index, "Email_Not_Sent_Reason"] = "No email"
-                print("   ⏭️  No email found — skipping send.")
+                        job.set_email_status(EmailStatus.INTERRUPTED)
+                elif i in reposts and (reposts[i][3] or reposts[i][0] in {queued.url for queued in emailing}):
+                    # Only held back when the original's recruiter got (or is getting) an email
+                    job.set_email_status(EmailStatus.NEAR_DUPLICATE,
+                                         f"Near-duplicate of {reposts[i][0]} ({reposts[i][1]:.0%} similar)")
+                    stats["repost_emails_skipped"] += 1
+                elif score >= ATS_EMAIL_THRESHOLD:  # Only attempt to send if ATS score is high enough
+                    if mail is None:
+                        job.set_email_status(EmailStatus.DISABLED)
+                    elif hold_emails:
+                        job.set_email_status(EmailStatus.HELD)
+                    elif job.emails:
+                        # One message per address when a listing has several
+                        for single_email in job.emails:
+                            mail.add(i, single_email, job_title, resume_path=resume.path)
+                        emailing.append(job)
+                    else:
+                        job.set_email_status(EmailStatus.NO_EMAIL)
+                else:
+                    job.set_email_status(EmailStatus.LOW_SCORE)
+
+            jobs = [job for job, _ in batch]
+            if journal:
+                journal.mark(jobs, "scored")
+                journal.mark(emailing, "emailing")   # write-ahead: set before anything is sent
+
+            if mail is not None and len(mail):
+                print(f"📧 Sending {len(mail)} emails...")
+                message_ids = {}
+                for i, outcomes in mail.flush().items():
+                    job  = batch[i][0]
+                    sent = all(ok for _, ok, _, _ in outcomes)
+                    job.set_email_status(EmailStatus.SENT if sent else
+                                         EmailStatus.AUTH_FAILED if mail.auth_error else EmailStatus.FAILED)
+                    message_ids[job.url] = [message_id for _, _, _, message_id in outcomes if message_id]
+                if journal:
+                    journal.mark(emailing, "emailed", message_ids=message_ids)
+            # An interrupted send may have gone out, so it counts as emailed too
+            neardup.set_emailed({job.url: job.email_status in (EmailStatus.SENT, EmailStatus.INTERRUPTED)
+                                 for job, _ in batch})
+
+            if persist:
+                with METRICS.stage("store"):
+                    store.add_records(jobs)
+                    if journal:
+                        journal.mark(jobs, "stored")
+            for job in jobs:
+                if notifier:
+                    notifier.submit(format_job_card(job), key=job.url)
+                if on_job:
+                    on_job(job)
+            processed += len(jobs)
+            print(f"✅ Processed {processed} new jobs so far")
+
+        check_single_fetch()
+        print_response_savings()
+        print_gmail_timing()
+        if stats["duplicates"]:
+            print(f"🔁 Skipped {stats['duplicates']} duplicate listings across {len(sources)} searches")
+        if stats["near_duplicates"]:
+            print(f"🔁 {stats['near_duplicates']} near-duplicate reposts reused a score, "
+                  f"{stats['repost_emails_skipped']} not emailed (original already emailed)")
+        if persist and processed:
+            print(f"💾 Stored {processed} new jobs in {JOB_DB_FILE}")
+        if persist:
+            sync_history(store)
+        if not processed:
+            print("No jobs found during scraping." if not stats["scraped"] else "No new jobs found.")
+        METRICS.set_info(scraped=stats["scraped"], new=stats["new"], resumed=stats["resumed"],
+                         duplicates=stats["duplicates"], near_duplicates=stats["near_duplicates"],
+                         processed=processed,
+                         searches=len(sources), page_fetches=sum(DETAIL_FETCH_COUNTS.values()))
+        if notifier:
+            notifier.close()
+            if end_message:
+                end_msg_jobs_telegram(processed, summary=METRICS.summary())
+        write_run_report()
+        if journal:
+            journal.clear("notified" if notify else "stored")
+            journal.finish_run()
+        if persist:
+            store.rebuilt = False   # caught up: later polls of a warm store email as usual
+        finished = True
+        return processed
+    finally:
+        if not finished:
+            # Failed run: stop the stage threads (they would block on full queues
+            # otherwise) and send the cards already queued. The journal is left
+            # "running" on purpose: the next run resumes the unfinished jobs and
+            # walks every search page again.
+            cancel.set()
+            if notifier:
+                notifier.close()
+            deadline = time.monotonic() + STAGE_STOP_SECONDS
+            for thread in threads:
+                thread.join(max(0.0, deadline - time.monotonic()))
+        if owned:
+            warm.close()
+
+# ─────────────────────────────────────────────────────────────────
+# WATCH — long-running daemon with warm state and adaptive polling
+# ─────────────────────────────────────────────────────────────────
+class PollSchedule:
+    """
+    Delay before the next poll. New postings tend to arrive in bursts, so a
+    poll that finds any snaps the interval back to min_seconds; each empty
+    poll grows it by `backoff` up to max_seconds. Every delay is jittered by
+    ±jitter so a fleet of watchers doesn't poll in lockstep.
+    """
+
+    def __init__(self, min_seconds=WATCH_MIN_SECONDS, max_seconds=WATCH_MAX_SECONDS,
+                 backoff=WATCH_BACKOFF, jitter=WATCH_JITTER, rng=None):
+        self.min_seconds = min_seconds
+        self.max_seconds = max(min_seconds, max_seconds)
+        self.backoff     = backoff
+        self.jitter      = jitter
+        self.rng         = rng or random.Random()
+        self.interval    = min_seconds
+
+    def next_delay(self, new_jobs):
+        if new_jobs:
+            self.interval = self.min_seconds
         else:
-            df_new.at[index, "Email_Sent"] = "N/A"
-            df_new.at[index, "Email_Not_Sent_Reason"] = "Less ATS score"
+            self.interval = min(self.max_seconds, self.interval * self.backoff)
+        return self.interval * self.rng.uniform(1 - self.jitter, 1 + self.jitter)
+
+def watch(sources=None, schedule=None, max_polls=None, stop=None, on_job=None):
+    """
+    Runs main() over and over in one process with one WarmState, so the HTTP
+    pool, Gmail service, resume profiles, detail cache and dedup indexes stay
+    loaded between polls. The first SIGINT/SIGTERM lets the current poll
+    finish and then closes everything cleanly; a second one aborts the poll
+    (the journal lets the next start finish it). Returns the number of new
+    jobs processed.
+    """
+    stop     = stop or threading.Event()
+    schedule = schedule or PollSchedule()
+    polls = total = 0
+
+    def request_stop(signum, frame):
+        if stop.is_set():
+            raise KeyboardInterrupt
+        print(f"🛑 {signal.Signals(signum).name} received — finishing the current poll")
+        stop.set()
+
+    previous = {}
+    if threading.current_thread() is threading.main_thread():
+        previous = {sig: signal.signal(sig, request_stop) for sig in (signal.SIGINT, signal.SIGTERM)}
+
+    warm = WarmState()
+    print(f"👀 Watching {len(sources or SEARCH_QUERIES)} searches every "
+          f"{schedule.min_seconds:.0f}-{schedule.max_seconds:.0f}s — Ctrl+C to stop")
+    try:
+        while not stop.is_set():
+            polls  += 1
+            started = time.monotonic()
+            try:
+                processed = main(sources=sources, warm=warm, on_job=on_job, end_message=False)
+            except Exception:
+                logging.exception("Watch poll failed")
+                processed = 0
+            total += processed
+            if max_polls and polls >= max_polls:
+                break
+            delay = schedule.next_delay(processed)
+            print(f"💤 Poll {polls}: {processed} new in {time.monotonic() - started:.1f}s — next in {delay:.0f}s")
+            stop.wait(delay)
+    finally:
+        warm.close()
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
+        print(f"👋 Watcher stopped after {polls} polls, {total} new jobs")
+    return total
+
+# ─────────────────────────────────────────────────────────────────
+# CLI
+# ─────────────────────────────────────────────────────────────────
+# Modules that must not be loaded just by importing DiceLinks
+LAZY_MODULES = ["pandas", "numpy", "pyarrow", "sklearn", "docx", "googleapiclient", "google_auth_oauthlib", "openpyxl"]
+STARTUP_BUDGET_MS = 400
+EMPTY_RUN_BUDGET_MS = 800   # import + a full run whose search finds nothing
+
+# Child of check_startup(): a whole run against a search with no results
+_EMPTY_RUN_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+import DiceLinks
+DiceLinks.configure_logging("WARNING")
+DiceLinks.main(send_emails=False, notify=False, dice_url=sys.argv[2], end_message=False)
+print(json.dumps({"ms": (time.perf_counter() - started) * 1000,
+                  "loaded": sorted(m for m in DiceLinks.LAZY_MODULES if m in sys.modules)}))
+"""
+
+def _serve_empty_search():
+    """Local HTTP server answering every request with a Dice search page without results."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class EmptySearch(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = b'<html><body><script>{"totalResults":0,"pageSize":20}</script></body></html>'
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), EmptySearch)
+    threading.Thread(target=server.serve_forever, name="empty-search", daemon=True).start()
+    return server
+
+def check_startup(budget_ms=STARTUP_BUDGET_MS, run_budget_ms=EMPTY_RUN_BUDGET_MS):
+    """
+    Imports DiceLinks in a fresh interpreter under `python -X importtime`, then
+    times a whole run in another one — fresh stores in a scratch directory,
+    a local search with no results, no email or Telegram. Fails if either
+    takes longer than its budget or pulls in a module from LAZY_MODULES —
+    i.e. the no-new-jobs path got heavier.
+    """
+    import tempfile
+    here = os.path.dirname(os.path.abspath(__file__))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import DiceLinks"],
+        cwd=here, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        print(proc.stderr)
+        return 1
+
+    total_us, loaded = 0, set()
+    for line in proc.stderr.splitlines():
+        # "import time:   self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = [part.strip() for part in line[len("import time:"):].split("|")]
+        if not cumulative.isdigit():
+            continue
+        loaded.add(name.split(".")[0])
+        if name == "DiceLinks":
+            total_us = int(cumulative)
 
-    if save_to_excel(df_new, df_existing):
-        print(f"💾 Successfully saved to {EXCEL_FILE}")
-    print(f"📤 Sending {len(df_new)} new jobs to Telegram...")
-    send_jobs_to_telegram(df_new)
-    time.sleep(2)
-    end_msg_jobs_telegram(len(df_new))
+    server = _serve_empty_search()
+    try:
+        with tempfile.TemporaryDirectory(prefix="dicelinks-startup-") as workdir:
+            run = subprocess.run(
+                [sys.executable, "-c", _EMPTY_RUN_SCRIPT, here,
+                 f"http://127.0.0.1:{server.server_port}/jobs?q=Golang"],
+                cwd=workdir, capture_output=True, text=True,
+            )
+    finally:
+        server.shutdown()
+    if run.returncode != 0:
+        print(run.stderr)
+        return 1
+    empty_run = json.loads(run.stdout.strip().splitlines()[-1])
+
+    heavy     = sorted(loaded.intersection(LAZY_MODULES))
+    run_heavy = [name for name in empty_run["loaded"] if name not in heavy]
+    print(f"⏱️  import DiceLinks: {total_us / 1000:.0f} ms (budget {budget_ms} ms)")
+    print(f"⏱️  no-new-jobs run: {empty_run['ms']:.0f} ms (budget {run_budget_ms} ms)")
+    if heavy:
+        print(f"❌ Eagerly imported: {', '.join(heavy)}")
+    if run_heavy:
+        print(f"❌ Imported by a run without new jobs: {', '.join(run_heavy)}")
+    slow = total_us / 1000 > budget_ms or empty_run["ms"] > run_budget_ms
+    if slow:
+        print("❌ Startup budget exceeded")
+    return 1 if heavy or run_heavy or slow else 0
+
+def notify_recent(count):
+    """Re-sends Telegram cards for the `count` most recently stored jobs."""
+    store = JobStore()
+    notifier = TelegramNotifier()
+    for job in store.latest(count):
+        notifier.submit(format_job_card(job))
+    notifier.close()
+
+def print_repost_clusters(limit):
+    """Prints the `limit` largest groups of near-duplicate postings in the job history."""
+    store = JobStore()   # creates/migrates the jobs table the index backfills from
+    index = NearDupIndex()
+    clusters = index.clusters()
+    print(f"🔁 {len(clusters)} repost clusters among {len(index)} indexed jobs")
+    for cluster in clusters[:limit]:
+        print(f"\n   {len(cluster)} postings:")
+        for url in cluster:
+            row = index.conn.execute("SELECT Title, Company FROM jobs WHERE URL = ?", (url,)).fetchone()
+            title, company = row if row else ("(not stored)", None)
+            print(f"   {title} | {company or 'N/A'} | {url}")
+    index.close()
+    store.close()
+
+def run_history(args):
+    """`history migrate|stats|compact` — the Parquet archive of the job store."""
+    archive = HistoryArchive(args.dir)
+    if args.action == "migrate":
+        store = JobStore(history_dir=args.dir)   # a new store migrates EXCEL_FILE on its own
+        if args.xlsx and args.xlsx != EXCEL_FILE:
+            print(f"📥 Imported {store.import_excel(args.xlsx)} new jobs from {args.xlsx}")
+        written = archive.sync(store)
+        store.close()
+        print(f"📦 Archived {written} jobs — {len(archive)} rows in {len(archive.files())} files under {archive.root}/")
+    elif args.action == "compact":
+        print(f"🗜️  Removed {archive.compact()} part files — {len(archive.files())} left")
+    elif args.action == "stats":
+        stats = history_stats(archive, since=args.since, until=args.until, top=args.top)
+        if args.json:
+            print(json.dumps(stats, indent=2))
+            return 0
+        ats = stats["ats"]
+        print(f"📊 {stats['rows']} jobs, {ats['scored']} scored — mean ATS {ats['mean']}%, median {ats['median']}%, "
+              f"{ats['above_threshold']} at or above {ATS_EMAIL_THRESHOLD}%")
+        peak = max(ats["histogram"].values(), default=0) or 1
+        for bucket, count in ats["histogram"].items():
+            print(f"   {bucket:>7}% {'█' * round(30 * count / peak):<30} {count}")
+        if stats["email_hit_rate"] is not None:
+            print(f"📧 Email found for {stats['email_hit_rate']:.1%} of jobs, {stats['emails_sent']} sent")
+        print("🏢 Top companies:")
+        for company, count in stats["top_companies"].items():
+            print(f"   {count:>5}  {company}")
+    return 0
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(prog="DiceLinks", description="Dice job scraper, ATS scorer and notifier.")
+    parser.add_argument("--query", action="append", metavar="QUERY",
+                        help='search to run, repeatable; "<source>:<query>" or a Dice query (default: SEARCH_QUERIES)')
+    sub = parser.add_subparsers(dest="command")
+
+    sub.add_parser("run", help="full pipeline (default)")
+
+    watcher = sub.add_parser("watch", help="stay running and poll adaptively with warm caches")
+    watcher.add_argument("--min-interval", type=float, default=WATCH_MIN_SECONDS,
+                         help=f"seconds between polls while postings arrive (default: {WATCH_MIN_SECONDS:.0f})")
+    watcher.add_argument("--max-interval", type=float, default=WATCH_MAX_SECONDS,
+                         help=f"back-off ceiling while nothing is new (default: {WATCH_MAX_SECONDS:.0f})")
+    watcher.add_argument("--max-polls", type=int, help="exit after this many polls")
+    sub.add_parser("scrape", help="list new jobs on the search results; the job store is only read")
+    sub.add_parser("enrich", help="fetch and score new jobs, no emails, Telegram or store writes")
+
+    notify = sub.add_parser("notify", help="re-send Telegram cards for recently stored jobs")
+    notify.add_argument("--last", type=int, default=10, help="number of jobs (default: 10)")
+
+    dupes = sub.add_parser("dupes", help="list clusters of near-duplicate reposts in the job history")
+    dupes.add_argument("--limit", type=int, default=10, help="number of clusters (default: 10)")
+
+    history = sub.add_parser("history", help="Parquet job-history archive: migrate, stats, compact")
+    history.add_argument("action", choices=["migrate", "stats", "compact"])
+    history.add_argument("--dir", default=HISTORY_DIR, help=f"archive directory (default: {HISTORY_DIR})")
+    history.add_argument("--xlsx", default=EXCEL_FILE, help="migrate: extra Excel history to import first")
+    history.add_argument("--since", help="stats: first Added_At day, YYYY-MM-DD")
+    history.add_argument("--until", help="stats: last Added_At day, YYYY-MM-DD")
+    history.add_argument("--top", type=int, default=10, help="stats: number of companies (default: 10)")
+    history.add_argument("--json", action="store_true", help="stats: print JSON")
+
+    gmail = sub.add_parser("gmail-auth", help="create or refresh token.json (browser consent if needed)")
+    gmail.add_argument("--check", action="store_true", help="never open a browser; exit 1 without a usable token")
+
+    export = sub.add_parser("export", help="export the job store to Excel")
+    export.add_argument("--path", default=EXCEL_FILE)
+
+    backup = sub.add_parser("backup", help="write a gzip snapshot of the job store")
+    backup.add_argument("--path", default=f"{JOB_DB_FILE}.gz")
+
+    startup = sub.add_parser("check-startup", help="assert the import-time and no-new-jobs run budgets")
+    startup.add_argument("--budget-ms", type=int, default=STARTUP_BUDGET_MS)
+    startup.add_argument("--run-budget-ms", type=int, default=EMPTY_RUN_BUDGET_MS)
+    return parser
+
+def cli(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    configure_logging()
+    command = args.command or "run"
+    sources = build_sources(args.query)
+
+    if command == "run":
+        main(sources=sources)
+    elif command == "watch":
+        watch(sources, PollSchedule(args.min_interval, args.max_interval), max_polls=args.max_polls)
+    elif command == "scrape":
+        # Read-only, and without a job store every scraped job is new
+        store = JobStore(readonly=True) if os.path.exists(JOB_DB_FILE) else set()
+        try:
+            scraped_count, new_jobs = scrape_new_jobs(store, sources=sources)
+        finally:
+            if isinstance(store, JobStore):
+                store.close()
+        print(f"🆕 {len(new_jobs)} new of {scraped_count} scraped jobs")
+        for job in new_jobs:
+            print(f"   {job.title} | {job.company or 'N/A'} | {job.url}")
+    elif command == "enrich":
+        main(send_emails=False, notify=False, persist=False, sources=sources,
+             on_job=lambda job: print(f"   {job.ats_score:>6}% | {job.title} | {job.company or 'N/A'} | {job.email}"))
+    elif command == "notify":
+        notify_recent(args.last)
+    elif command == "dupes":
+        print_repost_clusters(args.limit)
+    elif command == "history":
+        return run_history(args)
+    elif command == "gmail-auth":
+        return run_gmail_auth(args.check)
+    elif command == "export":
+        export_to_excel(args.path)
+    elif command == "backup":
+        size = backup_store(args.path)
+        print(f"💾 Job store snapshot written to {args.path} ({size / 1e6:.1f} MB)")
+    elif command == "check-startup":
+        return check_startup(args.budget_ms, args.run_budget_ms)
+    return 0
 
 if __name__ == "__main__":
-    main()
+    try:
+        exit_code = cli()
+    finally:
+        print_http_stats()
+        print_cache_stats()
+    sys.exit(exit_code)